@@ -6,6 +6,7 @@ from sqlalchemy import engine_from_config, pool
 import books_rec_api.models  # noqa
 from books_rec_api.config import settings
 from books_rec_api.database import Base
+from books_rec_api.search_index import UNMAPPED_SEARCH_OBJECTS
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -31,6 +32,13 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+def include_object(
+    object: object, name: str | None, type_: str, reflected: bool, compare_to: object | None
+) -> bool:
+    # The full-text search column and index exist only in the database (see search_index).
+    return not (reflected and compare_to is None and name in UNMAPPED_SEARCH_OBJECTS)
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -49,6 +57,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -69,7 +78,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,65 @@
+"""pack_book_id_lists
+
+Revision ID: 3c1d7a9e5b20
+Revises: f99216de62a9
+Create Date: 2026-03-02 10:12:04.318822
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+from books_rec_api.packed_ids import decode_book_ids, encode_book_ids
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1d7a9e5b20"
+down_revision: str | Sequence[str] | None = "f99216de62a9"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (table, primary key, id list column)
+_LIST_COLUMNS = (
+    ("book_similarities", "book_id", "neighbor_ids"),
+    ("book_popularity", "scope", "book_ids"),
+)
+
+
+def _convert(table: str, key: str, column: str, new_type: sa.types.TypeEngine[object]) -> None:
+    """
+    Rewrites `column` into `new_type` through a temporary column, row by row in Python,
+    since the JSON <-> packed binary conversion has no SQL equivalent.
+    """
+    to_packed = isinstance(new_type, sa.LargeBinary)
+    tmp_column = f"{column}_new"
+    op.add_column(table, sa.Column(tmp_column, new_type, nullable=True))
+
+    bind = op.get_bind()
+    source = sa.table(
+        table, sa.column(key), sa.column(column, sa.JSON if to_packed else sa.LargeBinary)
+    )
+    target = sa.table(table, sa.column(key), sa.column(tmp_column, new_type))
+    for row in bind.execute(sa.select(source.c[key], source.c[column])).all():
+        value: object = (
+            encode_book_ids(row[1] or [])
+            if to_packed
+            else list(decode_book_ids(bytes(row[1] or b"")))
+        )
+        bind.execute(sa.update(target).where(target.c[key] == row[0]).values({tmp_column: value}))
+
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.drop_column(column)
+        batch_op.alter_column(tmp_column, new_column_name=column, nullable=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, key, column in _LIST_COLUMNS:
+        _convert(table, key, column, sa.LargeBinary())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, key, column in _LIST_COLUMNS:
+        _convert(table, key, column, sa.JSON())
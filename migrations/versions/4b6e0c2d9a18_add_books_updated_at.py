@@ -0,0 +1,39 @@
+"""add_books_updated_at
+
+Revision ID: 4b6e0c2d9a18
+Revises: d3a96b2f7e15
+Create Date: 2026-03-10 09:41:12.508334
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4b6e0c2d9a18"
+down_revision: str | Sequence[str] | None = "d3a96b2f7e15"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Part of the catalog version: max(updated_at) is read off the index on every check.
+    op.add_column(
+        "books",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("NOW()"),
+        ),
+    )
+    op.create_index("ix_books_updated_at", "books", ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_books_updated_at", table_name="books")
+    op.drop_column("books", "updated_at")
@@ -0,0 +1,47 @@
+"""add_book_genres_index_table
+
+Revision ID: 6d2b8e41c7a3
+Revises: 3c1d7a9e5b20
+Create Date: 2026-03-04 09:41:27.106532
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6d2b8e41c7a3"
+down_revision: str | Sequence[str] | None = "3c1d7a9e5b20"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "book_genres",
+        sa.Column("genre", sa.Text(), nullable=False),
+        sa.Column("book_id", sa.String(length=36), nullable=False),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("genre", "book_id"),
+    )
+    op.create_index("ix_book_genres_book_id", "book_genres", ["book_id"], unique=False)
+
+    # Backfill from the JSON column, including books seeded by docker/postgres/init.
+    op.execute(
+        """
+        INSERT INTO book_genres (genre, book_id)
+        SELECT DISTINCT g.genre, b.id
+        FROM books AS b
+        CROSS JOIN LATERAL json_array_elements_text(b.genres) AS g(genre)
+        WHERE g.genre <> ''
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_book_genres_book_id", table_name="book_genres")
+    op.drop_table("book_genres")
@@ -0,0 +1,44 @@
+"""add_book_counts
+
+Revision ID: 8a4f1c9d2e67
+Revises: 6d2b8e41c7a3
+Create Date: 2026-03-05 14:22:51.480913
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8a4f1c9d2e67"
+down_revision: str | Sequence[str] | None = "6d2b8e41c7a3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "book_counts",
+        sa.Column("scope", sa.Text(), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("scope"),
+    )
+
+    # Same rows as scripts.goodbooks_books_importer.refresh_book_counts.
+    op.execute(
+        """
+        INSERT INTO book_counts (scope, count, refreshed_at)
+        SELECT 'all', COUNT(*), NOW() FROM books
+        UNION ALL
+        SELECT 'genre:' || genre, COUNT(*), NOW() FROM book_genres GROUP BY genre
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("book_counts")
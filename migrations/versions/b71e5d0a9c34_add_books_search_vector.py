@@ -0,0 +1,32 @@
+"""add_books_search_vector
+
+Revision ID: b71e5d0a9c34
+Revises: 8a4f1c9d2e67
+Create Date: 2026-03-06 16:05:12.774019
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+from books_rec_api.search_index import POSTGRES_SEARCH_DDL
+
+# revision identifiers, used by Alembic.
+revision: str = "b71e5d0a9c34"
+down_revision: str | Sequence[str] | None = "8a4f1c9d2e67"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Generated column: existing rows are filled when the column is added.
+    for statement in POSTGRES_SEARCH_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_books_search_vector", table_name="books")
+    op.drop_column("books", "search_vector")
@@ -0,0 +1,43 @@
+"""add_published_recs_versions
+
+Revision ID: c8d51f3e7a62
+Revises: 4b6e0c2d9a18
+Create Date: 2026-03-10 15:18:03.662417
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c8d51f3e7a62"
+down_revision: str | Sequence[str] | None = "4b6e0c2d9a18"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "published_recs_versions",
+        sa.Column("name", sa.Text(), nullable=False),
+        sa.Column("recs_version", sa.Text(), nullable=False),
+        sa.Column("published_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+    # Until scripts/job_compute_neighbors.py next runs, the stored lists' newest version.
+    op.execute(
+        """
+        INSERT INTO published_recs_versions (name, recs_version, published_at)
+        SELECT 'neighbors', MAX(recs_version), NOW() FROM book_similarities
+        HAVING MAX(recs_version) IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("published_recs_versions")
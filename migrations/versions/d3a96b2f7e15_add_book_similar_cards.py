@@ -0,0 +1,38 @@
+"""add_book_similar_cards
+
+Revision ID: d3a96b2f7e15
+Revises: b71e5d0a9c34
+Create Date: 2026-03-09 11:04:37.215846
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d3a96b2f7e15"
+down_revision: str | Sequence[str] | None = "b71e5d0a9c34"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled by scripts/job_compute_neighbors.py; until it runs, expanded similar-books
+    # responses read the cards from `books` directly.
+    op.create_table(
+        "book_similar_cards",
+        sa.Column("book_id", sa.String(length=36), nullable=False),
+        sa.Column("cards", sa.JSON(), nullable=False),
+        sa.Column("recs_version", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("book_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("book_similar_cards")
@@ -0,0 +1,173 @@
+"""
+Closed-loop HTTP benchmark comparing API deployments side by side.
+
+Each target is hammered by `--concurrency` workers for `--duration` seconds, cycling
+through the given paths. Throughput and latency percentiles are printed per target,
+e.g. to compare the threadpool (BOOKS_REC_DB_ASYNC=false) and async serving stacks:
+
+    uv run python scripts/bench_api.py \\
+        --target threadpool=http://localhost:8000 \\
+        --target async=http://localhost:8001 \\
+        --path /books/1/similar?limit=20 --path /books/2/similar?limit=20
+"""
+
+import argparse
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+
+import httpx
+
+
+@dataclass
+class BenchResult:
+    name: str
+    duration_s: float
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies_ms) + self.errors
+
+    @property
+    def throughput_rps(self) -> float:
+        return self.requests / self.duration_s if self.duration_s > 0 else 0.0
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+        return ordered[rank]
+
+
+def parse_target(value: str) -> tuple[str, str]:
+    name, sep, url = value.partition("=")
+    if not sep or not name or not url:
+        raise argparse.ArgumentTypeError(f"Expected NAME=URL, got {value!r}")
+    return name, url.rstrip("/")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare API throughput and tail latency.")
+    parser.add_argument(
+        "--target",
+        type=parse_target,
+        action="append",
+        required=True,
+        help="NAME=BASE_URL of a running API; repeat to compare deployments.",
+    )
+    parser.add_argument(
+        "--path",
+        action="append",
+        required=True,
+        help="Request path (with query string); repeat to rotate over several paths.",
+    )
+    parser.add_argument("--method", default="GET", help="HTTP method to use.")
+    parser.add_argument("--body", default=None, help="Optional JSON request body.")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per target.")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds first.")
+    return parser.parse_args()
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    method: str,
+    paths: list[str],
+    body: str | None,
+    offset: int,
+    deadline: float,
+    result: BenchResult | None,
+) -> None:
+    i = offset
+    headers = {"Content-Type": "application/json"} if body is not None else None
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, content=body, headers=headers)
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        if result is None:
+            continue
+        if ok:
+            result.latencies_ms.append((time.perf_counter() - start) * 1000)
+        else:
+            result.errors += 1
+
+
+async def run_target(
+    name: str,
+    base_url: str,
+    method: str,
+    paths: list[str],
+    body: str | None,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+) -> BenchResult:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        if warmup > 0:
+            warmup_deadline = time.perf_counter() + warmup
+            await asyncio.gather(
+                *(
+                    _worker(client, method, paths, body, i, warmup_deadline, None)
+                    for i in range(concurrency)
+                )
+            )
+
+        result = BenchResult(name=name, duration_s=duration)
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(
+            *(_worker(client, method, paths, body, i, deadline, result) for i in range(concurrency))
+        )
+        result.duration_s = time.perf_counter() - start
+        return result
+
+
+def render(results: list[BenchResult]) -> str:
+    header = f"{'target':<16}{'requests':>10}{'errors':>8}{'rps':>10}"
+    header += f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.name:<16}{r.requests:>10}{r.errors:>8}{r.throughput_rps:>10.1f}"
+            f"{r.percentile(50):>10.2f}{r.percentile(95):>10.2f}{r.percentile(99):>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+async def main_async(args: argparse.Namespace) -> list[BenchResult]:
+    results = []
+    for name, base_url in args.target:
+        print(f"[INFO] Benchmarking {name} ({base_url}) for {args.duration}s...")
+        results.append(
+            await run_target(
+                name=name,
+                base_url=base_url,
+                method=args.method.upper(),
+                paths=args.path,
+                body=args.body,
+                concurrency=args.concurrency,
+                duration=args.duration,
+                warmup=args.warmup,
+            )
+        )
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    results = asyncio.run(main_async(args))
+    print(render(results))
+
+
+if __name__ == "__main__":
+    main()
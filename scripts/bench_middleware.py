@@ -0,0 +1,153 @@
+"""
+In-process microbenchmark of the request-context middleware: the previous
+`BaseHTTPMiddleware` implementation versus the pure ASGI `EvalContextMiddleware`, with a
+bare app as the baseline. Requests are driven straight through the ASGI interface, so
+the numbers isolate middleware overhead from networking and the database:
+
+    uv run python scripts/bench_middleware.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any
+
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message
+
+from books_rec_api.context import eval_request_id_var, eval_run_id_var
+from books_rec_api.middleware import EvalContextMiddleware
+from scripts.bench_api import BenchResult, render
+
+logger = logging.getLogger("books_rec_api.request")
+
+VARIANTS = ("none", "base_http", "pure_asgi")
+
+
+class LegacyEvalContextMiddleware(BaseHTTPMiddleware):
+    """
+    The `BaseHTTPMiddleware` implementation `EvalContextMiddleware` replaced, kept as
+    the comparison baseline.
+    """
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        eval_run_id = request.headers.get("X-Eval-Run-Id") or "none"
+        eval_request_id = request.headers.get("X-Request-Id") or f"req-{uuid.uuid4().hex[:12]}"
+
+        run_token = eval_run_id_var.set(eval_run_id)
+        req_token = eval_request_id_var.set(eval_request_id)
+        start = time.perf_counter()
+
+        try:
+            response = await call_next(request)
+            latency_ms = max((time.perf_counter() - start) * 1000, 0.0)
+            logger.info(
+                "http_request_complete",
+                extra={
+                    "run_id": eval_run_id,
+                    "request_id": eval_request_id,
+                    "method": request.method,
+                    "path": str(request.url.path),
+                    "status_code": response.status_code,
+                    "latency_ms": round(latency_ms, 3),
+                },
+            )
+            return response
+        finally:
+            eval_run_id_var.reset(run_token)
+            eval_request_id_var.reset(req_token)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare request middleware overhead.")
+    parser.add_argument("--requests", type=int, default=20_000, help="Timed requests per app.")
+    parser.add_argument("--warmup", type=int, default=1_000, help="Untimed requests per app.")
+    return parser.parse_args()
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+    if variant == "base_http":
+        app.add_middleware(LegacyEvalContextMiddleware)
+    elif variant == "pure_asgi":
+        app.add_middleware(EvalContextMiddleware)
+
+    @app.get("/ping")
+    async def ping() -> Response:
+        return Response(b'{"ok":true}', media_type="application/json")
+
+    return app
+
+
+async def call(app: ASGIApp) -> int:
+    scope: dict[str, Any] = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"x-request-id", b"req-bench")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_variant(variant: str, requests: int, warmup: int) -> BenchResult:
+    app = build_app(variant)
+    for _ in range(warmup):
+        await call(app)
+
+    result = BenchResult(name=variant, duration_s=0.0)
+    start = time.perf_counter()
+    for _ in range(requests):
+        request_start = time.perf_counter()
+        if await call(app) == 200:
+            result.latencies_ms.append((time.perf_counter() - request_start) * 1000)
+        else:
+            result.errors += 1
+    result.duration_s = time.perf_counter() - start
+    return result
+
+
+def overhead_us(result: BenchResult, baseline: BenchResult) -> float:
+    """
+    Median per-request cost added on top of the bare app, in microseconds.
+    """
+    return (result.percentile(50) - baseline.percentile(50)) * 1000
+
+
+async def main_async(args: argparse.Namespace) -> list[BenchResult]:
+    return [await run_variant(variant, args.requests, args.warmup) for variant in VARIANTS]
+
+
+def main() -> None:
+    args = parse_args()
+    results = asyncio.run(main_async(args))
+    print(render(results))
+    baseline = results[0]
+    for result in results[1:]:
+        print(f"[INFO] {result.name}: +{overhead_us(result, baseline):.1f} us/request (p50)")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,11 +32,12 @@ def run_command(cmd: list[str], env: dict[str, str] | None = None) -> None:
 
 
 def wait_for_api() -> None:
-    print("[INFO] Waiting for API to become healthy...")
+    print("[INFO] Waiting for API to become ready...")
     max_retries = 300  # 10 minutes (300 * 2s)
     for _ in range(max_retries):
         try:
-            req = urllib.request.Request("http://localhost:8000/docs", method="HEAD")
+            # 503 until startup warmup finishes, which urlopen raises as HTTPError.
+            req = urllib.request.Request("http://localhost:8000/healthz/ready")
             with urllib.request.urlopen(req, timeout=1) as response:
                 if response.status == 200:
                     print("[INFO] API is healthy and ready!")
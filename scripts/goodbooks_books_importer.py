@@ -7,12 +7,13 @@ from decimal import Decimal, InvalidOperation
 from pathlib import Path
 from typing import Any
 
-from sqlalchemy import select, text
+from sqlalchemy import delete, func, literal, select, text
+from sqlalchemy import insert as sa_insert
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from books_rec_api.database import SessionLocal
-from books_rec_api.models import Book
+from books_rec_api.models import Book, BookCount, BookGenre, book_genre_rows
 
 
 @dataclass
@@ -165,12 +166,50 @@ def _upsert_books_chunk(session: Session, batch: list[dict[str, Any]]) -> tuple[
     ]
     stmt = stmt.on_conflict_do_update(
         index_elements=[Book.id],
-        set_={column: getattr(stmt.excluded, column) for column in update_columns},
+        # Core upserts skip the column's onupdate, so the stamp is set here.
+        set_={
+            **{column: getattr(stmt.excluded, column) for column in update_columns},
+            "updated_at": func.now(),
+        },
     )
     session.execute(stmt)
+    sync_book_genres(session, batch)
     return inserted, updated
 
 
+def sync_book_genres(session: Session, batch: list[dict[str, Any]]) -> None:
+    """
+    Rewrites the `book_genres` rows of the given books. Core upserts bypass the ORM
+    hooks that keep the table in sync with `Book.genres`, so the importer does it here.
+    """
+    session.execute(delete(BookGenre).where(BookGenre.book_id.in_([row["id"] for row in batch])))
+    rows = [genre for row in batch for genre in book_genre_rows(row["id"], row["genres"])]
+    if rows:
+        session.execute(sa_insert(BookGenre), rows)
+
+
+def refresh_book_counts(session: Session) -> None:
+    """
+    Recomputes `book_counts` (catalog total and one row per genre) from the current
+    catalog; `/books` reports these as `total` instead of counting per request.
+    """
+    session.execute(delete(BookCount))
+    session.execute(
+        sa_insert(BookCount).from_select(
+            ["scope", "count", "refreshed_at"],
+            select(literal("all"), func.count(), func.now()).select_from(Book),
+        )
+    )
+    session.execute(
+        sa_insert(BookCount).from_select(
+            ["scope", "count", "refreshed_at"],
+            select(literal("genre:") + BookGenre.genre, func.count(), func.now()).group_by(
+                BookGenre.genre
+            ),
+        )
+    )
+
+
 def import_books(
     data_dir: Path | str,
     *,
@@ -219,6 +258,8 @@ def import_books(
                 stats.inserted_rows += inserted
                 stats.updated_rows += updated
                 batch.clear()
+
+            refresh_book_counts(session)
     finally:
         session.close()
 
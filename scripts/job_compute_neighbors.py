@@ -1,9 +1,10 @@
 import argparse
 import logging
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from contextlib import AbstractContextManager
 from dataclasses import dataclass
 from datetime import UTC, datetime
+from pathlib import Path
 from typing import NamedTuple, TypedDict
 
 from sqlalchemy import delete, select
@@ -12,7 +13,16 @@ from sqlalchemy.orm import Session
 
 from books_rec_api.database import SessionLocal
 from books_rec_api.domain import AlgoId, BookId, RecsVersion, Score
-from books_rec_api.models import Book, BookSimilarity
+from books_rec_api.models import (
+    NEIGHBORS_RECS_VERSION,
+    Book,
+    BookPopularity,
+    BookSimilarCards,
+    BookSimilarity,
+    PublishedRecsVersion,
+    book_card,
+)
+from books_rec_api.neighbors_artifact import publish_neighbors_artifact
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,6 +47,13 @@ class SimilarityRecord(TypedDict):
     updated_at: datetime
 
 
+class SimilarCardsRecord(TypedDict):
+    book_id: BookId
+    cards: list[dict[str, str | None]]
+    recs_version: RecsVersion
+    updated_at: datetime
+
+
 def normalize_metadata(items: list[str] | None) -> frozenset[str]:
     if not items:
         return frozenset()
@@ -51,13 +68,33 @@ def compute_jaccard(set1: frozenset[str], set2: frozenset[str]) -> float:
     return intersection / union
 
 
+def shelf_ids(
+    anchor_id: BookId, neighbor_ids: Sequence[BookId], popularity_ids: Sequence[str], k: int
+) -> list[str]:
+    """
+    Returns the ids whose cards are stored for an anchor: its neighbors, then the
+    popularity list the similar route falls back to, without the anchor or duplicates.
+    """
+    seen = {anchor_id}
+    ids: list[str] = []
+    for book_id in (*neighbor_ids, *popularity_ids):
+        if len(ids) >= k:
+            break
+        if book_id not in seen:
+            seen.add(BookId(book_id))
+            ids.append(book_id)
+    return ids
+
+
 def compute_neighbors(
-    k: int = 100, session_factory: Callable[[], AbstractContextManager[Session]] = SessionLocal
+    k: int = 100,
+    session_factory: Callable[[], AbstractContextManager[Session]] = SessionLocal,
+    artifact_dir: Path | None = None,
 ) -> None:
     logger.info("Fetching book metadata...")
 
     with session_factory() as session:
-        stmt = select(Book.id, Book.authors, Book.genres)
+        stmt = select(Book.id, Book.title, Book.authors, Book.genres, Book.small_image_url)
         books = session.execute(stmt).all()
 
         if not books:
@@ -68,18 +105,24 @@ def compute_neighbors(
 
         # Precompute features
         book_data: dict[BookId, BookFeatures] = {}
+        cards: dict[str, dict[str, str | None]] = {}
         for b in books:
             book_id = BookId(b.id)
             book_data[book_id] = BookFeatures(
                 authors=normalize_metadata(b.authors),
                 genres=normalize_metadata(b.genres),
             )
+            cards[book_id] = book_card(b.id, b.title, b.authors, b.small_image_url)
+
+        popularity = session.get(BookPopularity, "global")
+        popularity_ids = [pid for pid in popularity.book_ids if pid in cards] if popularity else []
 
         book_ids = list(book_data.keys())
         recs_version = RecsVersion(datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ"))
         algo_id = AlgoId("meta_v0")
 
         similarities_to_insert: list[SimilarityRecord] = []
+        shelves_to_insert: list[SimilarCardsRecord] = []
 
         # Simple O(N^2) pairwise similarity
         for i, anchor_id in enumerate(book_ids):
@@ -113,6 +156,16 @@ def compute_neighbors(
                     updated_at=datetime.now(UTC),
                 )
             )
+            shelves_to_insert.append(
+                SimilarCardsRecord(
+                    book_id=anchor_id,
+                    cards=[
+                        cards[sid] for sid in shelf_ids(anchor_id, top_k_ids, popularity_ids, k)
+                    ],
+                    recs_version=recs_version,
+                    updated_at=datetime.now(UTC),
+                )
+            )
 
             if (i + 1) % 1000 == 0:
                 logger.info(f"Computed {i + 1}/{len(book_ids)} books.")
@@ -121,20 +174,41 @@ def compute_neighbors(
 
         # Batch upsert to database
         session.execute(delete(BookSimilarity))
+        session.execute(delete(BookSimilarCards))
 
         batch_size = 1000
         for i in range(0, len(similarities_to_insert), batch_size):
             batch = similarities_to_insert[i : i + batch_size]
             session.execute(insert(BookSimilarity).values(batch))
+            session.execute(insert(BookSimilarCards).values(shelves_to_insert[i : i + batch_size]))
+        session.merge(PublishedRecsVersion(name=NEIGHBORS_RECS_VERSION, recs_version=recs_version))
 
         session.commit()
         logger.info(
             f"Saved similarities for {len(similarities_to_insert)} books. Version: {recs_version}"
         )
 
+        if artifact_dir is not None:
+            # Snapshot the current popularity list so artifact-mode serving needs no DB.
+            path = publish_neighbors_artifact(
+                artifact_dir,
+                recs_version=recs_version,
+                algo_id=algo_id,
+                neighbors={r["book_id"]: r["neighbor_ids"] for r in similarities_to_insert},
+                popularity_ids=popularity.book_ids if popularity else (),
+                popularity_recs_version=popularity.recs_version if popularity else None,
+            )
+            logger.info(f"Published neighbor artifact: {path}")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Compute book neighbors.")
     parser.add_argument("--k", type=int, default=100, help="Max neighbors per book")
+    parser.add_argument(
+        "--artifact-dir",
+        type=Path,
+        default=None,
+        help="Also publish a memory-mappable neighbors.bin artifact into this directory",
+    )
     args = parser.parse_args()
-    compute_neighbors(k=args.k)
+    compute_neighbors(k=args.k, artifact_dir=args.artifact_dir)
@@ -0,0 +1,159 @@
+"""
+Admission control: a concurrency limit per route class, enforced before a request
+reaches the threadpool or the database pool.
+
+Each class admits up to `limit` requests at once. Beyond that a request may wait in a
+bounded queue for up to `queue_timeout` seconds; when the queue is full or the wait
+times out it is answered at once with `503` and `Retry-After`, so an overload sheds the
+excess instead of stretching every request's latency. Slots are handed to queued
+requests in arrival order.
+
+State lives on the event loop thread that runs the middleware, so no locking is
+needed; every value is per worker process.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from books_rec_api.config import Settings, settings
+
+SIMILAR = "similar"
+CATALOG = "catalog"
+TELEMETRY = "telemetry"
+
+
+def route_class(path: str) -> str | None:
+    """
+    Maps a request path to its limiter: similar-books reads, other catalog reads, or
+    telemetry ingest. Everything else (health, metrics, admin, users) is not limited.
+    """
+    if path == "/books/similar:batch" or (path.startswith("/books/") and path.endswith("/similar")):
+        return SIMILAR
+    if path == "/books" or path.startswith("/books/"):
+        return CATALOG
+    if path.startswith("/telemetry/"):
+        return TELEMETRY
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class LimiterStats:
+    name: str
+    limit: int
+    in_flight: int
+    queued: int
+    admitted: int
+    shed_queue_full: int
+    shed_timeout: int
+    waits: int
+    wait_seconds_total: float
+
+
+class ConcurrencyLimiter:
+    def __init__(
+        self, name: str, limit: int, max_queue: int = 0, queue_timeout: float = 0.0
+    ) -> None:
+        if limit < 1:
+            raise ValueError("limit must be >= 1")
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._admitted = 0
+        self._shed_queue_full = 0
+        self._shed_timeout = 0
+        self._waits = 0
+        self._wait_seconds_total = 0.0
+
+    async def acquire(self) -> bool:
+        """
+        Takes a slot, waiting in the queue if allowed; False means the request is shed.
+        """
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            self._admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self._shed_queue_full += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            admitted = True
+        except TimeoutError:
+            # A slot handed over just as the wait expired is kept.
+            admitted = waiter.done()
+            if not admitted:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+        except asyncio.CancelledError:
+            # The client went away while queued; pass on a slot already handed over.
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            raise
+        finally:
+            self._waits += 1
+            self._wait_seconds_total += time.perf_counter() - start
+
+        if admitted:
+            self._admitted += 1
+        else:
+            self._shed_timeout += 1
+        return admitted
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest waiter so in_flight stays at the limit
+        # while requests are queued.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def stats(self) -> LimiterStats:
+        return LimiterStats(
+            name=self.name,
+            limit=self.limit,
+            in_flight=self._in_flight,
+            queued=len(self._waiters),
+            admitted=self._admitted,
+            shed_queue_full=self._shed_queue_full,
+            shed_timeout=self._shed_timeout,
+            waits=self._waits,
+            wait_seconds_total=self._wait_seconds_total,
+        )
+
+
+def build_limiters(config: Settings) -> dict[str, ConcurrencyLimiter]:
+    """
+    One limiter per route class whose configured limit is positive.
+    """
+    limits = {
+        SIMILAR: config.admission_similar_limit,
+        CATALOG: config.admission_catalog_limit,
+        TELEMETRY: config.admission_telemetry_limit,
+    }
+    return {
+        name: ConcurrencyLimiter(
+            name,
+            limit,
+            max_queue=config.admission_max_queue,
+            queue_timeout=config.admission_queue_timeout_seconds,
+        )
+        for name, limit in limits.items()
+        if limit > 0
+    }
+
+
+route_limiters = build_limiters(settings)
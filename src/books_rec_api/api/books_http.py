@@ -0,0 +1,127 @@
+"""
+Query parameters, error mapping and response building shared by the sync
+(`routes.books`) and async (`routes.async_books`) book routes, so the two only differ
+in how they call their service.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Annotated, Any, Literal
+
+from fastapi import Header, HTTPException, Query, Response, status
+from pydantic import BaseModel
+
+from books_rec_api.config import settings
+from books_rec_api.domain import BookId
+from books_rec_api.fieldsets import FIELDS_DESCRIPTION, InvalidFieldsError
+from books_rec_api.http_cache import cached_response, etag_matches, json_response
+from books_rec_api.pagination import InvalidCursorError
+from books_rec_api.schemas.book import (
+    BookRead,
+    PaginatedBooks,
+    PaginatedBookSearch,
+    PartialBookRead,
+    PartialPaginatedBooks,
+)
+from books_rec_api.schemas.recommendation import (
+    SimilarBooksExpandedResponse,
+    SimilarBooksResponse,
+)
+from books_rec_api.services.book_service import SimilarBooksBody
+
+PageQuery = Annotated[int, Query(ge=1, description="Page number")]
+SizeQuery = Annotated[int, Query(ge=1, le=100, description="Items per page")]
+GenreQuery = Annotated[str | None, Query(description="Filter by genre")]
+PageCursorQuery = Annotated[
+    str | None, Query(description="Opaque next_cursor from the previous page; overrides page")
+]
+SearchQuery = Annotated[
+    str, Query(min_length=1, max_length=200, description="Free-text search query")
+]
+SearchCursorQuery = Annotated[
+    str | None, Query(description="Opaque next_cursor from the previous page")
+]
+FieldsQuery = Annotated[str | None, Query(description=FIELDS_DESCRIPTION)]
+SimilarLimitQuery = Annotated[int, Query(description="Max number of similar books to return")]
+ExpandQuery = Annotated[
+    Literal["books"] | None,
+    Query(description="'books' adds a compact card (title, author, cover) per similar book"),
+]
+IfNoneMatchHeader = Annotated[str | None, Header()]
+
+# The routes return pre-serialized responses, some shaped by `fields` or `expand`, so
+# they document them here instead of declaring a response_model.
+BOOK_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {
+        "model": BookRead | PartialBookRead,
+        "description": "The book; with `fields`, `id` and the requested fields only.",
+    }
+}
+BOOKS_PAGE_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {
+        "model": PaginatedBooks | PartialPaginatedBooks,
+        "description": "A page of books; with `fields`, each holds `id` and the requested "
+        "fields only.",
+    }
+}
+SEARCH_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {"model": PaginatedBookSearch, "description": "Matching books, best match first."}
+}
+SIMILAR_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {
+        "model": SimilarBooksResponse | SimilarBooksExpandedResponse,
+        "description": "Similar book ids; with `expand=books`, a card per similar book.",
+    }
+}
+
+
+@contextmanager
+def invalid_input_as_bad_request() -> Iterator[None]:
+    """
+    Answers an invalid `cursor` or `fields` value with 400.
+    """
+    try:
+        yield
+    except (InvalidCursorError, InvalidFieldsError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+def check_similar_limit(limit: int) -> None:
+    if limit < 0 or limit > 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Query param 'limit' must be between 0 and 100",
+        )
+
+
+def book_not_found(book_id: BookId) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Book with id {book_id} not found",
+    )
+
+
+def catalog_not_modified(etag: str | None, if_none_match: str | None) -> Response | None:
+    """
+    The 304 for a catalog request whose ETag (see `BookService.catalog_etag`) the client
+    already holds, checked before the response is loaded.
+    """
+    if etag is None or not etag_matches(if_none_match, etag):
+        return None
+    return cached_response(None, etag, settings.http_cache_control_books)
+
+
+def catalog_response(model: BaseModel, if_none_match: str | None, etag: str | None) -> Response:
+    content = model.model_dump_json().encode("utf-8")
+    if etag is None:
+        return json_response(content, if_none_match, settings.http_cache_control_books)
+    return cached_response(content, etag, settings.http_cache_control_books)
+
+
+def similar_response(book_id: BookId, body: SimilarBooksBody | None) -> Response:
+    if body is None:
+        raise book_not_found(book_id)
+
+    # A shelf degraded to the popularity list must not be reused by shared caches.
+    cache_control = "no-store" if body.degraded else settings.http_cache_control_similar
+    return cached_response(body.content, body.etag, cache_control)
@@ -0,0 +1,35 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from books_rec_api.dependencies.admin import get_pool_metrics, get_single_flight_groups
+from books_rec_api.pool_metrics import PoolMetrics
+from books_rec_api.schemas.admin import (
+    DbPoolStatsResponse,
+    PoolStatsRead,
+    SingleFlightStatsRead,
+    SingleFlightStatsResponse,
+)
+from books_rec_api.single_flight import AsyncSingleFlight, SingleFlight
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/db-pool", response_model=DbPoolStatsResponse)
+def get_db_pool_stats(
+    metrics: Annotated[dict[str, PoolMetrics], Depends(get_pool_metrics)],
+) -> DbPoolStatsResponse:
+    """Report live connection-pool usage and checkout latency for each engine."""
+    return DbPoolStatsResponse(
+        pools=[PoolStatsRead.model_validate(m.snapshot()) for m in metrics.values()]
+    )
+
+
+@router.get("/single-flight", response_model=SingleFlightStatsResponse)
+def get_single_flight_stats(
+    groups: Annotated[list[SingleFlight | AsyncSingleFlight], Depends(get_single_flight_groups)],
+) -> SingleFlightStatsResponse:
+    """Report how many book reads ran and how many were coalesced onto an in-flight fetch."""
+    return SingleFlightStatsResponse(
+        groups=[SingleFlightStatsRead.model_validate(group.stats()) for group in groups]
+    )
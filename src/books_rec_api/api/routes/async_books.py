@@ -0,0 +1,127 @@
+import uuid
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Response
+
+from books_rec_api.api.books_http import (
+    BOOK_RESPONSES,
+    BOOKS_PAGE_RESPONSES,
+    SEARCH_RESPONSES,
+    SIMILAR_RESPONSES,
+    ExpandQuery,
+    FieldsQuery,
+    GenreQuery,
+    IfNoneMatchHeader,
+    PageCursorQuery,
+    PageQuery,
+    SearchCursorQuery,
+    SearchQuery,
+    SimilarLimitQuery,
+    SizeQuery,
+    book_not_found,
+    catalog_not_modified,
+    catalog_response,
+    check_similar_limit,
+    invalid_input_as_bad_request,
+    similar_response,
+)
+from books_rec_api.dependencies.books import get_async_book_service
+from books_rec_api.domain import BookId
+from books_rec_api.fieldsets import parse_book_fields
+from books_rec_api.schemas.recommendation import (
+    SimilarBooksBatchRequest,
+    SimilarBooksBatchResponse,
+)
+from books_rec_api.services.book_service import AsyncBookService
+
+router = APIRouter(prefix="/books", tags=["books"])
+
+
+@router.get("", response_model=None, responses=BOOKS_PAGE_RESPONSES)
+async def list_books(
+    svc: Annotated[AsyncBookService, Depends(get_async_book_service)],
+    page: PageQuery = 1,
+    size: SizeQuery = 20,
+    genre: GenreQuery = None,
+    cursor: PageCursorQuery = None,
+    fields: FieldsQuery = None,
+    if_none_match: IfNoneMatchHeader = None,
+) -> Response:
+    """Retrieve a paginated list of books from the catalog."""
+    with invalid_input_as_bad_request():
+        book_fields = parse_book_fields(fields)
+    etag = await svc.catalog_etag("books", page, size, genre, cursor, book_fields)
+    if (not_modified := catalog_not_modified(etag, if_none_match)) is not None:
+        return not_modified
+    with invalid_input_as_bad_request():
+        books = await svc.get_books(
+            page=page, size=size, genre=genre, cursor=cursor, fields=book_fields
+        )
+    return catalog_response(books, if_none_match, etag)
+
+
+@router.post("/similar:batch", response_model=SimilarBooksBatchResponse)
+async def get_similar_books_batch(
+    payload: SimilarBooksBatchRequest,
+    svc: Annotated[AsyncBookService, Depends(get_async_book_service)],
+) -> SimilarBooksBatchResponse:
+    """Retrieve similar book IDs for several anchors in one request."""
+    return await svc.get_similar_books_batch(payload.book_ids, payload.limit)
+
+
+# Registered before "/{book_id}" so "search" is not captured as a book id.
+@router.get("/search", response_model=None, responses=SEARCH_RESPONSES)
+async def search_books(
+    svc: Annotated[AsyncBookService, Depends(get_async_book_service)],
+    q: SearchQuery,
+    size: SizeQuery = 20,
+    cursor: SearchCursorQuery = None,
+    if_none_match: IfNoneMatchHeader = None,
+) -> Response:
+    """Search the catalog by title, original title, authors and description, best match first."""
+    etag = await svc.catalog_etag("search", q, size, cursor)
+    if (not_modified := catalog_not_modified(etag, if_none_match)) is not None:
+        return not_modified
+    with invalid_input_as_bad_request():
+        results = await svc.search_books(q=q, size=size, cursor=cursor)
+    return catalog_response(results, if_none_match, etag)
+
+
+@router.get("/{book_id}", response_model=None, responses=BOOK_RESPONSES)
+async def get_book_by_id(
+    book_id: BookId,
+    svc: Annotated[AsyncBookService, Depends(get_async_book_service)],
+    fields: FieldsQuery = None,
+    if_none_match: IfNoneMatchHeader = None,
+) -> Response:
+    """Retrieve a specific book's metadata."""
+    with invalid_input_as_bad_request():
+        book_fields = parse_book_fields(fields)
+    etag = await svc.catalog_etag("book", book_id, book_fields)
+    if (not_modified := catalog_not_modified(etag, if_none_match)) is not None:
+        return not_modified
+    book = await svc.get_book(book_id, fields=book_fields)
+    if not book:
+        raise book_not_found(book_id)
+    return catalog_response(book, if_none_match, etag)
+
+
+@router.get(
+    "/{book_id}/similar",
+    response_model=None,
+    responses=SIMILAR_RESPONSES,
+)
+async def get_similar_books(
+    book_id: BookId,
+    svc: Annotated[AsyncBookService, Depends(get_async_book_service)],
+    limit: SimilarLimitQuery = 20,
+    expand: ExpandQuery = None,
+    if_none_match: IfNoneMatchHeader = None,
+) -> Response:
+    """Retrieve an ordered list of similar book IDs for a given book."""
+    check_similar_limit(limit)
+    # Pre-serialized body (see SimilarBooksResponse), sent without re-validation.
+    body = await svc.get_similar_books_json(
+        book_id, limit, str(uuid.uuid4()), if_none_match, expand_books=expand == "books"
+    )
+    return similar_response(book_id, body)
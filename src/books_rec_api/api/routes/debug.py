@@ -0,0 +1,45 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from books_rec_api.config import settings
+from books_rec_api.dependencies.admin import require_debug_profiling
+from books_rec_api.profiling import ProfileBusyError, profile_allocations, profile_stacks
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"],
+    dependencies=[Depends(require_debug_profiling)],
+    include_in_schema=False,
+)
+
+
+@router.post("/profile")
+async def profile_worker(
+    seconds: float = Query(30.0, gt=0, description="Profiling window"),
+    mode: Literal["cpu", "wall", "alloc"] = Query("cpu", description="What to profile"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Stack sampling interval"),
+    limit: int = Query(25, ge=1, le=500, description="Allocation sites to return (alloc)"),
+) -> Response:
+    """
+    Profile the worker that receives this request against its live traffic.
+
+    cpu/wall return collapsed stacks for flamegraph tools; alloc returns the top
+    allocation sites.
+    """
+    if seconds > settings.debug_profile_max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Query param 'seconds' must be at most {settings.debug_profile_max_seconds:g}",
+        )
+
+    try:
+        if mode == "alloc":
+            report = await profile_allocations(seconds, limit=limit)
+        else:
+            report = await profile_stacks(
+                seconds, interval=interval_ms / 1000, include_idle=mode == "wall"
+            )
+    except ProfileBusyError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    return Response(content=report, media_type="text/plain; charset=utf-8")
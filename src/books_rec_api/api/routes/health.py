@@ -0,0 +1,24 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+
+from books_rec_api.dependencies.admin import get_warmup_state
+from books_rec_api.warmup import WarmupState
+
+router = APIRouter(prefix="/healthz", tags=["admin"])
+
+
+@router.get("/live", include_in_schema=False)
+def get_liveness() -> dict[str, str]:
+    """Report that the worker is up, whether or not warmup has finished."""
+    return {"status": "ok"}
+
+
+@router.get("/ready", include_in_schema=False)
+def get_readiness(
+    state: Annotated[WarmupState, Depends(get_warmup_state)],
+) -> JSONResponse:
+    """Report ready once startup warmup has finished, and 503 until then."""
+    code = status.HTTP_200_OK if state.ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(status_code=code, content=state.snapshot())
@@ -0,0 +1,16 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Response
+
+from books_rec_api.dependencies.admin import get_metrics_registry
+from books_rec_api.metrics import CONTENT_TYPE, MetricsRegistry
+
+router = APIRouter(tags=["admin"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics(
+    registry: Annotated[MetricsRegistry, Depends(get_metrics_registry)],
+) -> Response:
+    """Expose request, similar-books, telemetry, pool, cache and coalescing metrics."""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
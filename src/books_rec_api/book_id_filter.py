@@ -0,0 +1,137 @@
+"""
+In-process membership filter over the catalog's book ids, used to answer requests for
+ids that do not exist with a 404 before any query runs.
+
+`BloomFilter` never reports a stored id as missing; an unknown id passes with the
+configured false-positive rate and then costs the usual database miss. Ids are
+arbitrary strings (the column is `String(36)`), so the filter hashes them rather than
+relying on the Goodbooks ids being numeric.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections.abc import Callable, Collection
+from dataclasses import dataclass
+
+from books_rec_api.cache import VersionedSnapshot
+
+
+class BloomFilter:
+    __slots__ = ("_bits", "_size", "_hashes", "count", "false_positive_rate")
+
+    def __init__(self, capacity: int, false_positive_rate: float) -> None:
+        if not 0.0 < false_positive_rate < 1.0:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        capacity = max(capacity, 1)
+        self._size = max(
+            64, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        )
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self.count = 0
+        self.false_positive_rate = 0.0
+
+    @classmethod
+    def from_ids(cls, book_ids: Collection[str], false_positive_rate: float) -> "BloomFilter":
+        bloom = cls(len(book_ids), false_positive_rate)
+        for book_id in book_ids:
+            bloom.add(book_id)
+        bloom.false_positive_rate = bloom.estimated_false_positive_rate()
+        return bloom
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    def _positions(self, book_id: str) -> list[int]:
+        # Double hashing: k positions from the two halves of one 128-bit digest.
+        digest = hashlib.blake2b(book_id.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._size for i in range(self._hashes)]
+
+    def add(self, book_id: str) -> None:
+        for position in self._positions(book_id):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, book_id: object) -> bool:
+        if not isinstance(book_id, str):
+            return False
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(book_id)
+        )
+
+    def estimated_false_positive_rate(self) -> float:
+        """
+        Probability that an id never added is reported present, from the bits set.
+        """
+        set_bits = int.from_bytes(self._bits, "little").bit_count()
+        return float((set_bits / self._size) ** self._hashes)
+
+
+@dataclass(frozen=True, slots=True)
+class BookIdFilterStats:
+    entries: int
+    nbytes: int
+    false_positive_rate: float
+    rejections: int
+    false_positives: int
+
+
+class BookIdFilterStore(VersionedSnapshot[BloomFilter]):
+    """
+    Holds the Bloom filter of catalog ids, rebuilt when the catalog version changes.
+
+    The version is re-checked once per `check_seconds`, and before an id is rejected
+    unless it was checked within `miss_recheck_seconds`, so a book added in the meantime
+    is rejected for at most that long. Before the first build every id is treated as
+    possibly present.
+    """
+
+    def __init__(
+        self,
+        false_positive_rate: float = 0.01,
+        check_seconds: float = 30.0,
+        miss_recheck_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(check_seconds=check_seconds, clock=clock)
+        self.false_positive_rate = false_positive_rate
+        self.miss_recheck_seconds = miss_recheck_seconds
+        self._counter_lock = threading.Lock()
+        self._rejections = 0
+        self._false_positives = 0
+
+    def build(self, book_ids: Collection[str]) -> BloomFilter:
+        return BloomFilter.from_ids(book_ids, self.false_positive_rate)
+
+    def record_rejection(self) -> None:
+        with self._counter_lock:
+            self._rejections += 1
+
+    def record_false_positive(self) -> None:
+        if self.current is None:
+            return
+        with self._counter_lock:
+            self._false_positives += 1
+
+    def stats(self) -> BookIdFilterStats:
+        bloom = self.current
+        with self._counter_lock:
+            return BookIdFilterStats(
+                entries=bloom.count if bloom is not None else 0,
+                nbytes=bloom.nbytes if bloom is not None else 0,
+                false_positive_rate=bloom.false_positive_rate if bloom is not None else 0.0,
+                rejections=self._rejections,
+                false_positives=self._false_positives,
+            )
+
+    def clear(self) -> None:
+        super().clear()
+        with self._counter_lock:
+            self._rejections = 0
+            self._false_positives = 0
@@ -0,0 +1,297 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Sequence
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+
+class VersionedLRUCache(Generic[K, V]):
+    """
+    Bounded LRU cache with per-entry TTL whose entries belong to a single version.
+
+    Reads for any other version are misses; writing under a new version drops every
+    entry stored under the previous one, so a publish invalidates the cache at once.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._version: str | None = None
+        self._stats = CacheStats()
+
+    @property
+    def version(self) -> str | None:
+        return self._version
+
+    def get(self, version: str, key: K) -> V | None:
+        with self._lock:
+            if version != self._version:
+                self._stats.misses += 1
+                return None
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def put(self, version: str, key: K, value: V) -> None:
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self._stats.invalidations += 1
+                self._entries.clear()
+                self._version = version
+
+            self._entries[key] = (self._clock() + self._ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                invalidations=self._stats.invalidations,
+                size=len(self._entries),
+            )
+
+
+@dataclass(frozen=True, slots=True)
+class CachedNeighbors:
+    neighbor_ids: Sequence[str]
+    algo_id: str | None
+    recs_version: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class CachedPopularity:
+    book_ids: Sequence[str]
+    recs_version: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class CachedSimilarResponse:
+    """
+    Serialized similar-books response body split around its trace_id value.
+    """
+
+    prefix: bytes
+    suffix: bytes
+    etag: str
+    log_fields: dict[str, object]
+
+    def render(self, trace_id: str) -> bytes:
+        return self.prefix + json.dumps(trace_id, ensure_ascii=False).encode("utf-8") + self.suffix
+
+
+class SimilarBooksCache:
+    """
+    In-process cache for neighbor lists, the global popularity fallback and, when
+    `response_max_entries` is positive, serialized response bodies per
+    (book_id, limit, expanded).
+
+    The published artifact version is re-read through the supplied fetcher at most
+    once per `version_check_seconds`, so hot anchors are served without touching the
+    database between checks.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        version_check_seconds: float,
+        response_max_entries: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.neighbors: VersionedLRUCache[str, CachedNeighbors] = VersionedLRUCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds, clock=clock
+        )
+        self.popularity: VersionedLRUCache[str, CachedPopularity] = VersionedLRUCache(
+            max_entries=1, ttl_seconds=ttl_seconds, clock=clock
+        )
+        self.responses: VersionedLRUCache[tuple[str, int, bool], CachedSimilarResponse] | None = (
+            VersionedLRUCache(
+                max_entries=response_max_entries, ttl_seconds=ttl_seconds, clock=clock
+            )
+            if response_max_entries > 0
+            else None
+        )
+        self._version_check_seconds = version_check_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._version: str | None = None
+        self._version_checked_at = 0.0
+
+    def fresh_version(self) -> str | None:
+        """
+        Returns the last seen artifact version, or None when it is due for a re-check.
+        """
+        with self._lock:
+            if (
+                self._version is not None
+                and self._clock() - self._version_checked_at < self._version_check_seconds
+            ):
+                return self._version
+            return None
+
+    def record_version(self, version: str) -> None:
+        with self._lock:
+            self._version = version
+            self._version_checked_at = self._clock()
+
+    def clear(self) -> None:
+        self.neighbors.clear()
+        self.popularity.clear()
+        if self.responses is not None:
+            self.responses.clear()
+        with self._lock:
+            self._version = None
+            self._version_checked_at = 0.0
+
+
+class LastKnownGood:
+    """
+    Most recent popularity list and the neighbors of up to `max_entries` recently read
+    anchors, whatever their version and age, for serving similar books while the
+    database is unavailable. Unlike `SimilarBooksCache` nothing expires or is dropped
+    on a publish; entries are only replaced by newer reads.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._neighbors: OrderedDict[str, CachedNeighbors] = OrderedDict()
+        self.popularity: CachedPopularity | None = None
+
+    def neighbors(self, book_id: str) -> CachedNeighbors | None:
+        with self._lock:
+            return self._neighbors.get(book_id)
+
+    def put_neighbors(self, book_id: str, neighbors: CachedNeighbors) -> None:
+        with self._lock:
+            self._neighbors[book_id] = neighbors
+            self._neighbors.move_to_end(book_id)
+            while len(self._neighbors) > self._max_entries:
+                self._neighbors.popitem(last=False)
+
+    def put_popularity(self, popularity: CachedPopularity) -> None:
+        self.popularity = popularity
+
+    def __len__(self) -> int:
+        return len(self._neighbors)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._neighbors.clear()
+            self.popularity = None
+
+
+T = TypeVar("T")
+
+
+class VersionedSnapshot(Generic[T]):
+    """
+    Holds one value built for a version stamp and replaces it whole when the stamp
+    changes. The stamp is re-checked at most once per `check_seconds`; readers that
+    already hold the previous value keep using it safely.
+    """
+
+    def __init__(self, check_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self._check_seconds = check_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._value: T | None = None
+        self._version: str | None = None
+        self._checked_at: float | None = None
+
+    @property
+    def current(self) -> T | None:
+        return self._value
+
+    @property
+    def version(self) -> str | None:
+        return self._version
+
+    def fresh(self) -> T | None:
+        """
+        Returns the value, or None when there is none yet or it is due for a re-check.
+        """
+        with self._lock:
+            if self._checked_at is None or self._clock() - self._checked_at >= self._check_seconds:
+                return None
+            return self._value
+
+    def checked_within(self, seconds: float) -> bool:
+        """
+        True when the version was checked less than `seconds` ago.
+        """
+        with self._lock:
+            return self._checked_at is not None and self._clock() - self._checked_at < seconds
+
+    def record_version(self, version: str) -> T | None:
+        """
+        Records a version check; returns the value when it was built for `version`.
+        """
+        with self._lock:
+            self._checked_at = self._clock()
+            return self._value if version == self._version else None
+
+    def install(self, version: str, value: T) -> T:
+        with self._lock:
+            self._value = value
+            self._version = version
+            self._checked_at = self._clock()
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._value = None
+            self._version = None
+            self._checked_at = None
@@ -0,0 +1,135 @@
+"""
+Optional in-memory copy of the catalog's `BookRead` columns serving `GET /books` and
+`GET /books/{book_id}` without a query.
+
+Each column is one tuple ordered by book id; a book is a `CatalogBook` view holding only
+the snapshot and its row index. A dict maps ids to rows and each genre keeps its row
+indexes in an `array("i")`, so the genre filter and keyset pagination are a lookup and
+a bisect. Ids are ordered by code point, which matches Postgres under the C collation
+and, for the numeric Goodbooks ids, any collation.
+
+A snapshot is immutable; `CatalogSnapshotStore` swaps in a new one when the catalog
+version changes (books added, removed or re-imported).
+"""
+
+import time
+from array import array
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any
+
+from books_rec_api.cache import VersionedSnapshot
+
+# Loaded in this order by `BooksRepository.get_catalog_rows`.
+CATALOG_COLUMNS = ("id", "title", "authors", "genres", "publication_year", "description")
+
+
+class CatalogBook:
+    """
+    Read-only view of one snapshot row, exposing the `BookRead` attributes.
+    """
+
+    __slots__ = ("_snapshot", "_row")
+
+    def __init__(self, snapshot: "CatalogSnapshot", row: int) -> None:
+        self._snapshot = snapshot
+        self._row = row
+
+    @property
+    def id(self) -> str:
+        return self._snapshot.ids[self._row]
+
+    @property
+    def title(self) -> str:
+        return self._snapshot.titles[self._row]
+
+    @property
+    def authors(self) -> Sequence[str]:
+        return self._snapshot.authors[self._row]
+
+    @property
+    def genres(self) -> Sequence[str]:
+        return self._snapshot.genres[self._row]
+
+    @property
+    def publication_year(self) -> int | None:
+        return self._snapshot.publication_years[self._row]
+
+    @property
+    def description(self) -> str | None:
+        return self._snapshot.descriptions[self._row]
+
+
+class CatalogSnapshot:
+    __slots__ = (
+        "ids",
+        "titles",
+        "authors",
+        "genres",
+        "publication_years",
+        "descriptions",
+        "_rows_by_id",
+        "_rows_by_genre",
+    )
+
+    def __init__(self, rows: Iterable[Sequence[Any]]) -> None:
+        ordered = sorted(rows, key=lambda row: row[0])
+        self.ids: tuple[str, ...] = tuple(row[0] for row in ordered)
+        self.titles: tuple[str, ...] = tuple(row[1] for row in ordered)
+        self.authors: tuple[tuple[str, ...], ...] = tuple(tuple(row[2] or ()) for row in ordered)
+        self.genres: tuple[tuple[str, ...], ...] = tuple(tuple(row[3] or ()) for row in ordered)
+        self.publication_years: tuple[int | None, ...] = tuple(row[4] for row in ordered)
+        self.descriptions: tuple[str | None, ...] = tuple(row[5] for row in ordered)
+        self._rows_by_id = {book_id: row for row, book_id in enumerate(self.ids)}
+        # Same genre rows as `book_genre_rows`: blanks and duplicates dropped.
+        self._rows_by_genre: dict[str, array[int]] = {}
+        for row, genres in enumerate(self.genres):
+            for genre in dict.fromkeys(genres):
+                if genre:
+                    self._rows_by_genre.setdefault(genre, array("i")).append(row)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, book_id: str) -> CatalogBook | None:
+        row = self._rows_by_id.get(book_id)
+        return CatalogBook(self, row) if row is not None else None
+
+    def count(self, genre: str | None = None) -> int:
+        if genre:
+            return len(self._rows_by_genre.get(genre, ()))
+        return len(self.ids)
+
+    def list_books(
+        self,
+        limit: int,
+        offset: int = 0,
+        genre: str | None = None,
+        after_id: str | None = None,
+    ) -> list[CatalogBook]:
+        """
+        Same page as `BooksRepository.list_books`: ordered by id, optionally filtered by
+        genre, starting after `after_id` and then skipping `offset` books.
+        """
+        rows: Sequence[int] = (
+            self._rows_by_genre.get(genre, array("i")) if genre else range(len(self.ids))
+        )
+        start = 0
+        if after_id is not None:
+            start = bisect_right(rows, after_id, key=self.ids.__getitem__)
+        start += offset
+        return [CatalogBook(self, row) for row in rows[start : start + limit]]
+
+
+class CatalogSnapshotStore(VersionedSnapshot[CatalogSnapshot]):
+    """
+    Holds the current catalog snapshot, reloaded when the catalog version changes.
+
+    The version is re-checked at most once per `check_seconds`, so reads can lag an
+    import by that long.
+    """
+
+    def __init__(
+        self, check_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        super().__init__(check_seconds=check_seconds, clock=clock)
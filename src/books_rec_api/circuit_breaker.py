@@ -0,0 +1,173 @@
+"""
+Circuit breaker around the catalog and recommendation reads of `BooksRepository`.
+
+The breaker counts consecutive failed reads: database errors (dropped or refused
+connections, pool timeouts) and timed reads slower than `slow_call_seconds`. After
+`failure_threshold` of them it opens and reads fail at once with `CircuitOpenError`
+instead of queueing on a database that is down or overloaded; the similar-books route
+then serves its last-known-good lists from memory. A read cut short by its request's
+deadline says more about the client's budget than about the database, so it counts
+neither way.
+
+After `open_seconds` the breaker is half-open: one read is let through as a probe while
+the others keep failing fast. A successful probe closes the breaker, a failed one opens
+it for another `open_seconds`.
+"""
+
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from sqlalchemy import exc as sa_exc
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATES = (CLOSED, HALF_OPEN, OPEN)
+
+# Errors that say the database, not the query, is in trouble.
+BREAKER_ERRORS = (sa_exc.OperationalError, sa_exc.TimeoutError)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+# Raised by reads when the database cannot serve them right now.
+UNAVAILABLE_ERRORS = (CircuitOpenError, *BREAKER_ERRORS)
+
+
+@dataclass(frozen=True, slots=True)
+class CircuitBreakerStats:
+    name: str
+    state: str
+    consecutive_failures: int
+    failures: int
+    slow_calls: int
+    rejected: int
+    opened: int
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 1.0,
+        open_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be >= 1")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._consecutive_failures = 0
+        self._failures = 0
+        self._slow_calls = 0
+        self._rejected = 0
+        self._opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        True when a read may go to the database; while half-open, only for the probe.
+        """
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+            if self._state == CLOSED or (self._state == HALF_OPEN and not self._probing):
+                self._probing = self._state == HALF_OPEN
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self, seconds: float | None) -> None:
+        """
+        Ends a call that returned after `seconds`; None for a call whose latency is not
+        judged.
+        """
+        if seconds is not None and seconds >= self.slow_call_seconds:
+            with self._lock:
+                self._slow_calls += 1
+            self._record_failure()
+            return
+        with self._lock:
+            # A read that started before the breaker opened does not close it.
+            if self._state == OPEN:
+                return
+            self._consecutive_failures = 0
+            self._probing = False
+            self._state = CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+        self._record_failure()
+
+    def release(self) -> None:
+        """
+        Ends a call that neither proved nor disproved the database's health.
+        """
+        with self._lock:
+            self._probing = False
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._opened += 1
+
+    @contextmanager
+    def guard(self, timed: bool = True) -> Iterator[None]:
+        """
+        Runs one database call under the breaker, raising `CircuitOpenError` while open.
+        An untimed call only fails the breaker by raising, never by being slow.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit breaker {self.name!r} is open")
+        start = time.perf_counter()
+        try:
+            yield
+        except BREAKER_ERRORS:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success(time.perf_counter() - start if timed else None)
+
+    def stats(self) -> CircuitBreakerStats:
+        with self._lock:
+            return CircuitBreakerStats(
+                name=self.name,
+                state=self._state,
+                consecutive_failures=self._consecutive_failures,
+                failures=self._failures,
+                slow_calls=self._slow_calls,
+                rejected=self._rejected,
+                opened=self._opened,
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._probing = False
+            self._consecutive_failures = 0
@@ -1,11 +1,95 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import Pool
 
 from books_rec_api.config import settings
+from books_rec_api.pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    PoolMetrics,
+    instrument_engine,
+)
+
+
+def engine_options(database_url: str, poolclass: type[Pool]) -> dict[str, Any]:
+    """
+    Pool settings for `create_engine`; SQLite keeps SQLAlchemy's default pool, which
+    does not accept sizing arguments.
+    """
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def engine_pool_metrics(name: str, options: dict[str, Any]) -> PoolMetrics:
+    """
+    Pool counters for an engine built with `options` (see `engine_options`).
+    """
+    return PoolMetrics(name, max_overflow=options.get("max_overflow"))
 
-engine = create_engine(settings.database_url, echo=False)
+
+# Live pool counters per engine, reported by GET /admin/db-pool.
+pool_metrics: dict[str, PoolMetrics] = {}
+
+_primary_options = engine_options(settings.database_url, InstrumentedQueuePool)
+engine = create_engine(settings.database_url, echo=False, **_primary_options)
+pool_metrics["primary"] = engine_pool_metrics("primary", _primary_options)
+instrument_engine(engine, pool_metrics["primary"])
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only repositories use the replica when one is configured (see get_read_db_session).
+replica_engine: Engine | None = None
+ReplicaSessionLocal: sessionmaker[Session] | None = None
+if settings.database_replica_url:
+    _replica_options = engine_options(settings.database_replica_url, InstrumentedQueuePool)
+    replica_engine = create_engine(settings.database_replica_url, echo=False, **_replica_options)
+    pool_metrics["replica"] = engine_pool_metrics("replica", _replica_options)
+    instrument_engine(replica_engine, pool_metrics["replica"])
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+# The async engine is only built when the async serving stack is enabled; the psycopg
+# dialect picks its async driver automatically under create_async_engine.
+async_engine: AsyncEngine | None = None
+AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+if settings.db_async:
+    _async_options = engine_options(settings.database_url, InstrumentedAsyncQueuePool)
+    async_engine = create_async_engine(settings.database_url, echo=False, **_async_options)
+    pool_metrics["async"] = engine_pool_metrics("async", _async_options)
+    instrument_engine(async_engine.sync_engine, pool_metrics["async"])
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+async_replica_engine: AsyncEngine | None = None
+AsyncReplicaSessionLocal: async_sessionmaker[AsyncSession] | None = None
+if settings.db_async and settings.database_replica_url:
+    _async_replica_options = engine_options(
+        settings.database_replica_url, InstrumentedAsyncQueuePool
+    )
+    async_replica_engine = create_async_engine(
+        settings.database_replica_url, echo=False, **_async_replica_options
+    )
+    pool_metrics["async_replica"] = engine_pool_metrics("async_replica", _async_replica_options)
+    instrument_engine(async_replica_engine.sync_engine, pool_metrics["async_replica"])
+    AsyncReplicaSessionLocal = async_sessionmaker(
+        bind=async_replica_engine, autoflush=False, expire_on_commit=False
+    )
+
 
 class Base(DeclarativeBase):
     pass
@@ -0,0 +1,106 @@
+"""
+Per-request deadlines propagated to database statements.
+
+`EvalContextMiddleware` turns the `X-Request-Timeout` header (seconds), or the default
+configured for the route class, into an absolute deadline held in a context variable.
+`BooksRepository` applies what is left of it as Postgres' `statement_timeout`, once per
+transaction and deadline, so a slow query is cancelled once the client has stopped waiting
+instead of holding a worker and a connection. A cancelled statement, or a read started
+after the deadline, raises `DeadlineExceeded`.
+
+`narrowed(fraction)` gives one step a share of the remaining budget, leaving the rest for
+what follows (the similar-books lookup keeps some for the popularity fallback).
+"""
+
+import contextvars
+import math
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+# Postgres SQLSTATE query_canceled, raised when statement_timeout fires.
+QUERY_CANCELED = "57014"
+
+# Shortest statement_timeout set: a statement started with a sliver of budget left gets
+# enough to finish a point read rather than being cancelled as it starts.
+MIN_STATEMENT_TIMEOUT_MS = 10
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+request_deadline_var: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+def parse_timeout(value: str | None) -> float | None:
+    """
+    Reads an `X-Request-Timeout` value in seconds; anything but a positive number is
+    ignored.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    return seconds if 0 < seconds < math.inf else None
+
+
+def request_timeout(
+    header: str | None, default: float, maximum: float, minimum: float = 0.0
+) -> float | None:
+    """
+    The request's budget: the header when valid, else the route default, kept between
+    `minimum` and `maximum`. None (or a zero default) means no deadline.
+    """
+    seconds = parse_timeout(header) or default
+    if seconds <= 0:
+        return None
+    seconds = max(seconds, minimum)
+    return min(seconds, maximum) if maximum > 0 else seconds
+
+
+def remaining() -> float | None:
+    deadline = request_deadline_var.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def statement_timeout_ms() -> int | None:
+    """
+    Milliseconds left for the next statement (at least `MIN_STATEMENT_TIMEOUT_MS`), or
+    None without a deadline.
+    """
+    left = remaining()
+    if left is None:
+        return None
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return max(MIN_STATEMENT_TIMEOUT_MS, math.ceil(left * 1000))
+
+
+@contextmanager
+def deadline(seconds: float | None) -> Iterator[None]:
+    """
+    Runs the block under a deadline `seconds` from now (no deadline for None).
+    """
+    token = request_deadline_var.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        request_deadline_var.reset(token)
+
+
+@contextmanager
+def narrowed(fraction: float) -> Iterator[None]:
+    """
+    Runs the block with `fraction` of the remaining budget; a no-op without a deadline.
+    """
+    left = remaining()
+    if left is None:
+        yield
+        return
+    with deadline(max(left, 0.0) * fraction):
+        yield
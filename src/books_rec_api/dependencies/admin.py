@@ -0,0 +1,69 @@
+import secrets
+from typing import Annotated
+
+from fastapi import Header, HTTPException, status
+
+from books_rec_api.admission import route_limiters
+from books_rec_api.config import settings
+from books_rec_api.database import pool_metrics
+from books_rec_api.dependencies.books import (
+    async_book_reads_flights,
+    book_id_filter,
+    book_reads_flights,
+    books_breaker,
+    catalog_snapshot,
+    last_known_good,
+    similar_books_cache,
+)
+from books_rec_api.metrics import (
+    MetricsRegistry,
+    admission_families,
+    book_id_filter_families,
+    catalog_snapshot_families,
+    circuit_breaker_families,
+    pool_families,
+    registry,
+    similar_cache_families,
+    single_flight_families,
+)
+from books_rec_api.pool_metrics import PoolMetrics
+from books_rec_api.single_flight import AsyncSingleFlight, SingleFlight
+from books_rec_api.warmup import WarmupState, warmup_state
+
+
+def get_pool_metrics() -> dict[str, PoolMetrics]:
+    return pool_metrics
+
+
+def get_single_flight_groups() -> list[SingleFlight | AsyncSingleFlight]:
+    return [group for group in (book_reads_flights, async_book_reads_flights) if group is not None]
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return registry
+
+
+def get_warmup_state() -> WarmupState:
+    return warmup_state
+
+
+def require_debug_profiling(
+    x_debug_token: Annotated[str | None, Header()] = None,
+) -> None:
+    """
+    Hides the debug routes unless enabled with a token, and requires that token.
+    """
+    token = settings.debug_profile_token
+    if not settings.debug_profile_enabled or not token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not (x_debug_token and secrets.compare_digest(x_debug_token, token)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid debug token")
+
+
+registry.register_collector(lambda: pool_families(pool_metrics.values()))
+registry.register_collector(lambda: similar_cache_families(similar_books_cache))
+registry.register_collector(lambda: single_flight_families(get_single_flight_groups()))
+registry.register_collector(lambda: book_id_filter_families(book_id_filter))
+registry.register_collector(lambda: catalog_snapshot_families(catalog_snapshot))
+registry.register_collector(lambda: admission_families(route_limiters.values()))
+registry.register_collector(lambda: circuit_breaker_families(books_breaker, last_known_good))
@@ -1,18 +1,190 @@
 from typing import Annotated
 
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from books_rec_api.dependencies.users import get_db_session
-from books_rec_api.repositories.books_repository import BooksRepository
-from books_rec_api.services.book_service import BookService
+from books_rec_api.book_id_filter import BookIdFilterStore
+from books_rec_api.cache import LastKnownGood, SimilarBooksCache, VersionedSnapshot
+from books_rec_api.catalog_snapshot import CatalogSnapshotStore
+from books_rec_api.circuit_breaker import CircuitBreaker
+from books_rec_api.config import settings
+from books_rec_api.dependencies.users import (
+    get_async_db_session,
+    get_async_read_db_session,
+    get_db_session,
+    get_read_db_session,
+)
+from books_rec_api.neighbors_artifact import NeighborsArtifactStore
+from books_rec_api.repositories.books_repository import AsyncBooksRepository, BooksRepository
+from books_rec_api.services.book_service import AsyncBookService, BookService
+from books_rec_api.single_flight import AsyncSingleFlight, SingleFlight
 
+similar_books_cache: SimilarBooksCache | None = (
+    SimilarBooksCache(
+        max_entries=settings.similar_cache_max_entries,
+        ttl_seconds=settings.similar_cache_ttl_seconds,
+        version_check_seconds=settings.similar_cache_version_check_seconds,
+        response_max_entries=settings.similar_response_cache_max_entries,
+    )
+    if settings.similar_cache_enabled
+    else None
+)
 
-def get_books_repository(session: Annotated[Session, Depends(get_db_session)]) -> BooksRepository:
-    return BooksRepository(session=session)
+neighbors_artifact_store: NeighborsArtifactStore | None = (
+    NeighborsArtifactStore(
+        path=settings.neighbors_artifact_path,
+        check_seconds=settings.neighbors_artifact_check_seconds,
+    )
+    if settings.neighbors_artifact_path
+    else None
+)
+
+# Shared by every request in the worker so concurrent identical reads coalesce.
+book_reads_flights: SingleFlight | None = (
+    SingleFlight("books") if settings.single_flight_enabled else None
+)
+async_book_reads_flights: AsyncSingleFlight | None = (
+    AsyncSingleFlight("books_async") if settings.single_flight_enabled else None
+)
+
+# Lets unknown ids 404 without a lookup; rebuilt when the catalog version changes.
+book_id_filter: BookIdFilterStore | None = (
+    BookIdFilterStore(
+        false_positive_rate=settings.book_id_filter_false_positive_rate,
+        check_seconds=settings.book_id_filter_check_seconds,
+        miss_recheck_seconds=settings.book_id_filter_miss_recheck_seconds,
+    )
+    if settings.book_id_filter_enabled
+    else None
+)
+
+# Serves get_book/get_books from memory; reloaded when the catalog version changes.
+catalog_snapshot: CatalogSnapshotStore | None = (
+    CatalogSnapshotStore(check_seconds=settings.catalog_snapshot_check_seconds)
+    if settings.catalog_snapshot_enabled
+    else None
+)
+
+# Catalog version the /books ETags are derived from when no snapshot is loaded.
+catalog_stamp: VersionedSnapshot[str] = VersionedSnapshot(
+    check_seconds=settings.http_etag_version_check_seconds
+)
+
+# Fails book reads fast while the database is down or slow; the similar-books routes then
+# serve the last-known-good lists.
+books_breaker: CircuitBreaker | None = (
+    CircuitBreaker(
+        "books",
+        failure_threshold=settings.circuit_breaker_failure_threshold,
+        slow_call_seconds=settings.circuit_breaker_slow_call_seconds,
+        open_seconds=settings.circuit_breaker_open_seconds,
+    )
+    if settings.circuit_breaker_enabled
+    else None
+)
+last_known_good: LastKnownGood | None = (
+    LastKnownGood(max_entries=settings.last_known_good_max_entries)
+    if settings.circuit_breaker_enabled
+    else None
+)
+
+
+def get_books_breaker() -> CircuitBreaker | None:
+    return books_breaker
+
+
+def get_last_known_good() -> LastKnownGood | None:
+    return last_known_good
+
+
+def get_books_repository(
+    session: Annotated[Session, Depends(get_read_db_session)],
+    primary: Annotated[Session, Depends(get_db_session)],
+    breaker: Annotated[CircuitBreaker | None, Depends(get_books_breaker)],
+) -> BooksRepository:
+    fallback = primary if session is not primary and settings.db_replica_failover else None
+    return BooksRepository(session=session, fallback_session=fallback, breaker=breaker)
+
+
+def get_similar_books_cache() -> SimilarBooksCache | None:
+    return similar_books_cache
+
+
+def get_neighbors_artifact_store() -> NeighborsArtifactStore | None:
+    return neighbors_artifact_store
+
+
+def get_book_reads_flights() -> SingleFlight | None:
+    return book_reads_flights
+
+
+def get_async_book_reads_flights() -> AsyncSingleFlight | None:
+    return async_book_reads_flights
+
+
+def get_book_id_filter() -> BookIdFilterStore | None:
+    return book_id_filter
+
+
+def get_catalog_snapshot() -> CatalogSnapshotStore | None:
+    return catalog_snapshot
+
+
+def get_catalog_stamp() -> VersionedSnapshot[str] | None:
+    return catalog_stamp
 
 
 def get_book_service(
     repo: Annotated[BooksRepository, Depends(get_books_repository)],
+    cache: Annotated[SimilarBooksCache | None, Depends(get_similar_books_cache)],
+    artifacts: Annotated[NeighborsArtifactStore | None, Depends(get_neighbors_artifact_store)],
+    flights: Annotated[SingleFlight | None, Depends(get_book_reads_flights)],
+    id_filter: Annotated[BookIdFilterStore | None, Depends(get_book_id_filter)],
+    catalog: Annotated[CatalogSnapshotStore | None, Depends(get_catalog_snapshot)],
+    last_known_good: Annotated[LastKnownGood | None, Depends(get_last_known_good)],
+    stamp: Annotated[VersionedSnapshot[str] | None, Depends(get_catalog_stamp)],
 ) -> BookService:
-    return BookService(repo=repo)
+    return BookService(
+        repo=repo,
+        cache=cache,
+        artifacts=artifacts,
+        flights=flights,
+        id_filter=id_filter,
+        catalog=catalog,
+        lookup_budget=settings.similar_lookup_deadline_fraction,
+        last_known_good=last_known_good,
+        catalog_stamp=stamp,
+    )
+
+
+def get_async_books_repository(
+    session: Annotated[AsyncSession, Depends(get_async_read_db_session)],
+    primary: Annotated[AsyncSession, Depends(get_async_db_session)],
+    breaker: Annotated[CircuitBreaker | None, Depends(get_books_breaker)],
+) -> AsyncBooksRepository:
+    fallback = primary if session is not primary and settings.db_replica_failover else None
+    return AsyncBooksRepository(session=session, fallback_session=fallback, breaker=breaker)
+
+
+def get_async_book_service(
+    repo: Annotated[AsyncBooksRepository, Depends(get_async_books_repository)],
+    cache: Annotated[SimilarBooksCache | None, Depends(get_similar_books_cache)],
+    artifacts: Annotated[NeighborsArtifactStore | None, Depends(get_neighbors_artifact_store)],
+    flights: Annotated[AsyncSingleFlight | None, Depends(get_async_book_reads_flights)],
+    id_filter: Annotated[BookIdFilterStore | None, Depends(get_book_id_filter)],
+    catalog: Annotated[CatalogSnapshotStore | None, Depends(get_catalog_snapshot)],
+    last_known_good: Annotated[LastKnownGood | None, Depends(get_last_known_good)],
+    stamp: Annotated[VersionedSnapshot[str] | None, Depends(get_catalog_stamp)],
+) -> AsyncBookService:
+    return AsyncBookService(
+        repo=repo,
+        cache=cache,
+        artifacts=artifacts,
+        flights=flights,
+        id_filter=id_filter,
+        catalog=catalog,
+        lookup_budget=settings.similar_lookup_deadline_fraction,
+        last_known_good=last_known_good,
+        catalog_stamp=stamp,
+    )
@@ -1,12 +1,18 @@
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Iterator
 from typing import Annotated
 
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from books_rec_api.database import SessionLocal
-from books_rec_api.repositories.users_repository import UsersRepository
-from books_rec_api.services.user_service import UserService
+from books_rec_api.database import (
+    AsyncReplicaSessionLocal,
+    AsyncSessionLocal,
+    ReplicaSessionLocal,
+    SessionLocal,
+)
+from books_rec_api.repositories.users_repository import AsyncUsersRepository, UsersRepository
+from books_rec_api.services.user_service import AsyncUserService, UserService
 
 
 def get_db_session() -> Iterator[Session]:
@@ -17,6 +23,39 @@ def get_db_session() -> Iterator[Session]:
         session.close()
 
 
+def get_read_db_session(primary: Annotated[Session, Depends(get_db_session)]) -> Iterator[Session]:
+    """
+    Yields a read replica session when a replica is configured, otherwise the primary one.
+    """
+    if ReplicaSessionLocal is None:
+        yield primary
+        return
+
+    session = ReplicaSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+async def get_async_db_session() -> AsyncIterator[AsyncSession]:
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database stack is disabled; set BOOKS_REC_DB_ASYNC=true")
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def get_async_read_db_session(
+    primary: Annotated[AsyncSession, Depends(get_async_db_session)],
+) -> AsyncIterator[AsyncSession]:
+    if AsyncReplicaSessionLocal is None:
+        yield primary
+        return
+
+    async with AsyncReplicaSessionLocal() as session:
+        yield session
+
+
 def get_users_repository(session: Annotated[Session, Depends(get_db_session)]) -> UsersRepository:
     return UsersRepository(session=session)
 
@@ -25,3 +64,15 @@ def get_user_service(
     repo: Annotated[UsersRepository, Depends(get_users_repository)],
 ) -> UserService:
     return UserService(repo=repo)
+
+
+def get_async_users_repository(
+    session: Annotated[AsyncSession, Depends(get_async_db_session)],
+) -> AsyncUsersRepository:
+    return AsyncUsersRepository(session=session)
+
+
+def get_async_user_service(
+    repo: Annotated[AsyncUsersRepository, Depends(get_async_users_repository)],
+) -> AsyncUserService:
+    return AsyncUserService(repo=repo)
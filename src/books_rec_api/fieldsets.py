@@ -0,0 +1,73 @@
+"""
+Sparse fieldsets (`?fields=`) for `GET /books` and `GET /books/{book_id}`.
+
+A fieldset selects a subset of `BookRead` fields. Only those columns are loaded
+(`load_only`), and the response is validated through a slim model generated once per
+fieldset, so unrequested columns are never read or serialized.
+"""
+
+import functools
+
+from pydantic import BaseModel, ConfigDict, create_model
+
+from books_rec_api.schemas.book import BookRead, PaginatedBooks
+
+BOOK_FIELDS: tuple[str, ...] = tuple(BookRead.model_fields)
+
+FIELDS_DESCRIPTION = (
+    f"Comma-separated subset of book fields to return ({', '.join(BOOK_FIELDS)}); "
+    "id is always included"
+)
+
+
+class InvalidFieldsError(ValueError):
+    pass
+
+
+def parse_book_fields(raw: str | None) -> frozenset[str] | None:
+    """
+    Parses a comma-separated `fields` value; `id` is always included. Returns None
+    (the full representation) when the parameter is absent.
+    """
+    if raw is None:
+        return None
+
+    fields = {name.strip() for name in raw.split(",") if name.strip()}
+    if not fields:
+        raise InvalidFieldsError("Query param 'fields' must name at least one field")
+    unknown = fields.difference(BOOK_FIELDS)
+    if unknown:
+        raise InvalidFieldsError(
+            f"Unknown book fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(BOOK_FIELDS)}"
+        )
+    return frozenset(fields | {"id"})
+
+
+def book_columns(fields: frozenset[str] | None) -> tuple[str, ...]:
+    """
+    Returns the `Book` attributes to load for a fieldset, in `BookRead` order.
+    """
+    return tuple(name for name in BOOK_FIELDS if fields is None or name in fields)
+
+
+@functools.cache
+def sparse_book_model(fields: frozenset[str]) -> type[BaseModel]:
+    definitions: dict[str, object] = {
+        name: (info.annotation, info)
+        for name, info in BookRead.model_fields.items()
+        if name in fields
+    }
+    return create_model(  # type: ignore[call-overload, no-any-return]
+        "SparseBookRead", __config__=ConfigDict(from_attributes=True), **definitions
+    )
+
+
+@functools.cache
+def sparse_page_model(fields: frozenset[str]) -> type[BaseModel]:
+    item_model = sparse_book_model(fields)
+    items: object = list[item_model]  # type: ignore[valid-type]
+    definitions: dict[str, object] = {
+        name: (items, ...) if name == "items" else (info.annotation, info)
+        for name, info in PaginatedBooks.model_fields.items()
+    }
+    return create_model("SparsePaginatedBooks", **definitions)  # type: ignore[call-overload, no-any-return]
@@ -0,0 +1,48 @@
+import hashlib
+
+from fastapi import Response
+
+
+def content_etag(*parts: bytes) -> str:
+    """
+    Returns a strong ETag derived from the SHA-256 of the given body parts.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Evaluates an If-None-Match header against `etag` with the weak comparison that
+    RFC 9110 prescribes for If-None-Match (a `W/` prefix is ignored).
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cached_response(content: bytes | None, etag: str, cache_control: str) -> Response:
+    """
+    Builds a JSON response carrying the validators, or a bodiless 304 when `content` is None.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if content is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def json_response(content: bytes, if_none_match: str | None, cache_control: str) -> Response:
+    """
+    Returns `content` with a content-hash ETag, or a 304 if the client already holds it.
+    """
+    etag = content_etag(content)
+    return cached_response(
+        None if etag_matches(if_none_match, etag) else content, etag, cache_control
+    )
@@ -1,14 +1,29 @@
+import asyncio
 import logging
+import math
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 
+from books_rec_api.admission import CATALOG, SIMILAR, route_limiters
+from books_rec_api.api.routes.admin import router as admin_router
+from books_rec_api.api.routes.async_books import router as async_books_router
+from books_rec_api.api.routes.async_users import router as async_users_router
 from books_rec_api.api.routes.books import router as books_router
+from books_rec_api.api.routes.debug import router as debug_router
+from books_rec_api.api.routes.health import router as health_router
+from books_rec_api.api.routes.metrics import router as metrics_router
 from books_rec_api.api.routes.recommendations import router as recommendations_router
 from books_rec_api.api.routes.telemetry import router as telemetry_router
 from books_rec_api.api.routes.users import router as users_router
+from books_rec_api.circuit_breaker import CircuitOpenError
 from books_rec_api.config import settings
+from books_rec_api.deadline import DeadlineExceeded
 from books_rec_api.logging_config import configure_logging
-from books_rec_api.middleware import EvalContextMiddleware
+from books_rec_api.middleware import AdmissionControlMiddleware, EvalContextMiddleware
+from books_rec_api.warmup import run_warmup, warmup_state, warmup_steps
 
 configure_logging(
     level=settings.log_level,
@@ -18,13 +33,76 @@ configure_logging(
 logger = logging.getLogger(__name__)
 logger.info("Application bootstrapped")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Warm up in the background so the liveness probe answers while it runs.
+    if not settings.warmup_enabled:
+        warmup_state.mark_ready()
+        yield
+        return
+
+    task = asyncio.create_task(
+        run_warmup(warmup_state, warmup_steps(), settings.warmup_retry_seconds)
+    )
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
 app = FastAPI(
     title=settings.app_name,
     description=settings.app_description,
     version=settings.app_version,
+    lifespan=lifespan,
+)
+# Added first so it runs inside EvalContextMiddleware: shed requests are still logged.
+app.add_middleware(
+    AdmissionControlMiddleware,
+    limiters=route_limiters,
+    retry_after_seconds=settings.admission_retry_after_seconds,
+)
+app.add_middleware(
+    EvalContextMiddleware,
+    default_timeouts={
+        SIMILAR: settings.request_timeout_similar_seconds,
+        CATALOG: settings.request_timeout_catalog_seconds,
+    },
+    max_timeout=settings.request_timeout_max_seconds,
+    min_timeout=settings.request_timeout_min_seconds,
 )
-app.add_middleware(EvalContextMiddleware)
-app.include_router(books_router)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    return JSONResponse(
+        {"detail": "Request deadline exceeded"}, status_code=status.HTTP_504_GATEWAY_TIMEOUT
+    )
+
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError) -> JSONResponse:
+    return JSONResponse(
+        {"detail": "Database temporarily unavailable"},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(math.ceil(settings.circuit_breaker_open_seconds))},
+    )
+
+
+if settings.db_async:
+    app.include_router(async_books_router)
+else:
+    app.include_router(books_router)
 app.include_router(recommendations_router)
 app.include_router(telemetry_router)
-app.include_router(users_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
+app.include_router(debug_router)
+app.include_router(health_router)
+if settings.db_async:
+    app.include_router(async_users_router)
+else:
+    app.include_router(users_router)
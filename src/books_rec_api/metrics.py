@@ -0,0 +1,408 @@
+"""
+In-process metrics registry served at `GET /metrics` in the Prometheus text format.
+
+Counters and histograms are updated on the request path; point-in-time values that
+already live elsewhere (connection pools, caches, single-flight groups) are read by
+collectors only when the endpoint is scraped. Every value is per process: with several
+workers, scrape each one or aggregate in Prometheus.
+"""
+
+import math
+import threading
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from books_rec_api.admission import ConcurrencyLimiter
+from books_rec_api.book_id_filter import BookIdFilterStore
+from books_rec_api.cache import LastKnownGood, SimilarBooksCache, VersionedLRUCache
+from books_rec_api.catalog_snapshot import CatalogSnapshotStore
+from books_rec_api.circuit_breaker import STATES, CircuitBreaker
+from books_rec_api.pool_metrics import PoolMetrics
+from books_rec_api.single_flight import AsyncSingleFlight, SingleFlight
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+NEIGHBORS_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+LabelValues = tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class MetricFamily:
+    """
+    A collected metric: `samples` pairs a label mapping with a value.
+    """
+
+    name: str
+    kind: str
+    help: str
+    samples: list[tuple[dict[str, str], float]] = field(default_factory=list)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _header(name: str, kind: str, help_text: str) -> list[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> list[str]:
+        lines = _header(self.name, "counter", self.help)
+        with self._lock:
+            values = sorted(self._values.items())
+        if not values and not self.labelnames:
+            values = [((), 0.0)]
+        for key, value in values:
+            labels = _format_labels(dict(zip(self.labelnames, key, strict=True)))
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        # Per label set: non-cumulative bucket counts (plus +Inf), sum and count.
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        index = next(
+            (i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets)
+        )
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = series
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = _header(self.name, "histogram", self.help)
+        with self._lock:
+            series = sorted((key, (list(c), t[0])) for key, (c, t) in self._series.items())
+        for key, (counts, total) in series:
+            labels = dict(zip(self.labelnames, key, strict=True))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[Callable[[], Iterable[MetricFamily]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = (),
+    ) -> Histogram:
+        metric = Histogram(name, help_text, buckets, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for family in collector():
+                lines.extend(_header(family.name, family.kind, family.help))
+                for labels, value in family.samples:
+                    lines.append(f"{family.name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# (metric suffix, PoolSnapshot attribute, kind, help) exported per connection pool.
+_POOL_FIELDS = (
+    ("size", "size", "gauge", "Configured pool size."),
+    ("checked_out", "checked_out", "gauge", "Connections currently checked out."),
+    ("checked_in", "checked_in", "gauge", "Idle connections held by the pool."),
+    ("overflow", "overflow", "gauge", "Connections currently open beyond the pool size."),
+    ("connects_total", "connects", "counter", "DBAPI connections opened."),
+    ("checkouts_total", "checkouts", "counter", "Pool checkouts."),
+    ("invalidations_total", "invalidations", "counter", "Connections invalidated."),
+    ("timeouts_total", "timeouts", "counter", "Checkouts that gave up after pool_timeout."),
+    ("waits_total", "waits", "counter", "Checkouts that waited on an exhausted pool."),
+    ("wait_seconds_total", "wait_seconds_total", "counter", "Time spent in those waits."),
+)
+
+
+def pool_families(pools: Iterable[PoolMetrics]) -> list[MetricFamily]:
+    snapshots = [pool.snapshot() for pool in pools]
+    families = []
+    for suffix, attribute, kind, help_text in _POOL_FIELDS:
+        family = MetricFamily(f"books_rec_db_pool_{suffix}", kind, help_text)
+        for snapshot in snapshots:
+            value = getattr(snapshot, attribute)
+            if value is not None:
+                family.samples.append(({"pool": snapshot.name}, value))
+        families.append(family)
+    return families
+
+
+def similar_cache_families(cache: SimilarBooksCache | None) -> list[MetricFamily]:
+    if cache is None:
+        return []
+    caches: dict[str, VersionedLRUCache[Any, Any]] = {
+        "neighbors": cache.neighbors,
+        "popularity": cache.popularity,
+    }
+    if cache.responses is not None:
+        caches["responses"] = cache.responses
+    families = [
+        MetricFamily(f"books_rec_similar_cache_{name}", kind, help_text)
+        for name, kind, help_text in (
+            ("hits_total", "counter", "Similar-books cache hits."),
+            ("misses_total", "counter", "Similar-books cache misses."),
+            ("evictions_total", "counter", "Entries evicted to stay under max_entries."),
+            ("entries", "gauge", "Entries currently cached."),
+        )
+    ]
+    for name, lru in caches.items():
+        stats = lru.stats()
+        for family, value in zip(
+            families, (stats.hits, stats.misses, stats.evictions, stats.size), strict=True
+        ):
+            family.samples.append(({"cache": name}, value))
+    return families
+
+
+def book_id_filter_families(id_filter: BookIdFilterStore | None) -> list[MetricFamily]:
+    if id_filter is None:
+        return []
+    stats = id_filter.stats()
+    return [
+        MetricFamily(f"books_rec_book_id_filter_{name}", kind, help_text, [({}, value)])
+        for name, kind, help_text, value in (
+            ("entries", "gauge", "Book ids in the filter.", stats.entries),
+            ("bytes", "gauge", "Memory held by the filter's bit array.", stats.nbytes),
+            (
+                "false_positive_rate",
+                "gauge",
+                "Estimated chance that an unknown id passes the filter.",
+                stats.false_positive_rate,
+            ),
+            (
+                "rejections_total",
+                "counter",
+                "Unknown ids answered with a 404 without a database lookup.",
+                stats.rejections,
+            ),
+            (
+                "false_positives_total",
+                "counter",
+                "Unknown ids that passed the filter and missed in the database.",
+                stats.false_positives,
+            ),
+        )
+    ]
+
+
+def catalog_snapshot_families(catalog: CatalogSnapshotStore | None) -> list[MetricFamily]:
+    if catalog is None:
+        return []
+    snapshot = catalog.current
+    books = len(snapshot) if snapshot is not None else 0
+    return [
+        MetricFamily(
+            "books_rec_catalog_snapshot_books",
+            "gauge",
+            "Books in the catalog snapshot.",
+            [({}, books)],
+        )
+    ]
+
+
+def admission_families(limiters: Iterable[ConcurrencyLimiter]) -> list[MetricFamily]:
+    families = [
+        MetricFamily(f"books_rec_admission_{name}", kind, help_text)
+        for name, kind, help_text in (
+            ("limit", "gauge", "Requests admitted at once per route class."),
+            ("in_flight", "gauge", "Requests currently admitted."),
+            ("queue_depth", "gauge", "Requests waiting for a slot."),
+            ("admitted_total", "counter", "Requests admitted, after any wait."),
+            ("waits_total", "counter", "Requests that queued for a slot."),
+            ("wait_seconds_total", "counter", "Time spent queued, admitted or shed."),
+        )
+    ]
+    shed = MetricFamily(
+        "books_rec_admission_shed_total",
+        "counter",
+        "Requests answered with 503 because the queue was full or the wait timed out.",
+    )
+    for limiter in limiters:
+        stats = limiter.stats()
+        labels = {"route_class": stats.name}
+        for family, value in zip(
+            families,
+            (
+                stats.limit,
+                stats.in_flight,
+                stats.queued,
+                stats.admitted,
+                stats.waits,
+                stats.wait_seconds_total,
+            ),
+            strict=True,
+        ):
+            family.samples.append((labels, value))
+        shed.samples.append(({**labels, "reason": "queue_full"}, stats.shed_queue_full))
+        shed.samples.append(({**labels, "reason": "timeout"}, stats.shed_timeout))
+    return [*families, shed]
+
+
+def circuit_breaker_families(
+    breaker: CircuitBreaker | None, last_known_good: LastKnownGood | None
+) -> list[MetricFamily]:
+    if breaker is None:
+        return []
+    stats = breaker.stats()
+    labels = {"breaker": stats.name}
+    families = [
+        MetricFamily(
+            "books_rec_circuit_breaker_state",
+            "gauge",
+            "1 for the breaker's current state (closed, half_open or open), 0 otherwise.",
+            [({**labels, "state": state}, int(state == stats.state)) for state in STATES],
+        )
+    ]
+    families.extend(
+        MetricFamily(f"books_rec_circuit_breaker_{name}", "counter", help_text, [(labels, value)])
+        for name, help_text, value in (
+            ("opened_total", "Times the breaker opened.", stats.opened),
+            ("failures_total", "Reads that failed with a database error.", stats.failures),
+            ("slow_calls_total", "Reads slower than the slow-call threshold.", stats.slow_calls),
+            ("rejected_total", "Reads failed fast while the breaker was open.", stats.rejected),
+        )
+    )
+    if last_known_good is not None:
+        families.append(
+            MetricFamily(
+                "books_rec_last_known_good_anchors",
+                "gauge",
+                "Anchors whose neighbors are kept for degraded serving.",
+                [({}, len(last_known_good))],
+            )
+        )
+    return families
+
+
+def single_flight_families(
+    groups: Iterable[SingleFlight | AsyncSingleFlight],
+) -> list[MetricFamily]:
+    leaders = MetricFamily(
+        "books_rec_single_flight_leaders_total", "counter", "Fetches that ran against the database."
+    )
+    coalesced = MetricFamily(
+        "books_rec_single_flight_coalesced_total",
+        "counter",
+        "Reads served by another request's in-flight fetch.",
+    )
+    for group in groups:
+        stats = group.stats()
+        leaders.samples.append(({"group": stats.name}, stats.leaders))
+        coalesced.samples.append(({"group": stats.name}, stats.coalesced))
+    return [leaders, coalesced]
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "books_rec_http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code.",
+    LATENCY_BUCKETS,
+    labelnames=("method", "route", "status_code"),
+)
+similar_requests = registry.counter(
+    "books_rec_similar_requests_total",
+    "Similar-books responses served, including 304 revalidations.",
+)
+similar_fallback_requests = registry.counter(
+    "books_rec_similar_fallback_requests_total",
+    "Similar-books responses that needed the popularity fallback.",
+)
+similar_degraded_requests = registry.counter(
+    "books_rec_similar_degraded_requests_total",
+    "Similar-books responses served degraded: the neighbor lookup ran out of its deadline "
+    "budget, or the database was unavailable and last-known-good lists were used.",
+)
+similar_neighbors_count = registry.histogram(
+    "books_rec_similar_neighbors_count",
+    "Precomputed neighbors returned per similar-books response, before fallback.",
+    NEIGHBORS_COUNT_BUCKETS,
+)
+telemetry_events_inserted = registry.counter(
+    "books_rec_telemetry_events_inserted_total", "Telemetry events newly stored."
+)
+telemetry_events_duplicate = registry.counter(
+    "books_rec_telemetry_events_duplicate_total",
+    "Telemetry events ignored as duplicates of an already stored idempotency key.",
+)
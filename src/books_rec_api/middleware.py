@@ -2,39 +2,142 @@ import logging
 import time
 import uuid
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from books_rec_api.admission import ConcurrencyLimiter, route_class
 from books_rec_api.context import eval_request_id_var, eval_run_id_var
+from books_rec_api.deadline import request_deadline_var, request_timeout
+from books_rec_api.metrics import http_request_duration
+from books_rec_api.server_timing import ServerTiming, server_timing_var
 
 logger = logging.getLogger("books_rec_api.request")
 
 
-class EvalContextMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        eval_run_id = request.headers.get("X-Eval-Run-Id") or "none"
-        eval_request_id = request.headers.get("X-Request-Id") or f"req-{uuid.uuid4().hex[:12]}"
+class EvalContextMiddleware:
+    """
+    Binds the eval run and request ids to context variables, adds a `Server-Timing`
+    header with the stages recorded through `books_rec_api.server_timing.timed`, and
+    records the request in the per-route latency histogram and the
+    `http_request_complete` log.
 
+    It also starts the request's deadline (see `books_rec_api.deadline`) from the
+    `X-Request-Timeout` header or the `default_timeouts` entry for the path's route
+    class, kept between `min_timeout` and `max_timeout`.
+
+    Plain ASGI rather than `BaseHTTPMiddleware`, so responses pass through without
+    being re-wrapped in a streaming response and an extra task per request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default_timeouts: dict[str, float] | None = None,
+        max_timeout: float = 0.0,
+        min_timeout: float = 0.0,
+    ) -> None:
+        self.app = app
+        self.default_timeouts = default_timeouts or {}
+        self.max_timeout = max_timeout
+        self.min_timeout = min_timeout
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        eval_run_id = headers.get("x-eval-run-id") or "none"
+        eval_request_id = headers.get("x-request-id") or f"req-{uuid.uuid4().hex[:12]}"
+
+        timing = ServerTiming()
         run_token = eval_run_id_var.set(eval_run_id)
         req_token = eval_request_id_var.set(eval_request_id)
+        timing_token = server_timing_var.set(timing)
         start = time.perf_counter()
+        name = route_class(scope["path"]) if self.default_timeouts else None
+        default_timeout = self.default_timeouts.get(name, 0.0) if name else 0.0
+        timeout = request_timeout(
+            headers.get("x-request-timeout"), default_timeout, self.max_timeout, self.min_timeout
+        )
+        deadline_token = request_deadline_var.set(
+            None if timeout is None else time.monotonic() + timeout
+        )
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", timing.header_value(time.perf_counter() - start)
+                )
+            await send(message)
 
         try:
-            response = await call_next(request)
-            latency_ms = max((time.perf_counter() - start) * 1000, 0.0)
+            await self.app(scope, receive, send_with_timing)
+            elapsed = time.perf_counter() - start
+            latency_ms = max(elapsed * 1000, 0.0)
+            # The router stores the matched route in the scope; label by its template so
+            # ids in the path do not create a series per book.
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_request_duration.observe(
+                elapsed, method=scope["method"], route=route, status_code=str(status_code)
+            )
             logger.info(
                 "http_request_complete",
                 extra={
                     "run_id": eval_run_id,
                     "request_id": eval_request_id,
-                    "method": request.method,
-                    "path": str(request.url.path),
-                    "status_code": response.status_code,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
                     "latency_ms": round(latency_ms, 3),
                 },
             )
-            return response
         finally:
+            request_deadline_var.reset(deadline_token)
+            server_timing_var.reset(timing_token)
             eval_run_id_var.reset(run_token)
             eval_request_id_var.reset(req_token)
+
+
+class AdmissionControlMiddleware:
+    """
+    Holds each request to the concurrency limit of its route class (see
+    `books_rec_api.admission`) and answers shed requests with `503` and `Retry-After`
+    before they reach a threadpool worker or a database connection. Paths without a
+    class, or whose class has no limiter configured, pass straight through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiters: dict[str, ConcurrencyLimiter],
+        retry_after_seconds: int = 1,
+    ) -> None:
+        self.app = app
+        self.limiters = limiters
+        self.retry_after = str(retry_after_seconds)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        name = route_class(scope["path"]) if scope["type"] == "http" else None
+        limiter = self.limiters.get(name) if name is not None else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            response = JSONResponse(
+                {"detail": "Server is over capacity; retry later"},
+                status_code=503,
+                headers={"Retry-After": self.retry_after},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -1,3 +1,4 @@
+from collections.abc import Sequence
 from datetime import UTC, datetime
 from typing import Any
 
@@ -12,11 +13,18 @@ from sqlalchemy import (
     Numeric,
     String,
     Text,
+    delete,
+    event,
+    insert,
+    inspect,
     text,
 )
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapped, Mapper, mapped_column
 
 from books_rec_api.database import Base
+from books_rec_api.packed_ids import BookIdList
+from books_rec_api.search_index import install_search_index
 
 
 class User(Base):
@@ -71,6 +79,73 @@ class Book(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(UTC)
     )
+    # Stamped on every write so the catalog version (and with it the ETags of catalog
+    # responses) changes when a book is edited in place.
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+        index=True,
+    )
+
+
+install_search_index(Base.metadata.tables["books"])
+
+
+class BookGenre(Base):
+    """
+    Normalized copy of `Book.genres`, one row per (genre, book), backing the genre filter.
+    """
+
+    __tablename__ = "book_genres"
+
+    genre: Mapped[str] = mapped_column(Text, primary_key=True)
+    book_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("books.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    __table_args__ = (Index("ix_book_genres_book_id", "book_id"),)
+
+
+def book_genre_rows(book_id: str, genres: Sequence[str]) -> list[dict[str, str]]:
+    """
+    Returns the `book_genres` rows for one book, dropping blanks and duplicates.
+    """
+    return [{"genre": genre, "book_id": book_id} for genre in dict.fromkeys(genres) if genre]
+
+
+@event.listens_for(Book, "after_insert")
+def _insert_book_genres(mapper: Mapper[Book], connection: Connection, target: Book) -> None:
+    rows = book_genre_rows(target.id, target.genres or [])
+    if rows:
+        connection.execute(insert(BookGenre), rows)
+
+
+@event.listens_for(Book, "after_update")
+def _update_book_genres(mapper: Mapper[Book], connection: Connection, target: Book) -> None:
+    if not inspect(target).attrs.genres.history.has_changes():
+        return
+    connection.execute(delete(BookGenre).where(BookGenre.book_id == target.id))
+    _insert_book_genres(mapper, connection, target)
+
+
+class BookCount(Base):
+    """
+    Catalog-wide and per-genre book counts reported as `PaginatedBooks.total`. Refreshed
+    by the books importer (see `refresh_book_counts`) instead of counting per request.
+    """
+
+    __tablename__ = "book_counts"
+
+    scope: Mapped[str] = mapped_column(Text, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+
+
+def book_count_scope(genre: str | None) -> str:
+    return f"genre:{genre}" if genre else "all"
 
 
 class DatasetUser(Base):
@@ -131,7 +206,7 @@ class BookSimilarity(Base):
     book_id: Mapped[str] = mapped_column(
         String(36), ForeignKey("books.id", ondelete="CASCADE"), primary_key=True
     )
-    neighbor_ids: Mapped[list[str]] = mapped_column(JSON, default=list)
+    neighbor_ids: Mapped[Sequence[str]] = mapped_column(BookIdList, default=list)
     recs_version: Mapped[str | None] = mapped_column(Text, nullable=True)
     algo_id: Mapped[str | None] = mapped_column(Text, nullable=True)
     updated_at: Mapped[datetime] = mapped_column(
@@ -139,11 +214,31 @@ class BookSimilarity(Base):
     )
 
 
+# `PublishedRecsVersion.name` of the neighbor lists in `book_similarities`.
+NEIGHBORS_RECS_VERSION = "neighbors"
+
+
+class PublishedRecsVersion(Base):
+    """
+    recs_version of the last published neighbor lists, written by
+    scripts/job_compute_neighbors.py in the transaction that replaces them. Serving reads
+    this row instead of scanning `book_similarities` for the newest version.
+    """
+
+    __tablename__ = "published_recs_versions"
+
+    name: Mapped[str] = mapped_column(Text, primary_key=True)
+    recs_version: Mapped[str] = mapped_column(Text, nullable=False)
+    published_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+
+
 class BookPopularity(Base):
     __tablename__ = "book_popularity"
 
     scope: Mapped[str] = mapped_column(Text, primary_key=True)
-    book_ids: Mapped[list[str]] = mapped_column(JSON, default=list)
+    book_ids: Mapped[Sequence[str]] = mapped_column(BookIdList, default=list)
     recs_version: Mapped[str | None] = mapped_column(Text, nullable=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(UTC)
@@ -152,6 +247,39 @@ class BookPopularity(Base):
     __table_args__ = (CheckConstraint("scope IN ('global')", name="ck_book_popularity_scope"),)
 
 
+class BookSimilarCards(Base):
+    """
+    Per-anchor shelf of compact book cards (see `book_card`) for the anchor's neighbors
+    and its popularity fill, written by the neighbors job so `?expand=books` reads one row.
+    """
+
+    __tablename__ = "book_similar_cards"
+
+    book_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("books.id", ondelete="CASCADE"), primary_key=True
+    )
+    cards: Mapped[list[dict[str, str | None]]] = mapped_column(JSON, default=list)
+    recs_version: Mapped[str | None] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+
+
+def book_card(
+    book_id: str, title: str, authors: Sequence[str] | None, small_image_url: str | None
+) -> dict[str, str | None]:
+    """
+    Returns the compact card stored on `book_similar_cards`: id, title, first author and
+    small cover image.
+    """
+    return {
+        "id": book_id,
+        "title": title,
+        "author": authors[0] if authors else None,
+        "small_image_url": small_image_url,
+    }
+
+
 class TelemetryEvent(Base):
     __tablename__ = "telemetry_events"
 
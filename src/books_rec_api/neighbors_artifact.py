@@ -0,0 +1,361 @@
+"""
+Binary, memory-mapped neighbor artifact published by `job_compute_neighbors`.
+
+Layout (little-endian, every section 4-byte aligned):
+
+    header            <4sHHIIIIII: magic, format version, reserved, book count,
+                      neighbor count, popularity count, and the byte lengths of
+                      recs_version, algo_id and the popularity recs_version
+    strings           recs_version, algo_id, popularity recs_version (UTF-8)
+    id_offsets        uint32[book_count + 1] into the id blob
+    neighbor_offsets  uint32[book_count + 1] into the neighbor array
+    neighbors         int32[neighbor_count], indexes into the id dictionary
+    popularity        int32[popularity_count], indexes into the id dictionary
+    id_blob           UTF-8 book ids sorted bytewise (the id dictionary)
+
+The file is opened read-only with `mmap`, so every API worker on a host shares the
+same page cache instead of holding its own decoded copy of the neighbor lists.
+"""
+
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections.abc import Callable, Mapping, Sequence
+from pathlib import Path
+from typing import Literal
+
+from books_rec_api.cache import CachedNeighbors, CachedPopularity, VersionedLRUCache
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BRNA"
+FORMAT_VERSION = 1
+CURRENT_ARTIFACT_NAME = "neighbors.bin"
+
+_HEADER = struct.Struct("<4sHHIIIIII")
+
+
+class ArtifactFormatError(ValueError):
+    pass
+
+
+def _pad(length: int) -> int:
+    return (-length) % 4
+
+
+def _little_endian(values: array) -> bytes:  # type: ignore[type-arg]
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_neighbors_artifact(
+    path: Path,
+    *,
+    recs_version: str,
+    algo_id: str,
+    neighbors: Mapping[str, Sequence[str]],
+    popularity_ids: Sequence[str] = (),
+    popularity_recs_version: str | None = None,
+) -> None:
+    """
+    Serializes neighbor lists into the binary layout and atomically moves it into `path`.
+
+    Neighbor and popularity ids that are not anchors themselves are dropped, since the
+    id dictionary only holds catalog books with a neighbor entry.
+    """
+    encoded_ids = sorted(book_id.encode("utf-8") for book_id in neighbors)
+    index_of = {book_id.decode("utf-8"): i for i, book_id in enumerate(encoded_ids)}
+
+    id_offsets = array("I", [0])
+    for encoded in encoded_ids:
+        id_offsets.append(id_offsets[-1] + len(encoded))
+
+    neighbor_offsets = array("I", [0])
+    flat_neighbors = array("i")
+    for encoded in encoded_ids:
+        for neighbor_id in neighbors[encoded.decode("utf-8")]:
+            idx = index_of.get(neighbor_id)
+            if idx is not None:
+                flat_neighbors.append(idx)
+        neighbor_offsets.append(len(flat_neighbors))
+
+    popularity = array("i", [index_of[pid] for pid in popularity_ids if pid in index_of])
+
+    strings = [
+        recs_version.encode("utf-8"),
+        algo_id.encode("utf-8"),
+        (popularity_recs_version or "").encode("utf-8"),
+    ]
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        len(encoded_ids),
+        len(flat_neighbors),
+        len(popularity),
+        *(len(s) for s in strings),
+    )
+    string_block = b"".join(strings)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(header)
+            handle.write(string_block + b"\0" * _pad(len(string_block)))
+            handle.write(_little_endian(id_offsets))
+            handle.write(_little_endian(neighbor_offsets))
+            handle.write(_little_endian(flat_neighbors))
+            handle.write(_little_endian(popularity))
+            handle.write(b"".join(encoded_ids))
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def publish_neighbors_artifact(
+    artifact_dir: Path,
+    *,
+    recs_version: str,
+    algo_id: str,
+    neighbors: Mapping[str, Sequence[str]],
+    popularity_ids: Sequence[str] = (),
+    popularity_recs_version: str | None = None,
+) -> Path:
+    """
+    Writes `neighbors-<recs_version>.bin` and atomically repoints `neighbors.bin` at it.
+
+    Workers that still map the previous version keep reading it until they reload. Once
+    the link is swapped, older versions are deleted; the one it replaced is kept for
+    workers that resolved the link just before the swap.
+    """
+    safe_version = re.sub(r"[^A-Za-z0-9_.-]+", "-", recs_version)
+    versioned = artifact_dir / f"neighbors-{safe_version}.bin"
+    write_neighbors_artifact(
+        versioned,
+        recs_version=recs_version,
+        algo_id=algo_id,
+        neighbors=neighbors,
+        popularity_ids=popularity_ids,
+        popularity_recs_version=popularity_recs_version,
+    )
+
+    current = artifact_dir / CURRENT_ARTIFACT_NAME
+    previous = Path(os.readlink(current)).name if current.is_symlink() else None
+    tmp_link = artifact_dir / f".{CURRENT_ARTIFACT_NAME}.{os.getpid()}"
+    if tmp_link.is_symlink() or tmp_link.exists():
+        tmp_link.unlink()
+    tmp_link.symlink_to(versioned.name)
+    os.replace(tmp_link, current)
+    _remove_superseded(artifact_dir, keep={versioned.name, previous})
+    return versioned
+
+
+def _remove_superseded(artifact_dir: Path, keep: set[str | None]) -> None:
+    # Deleting a file a worker still maps is safe: the mapping outlives the name.
+    for path in artifact_dir.glob("neighbors-*.bin"):
+        if path.name in keep:
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            logger.warning("Could not remove superseded neighbors artifact %s", path)
+
+
+class NeighborsArtifact:
+    """
+    Read-only view over a memory-mapped neighbor artifact.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        if sys.byteorder != "little":
+            raise ArtifactFormatError(
+                "Neighbor artifacts are only supported on little-endian hosts"
+            )
+
+        self.path = Path(path)
+        self._views: list[memoryview[int]] = []
+        with self.path.open("rb") as handle:
+            self._mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self) -> None:
+        if len(self._mm) < _HEADER.size:
+            raise ArtifactFormatError(f"Truncated neighbor artifact: {self.path}")
+
+        (
+            magic,
+            format_version,
+            _reserved,
+            book_count,
+            neighbor_count,
+            popularity_count,
+            *string_lengths,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ArtifactFormatError(f"Not a neighbor artifact: {self.path}")
+        if format_version != FORMAT_VERSION:
+            raise ArtifactFormatError(f"Unsupported artifact format version {format_version}")
+
+        pos = _HEADER.size
+        strings = []
+        for length in string_lengths:
+            strings.append(self._mm[pos : pos + length].decode("utf-8"))
+            pos += length
+        pos += _pad(pos)
+        self.recs_version, self.algo_id, popularity_recs_version = strings
+
+        view = memoryview(self._mm)
+        self._views.append(view)
+
+        def section(fmt: Literal["i", "I"], count: int) -> "memoryview[int]":
+            nonlocal pos
+            if pos + 4 * count > len(view):
+                raise ArtifactFormatError(f"Truncated neighbor artifact: {self.path}")
+            part = view[pos : pos + 4 * count].cast(fmt)
+            self._views.append(part)
+            pos += 4 * count
+            return part
+
+        self._id_offsets = section("I", book_count + 1)
+        self._neighbor_offsets = section("I", book_count + 1)
+        self._neighbors = section("i", neighbor_count)
+        popularity = section("i", popularity_count)
+        self._blob_start = pos
+        if self._blob_start + self._id_offsets[book_count] > len(self._mm):
+            raise ArtifactFormatError(f"Truncated neighbor artifact: {self.path}")
+
+        self._count: int = book_count
+        self.popularity = CachedPopularity(
+            book_ids=tuple(self._id_at(idx) for idx in popularity),
+            recs_version=popularity_recs_version or None,
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, book_id: object) -> bool:
+        return isinstance(book_id, str) and self._index_of(book_id) >= 0
+
+    def _id_bytes(self, idx: int) -> bytes:
+        start = self._blob_start + self._id_offsets[idx]
+        end = self._blob_start + self._id_offsets[idx + 1]
+        return self._mm[start:end]
+
+    def _id_at(self, idx: int) -> str:
+        return self._id_bytes(idx).decode("utf-8")
+
+    def _index_of(self, book_id: str) -> int:
+        key = book_id.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._id_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._id_bytes(lo) == key:
+            return lo
+        return -1
+
+    def get_neighbors(self, book_id: str) -> CachedNeighbors | None:
+        """
+        Returns the anchor's neighbor list, or None if the anchor is not in the artifact.
+        """
+        idx = self._index_of(book_id)
+        if idx < 0:
+            return None
+
+        start = self._neighbor_offsets[idx]
+        end = self._neighbor_offsets[idx + 1]
+        return CachedNeighbors(
+            neighbor_ids=tuple(self._id_at(n) for n in self._neighbors[start:end]),
+            algo_id=self.algo_id,
+            recs_version=self.recs_version,
+        )
+
+    def close(self) -> None:
+        for part in reversed(self._views):
+            part.release()
+        self._views.clear()
+        self._mm.close()
+
+
+class NeighborsArtifactStore:
+    """
+    Holds the currently mapped artifact and remaps it when the file at `path` changes.
+
+    The path is re-stat'ed at most once per `check_seconds`. If the artifact cannot be
+    loaded, `current()` returns None and callers fall back to the database.
+
+    `unlisted` remembers, per artifact version, whether anchors missing from the
+    artifact exist in the catalog; answers are re-read after `check_seconds`, so a book
+    imported since is not reported missing for longer than a remap would take.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        check_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+        unlisted_max_entries: int = 10_000,
+    ) -> None:
+        self.path = Path(path)
+        self.unlisted: VersionedLRUCache[str, bool] = VersionedLRUCache(
+            max_entries=unlisted_max_entries, ttl_seconds=check_seconds, clock=clock
+        )
+        self._check_seconds = check_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._artifact: NeighborsArtifact | None = None
+        self._identity: tuple[int, int, int] | None = None
+        self._checked_at: float | None = None
+
+    def current(self) -> NeighborsArtifact | None:
+        now = self._clock()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self._check_seconds:
+                return self._artifact
+            self._checked_at = now
+
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                logger.warning("Neighbor artifact not found at %s", self.path)
+                return self._artifact
+
+            identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+            if identity == self._identity:
+                return self._artifact
+
+            try:
+                artifact = NeighborsArtifact(self.path)
+            except (OSError, ArtifactFormatError):
+                logger.exception("Failed to load neighbor artifact from %s", self.path)
+                return self._artifact
+
+            # Old mappings are left to the garbage collector: requests that already
+            # hold a reference keep reading the previous version safely.
+            self._artifact = artifact
+            self._identity = identity
+            logger.info(
+                "Loaded neighbor artifact recs_version=%s books=%s path=%s",
+                artifact.recs_version,
+                len(artifact),
+                self.path,
+            )
+            return artifact
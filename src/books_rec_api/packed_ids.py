@@ -0,0 +1,141 @@
+"""
+Compact storage for the book id lists in `book_similarities` and `book_popularity`.
+
+Lists whose ids are all canonical decimal integers (the Goodbooks catalog) are stored
+as a tag byte followed by little-endian int32 values and decode into `PackedBookIds`,
+a read-only sequence backed by `array("i")` that only materializes `str` ids as they
+are iterated. Any other list falls back to a tagged UTF-8 JSON array.
+"""
+
+import json
+import sys
+from array import array
+from collections.abc import Iterator, Sequence
+from typing import Any, overload
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.engine import Dialect
+from sqlalchemy.types import TypeDecorator
+
+_TAG_JSON = 0
+_TAG_INT32 = 1
+_INT32_MAX = 2**31 - 1
+
+
+class PackedBookIds(Sequence[str]):
+    """
+    Immutable sequence of numeric book ids stored as 4 bytes per id.
+    """
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: "array[int]") -> None:
+        self._ids = ids
+
+    @property
+    def ints(self) -> "array[int]":
+        return self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "PackedBookIds": ...
+
+    def __getitem__(self, index: int | slice) -> "str | PackedBookIds":
+        if isinstance(index, slice):
+            return PackedBookIds(self._ids[index])
+        return str(self._ids[index])
+
+    def __iter__(self) -> Iterator[str]:
+        return map(str, self._ids)
+
+    def __contains__(self, value: object) -> bool:
+        return isinstance(value, str) and _is_packable(value) and int(value) in self._ids
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, PackedBookIds):
+            return self._ids == other._ids
+        if isinstance(other, Sequence) and not isinstance(other, str | bytes):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._ids.tobytes())
+
+    def __repr__(self) -> str:
+        return f"PackedBookIds({list(self)!r})"
+
+
+def _is_packable(book_id: str) -> bool:
+    return (
+        book_id.isascii()
+        and book_id.isdigit()
+        and (book_id == "0" or book_id[0] != "0")
+        and int(book_id) <= _INT32_MAX
+    )
+
+
+def encode_book_ids(book_ids: Sequence[str]) -> bytes:
+    if isinstance(book_ids, PackedBookIds):
+        ints = array("i", book_ids.ints)
+    elif all(_is_packable(book_id) for book_id in book_ids):
+        ints = array("i", (int(book_id) for book_id in book_ids))
+    else:
+        return bytes([_TAG_JSON]) + json.dumps(list(book_ids)).encode("utf-8")
+
+    if sys.byteorder != "little":
+        ints.byteswap()
+    return bytes([_TAG_INT32]) + ints.tobytes()
+
+
+def decode_book_ids(data: bytes) -> Sequence[str]:
+    """
+    Returns `PackedBookIds` for int32-encoded lists and a plain list otherwise.
+    """
+    if not data:
+        return []
+
+    tag = data[0]
+    if tag == _TAG_INT32:
+        ints = array("i")
+        ints.frombytes(data[1:])
+        if sys.byteorder != "little":
+            ints.byteswap()
+        return PackedBookIds(ints)
+    if tag == _TAG_JSON:
+        ids: list[str] = json.loads(data[1:])
+        return ids
+    raise ValueError(f"Unknown book id list encoding tag: {tag}")
+
+
+def freeze_book_ids(book_ids: Sequence[str]) -> Sequence[str]:
+    """
+    Returns an immutable view suitable for sharing through the in-process caches.
+    """
+    if isinstance(book_ids, PackedBookIds | tuple):
+        return book_ids
+    return tuple(book_ids)
+
+
+class BookIdList(TypeDecorator[Sequence[str]]):
+    """
+    Column type storing a book id list in the packed binary encoding (bytea on Postgres,
+    BLOB on SQLite).
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Sequence[str] | None, dialect: Dialect) -> bytes | None:
+        if value is None:
+            return None
+        return encode_book_ids(value)
+
+    def process_result_value(self, value: Any | None, dialect: Dialect) -> Sequence[str] | None:
+        if value is None:
+            return None
+        return decode_book_ids(bytes(value))
@@ -0,0 +1,62 @@
+"""
+Opaque keyset cursors for `GET /books` and `GET /books/search`.
+
+A cursor carries the sort key of the last row of the previous page and the filter it
+was issued for (the genre, or the search query), so it cannot be replayed against a
+different listing.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _encode(payload: dict[str, Any]) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _decode(cursor: str, scope_key: str, scope: str | None) -> dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (UnicodeError, binascii.Error, ValueError) as exc:
+        raise InvalidCursorError("Malformed cursor") from exc
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("after"), str):
+        raise InvalidCursorError("Malformed cursor")
+    if payload.get(scope_key) != scope:
+        raise InvalidCursorError(f"Cursor was issued for a different {scope_key}")
+    return payload
+
+
+def encode_cursor(after_id: str, genre: str | None) -> str:
+    return _encode({"after": after_id, "genre": genre})
+
+
+def decode_cursor(cursor: str, genre: str | None) -> str:
+    """
+    Returns the book id to continue after, or raises InvalidCursorError.
+    """
+    after_id: str = _decode(cursor, "genre", genre)["after"]
+    return after_id
+
+
+def encode_search_cursor(rank: float, after_id: str, query: str) -> str:
+    return _encode({"rank": rank, "after": after_id, "query": query})
+
+
+def decode_search_cursor(cursor: str, query: str) -> tuple[float, str]:
+    """
+    Returns the (rank, book id) to continue after, or raises InvalidCursorError.
+    """
+    payload = _decode(cursor, "query", query)
+    rank = payload.get("rank")
+    if not isinstance(rank, int | float) or isinstance(rank, bool):
+        raise InvalidCursorError("Malformed cursor")
+    return float(rank), payload["after"]
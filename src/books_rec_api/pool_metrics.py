@@ -0,0 +1,196 @@
+"""
+Connection-pool instrumentation for the sync and async engines.
+
+Counters come from SQLAlchemy pool events; checkout latency and waits are timed by
+the `Instrumented*QueuePool` subclasses around the public `Pool.connect`, where a caller
+blocks when the pool is exhausted. `max_overflow` is the configured value the engine was
+built with.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, PoolProxiedConnection, QueuePool
+
+
+@dataclass(frozen=True, slots=True)
+class PoolSnapshot:
+    name: str
+    pool_class: str
+    size: int | None
+    checked_out: int | None
+    checked_in: int | None
+    overflow: int | None
+    max_overflow: int | None
+    connects: int
+    checkouts: int
+    checkins: int
+    invalidations: int
+    timeouts: int
+    waits: int
+    wait_seconds_total: float
+    checkout_p50_ms: float
+    checkout_p99_ms: float
+    checkout_max_ms: float
+
+
+class PoolMetrics:
+    """
+    Thread-safe counters and a bounded reservoir of recent checkout latencies.
+    """
+
+    def __init__(
+        self, name: str, max_overflow: int | None = None, reservoir_size: int = 1024
+    ) -> None:
+        self.name = name
+        self.max_overflow = max_overflow
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=reservoir_size)
+        self._pool: Pool | None = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+
+    def bind(self, pool: Pool) -> None:
+        self._pool = pool
+
+    def record_checkout_latency(self, seconds: float, waited: bool) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            if waited:
+                self.waits += 1
+                self.wait_seconds_total += seconds
+
+    def record_timeout(self, seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+            self.wait_seconds_total += seconds
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> PoolSnapshot:
+        pool = self._pool
+        queue_pool = pool if isinstance(pool, QueuePool) else None
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return PoolSnapshot(
+                name=self.name,
+                pool_class=type(pool).__name__ if pool is not None else "unbound",
+                size=queue_pool.size() if queue_pool else None,
+                checked_out=queue_pool.checkedout() if queue_pool else None,
+                checked_in=queue_pool.checkedin() if queue_pool else None,
+                overflow=queue_pool.overflow() if queue_pool else None,
+                max_overflow=self.max_overflow if queue_pool else None,
+                connects=self.connects,
+                checkouts=self.checkouts,
+                checkins=self.checkins,
+                invalidations=self.invalidations,
+                timeouts=self.timeouts,
+                waits=self.waits,
+                wait_seconds_total=self.wait_seconds_total,
+                checkout_p50_ms=_percentile_ms(latencies, 50),
+                checkout_p99_ms=_percentile_ms(latencies, 99),
+                checkout_max_ms=latencies[-1] * 1000 if latencies else 0.0,
+            )
+
+
+def _percentile_ms(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank] * 1000
+
+
+def _timed_connect(
+    pool: QueuePool, metrics: PoolMetrics | None, connect: Callable[[], PoolProxiedConnection]
+) -> PoolProxiedConnection:
+    if metrics is None:
+        return connect()
+
+    # A checkout blocks only when no idle connection is left and overflow is exhausted.
+    max_overflow = metrics.max_overflow
+    saturated = (
+        pool.checkedin() == 0
+        and max_overflow is not None
+        and max_overflow > -1
+        and pool.overflow() >= max_overflow
+    )
+    start = time.perf_counter()
+    try:
+        connection = connect()
+    except sa_exc.TimeoutError:
+        metrics.record_timeout(time.perf_counter() - start)
+        raise
+    metrics.record_checkout_latency(time.perf_counter() - start, waited=saturated)
+    return connection
+
+
+class InstrumentedQueuePool(QueuePool):
+    metrics: PoolMetrics | None = None
+
+    def connect(self) -> PoolProxiedConnection:
+        return _timed_connect(self, self.metrics, super().connect)
+
+    def recreate(self) -> QueuePool:
+        pool = super().recreate()
+        if isinstance(pool, InstrumentedQueuePool):
+            pool.metrics = self.metrics
+            if self.metrics is not None:
+                self.metrics.bind(pool)
+        return pool
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    metrics: PoolMetrics | None = None
+
+    def connect(self) -> PoolProxiedConnection:
+        return _timed_connect(self, self.metrics, super().connect)
+
+    def recreate(self) -> QueuePool:
+        pool = super().recreate()
+        if isinstance(pool, InstrumentedAsyncQueuePool):
+            pool.metrics = self.metrics
+            if self.metrics is not None:
+                self.metrics.bind(pool)
+        return pool
+
+
+def instrument_engine(engine: Engine, metrics: PoolMetrics) -> None:
+    """
+    Attaches `metrics` to the engine's pool; pass `AsyncEngine.sync_engine` for async engines.
+    """
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool | InstrumentedAsyncQueuePool):
+        pool.metrics = metrics
+    metrics.bind(pool)
+
+    def on_connect(*_: Any) -> None:
+        metrics.increment("connects")
+
+    def on_checkout(*_: Any) -> None:
+        metrics.increment("checkouts")
+
+    def on_checkin(*_: Any) -> None:
+        metrics.increment("checkins")
+
+    def on_invalidate(*_: Any) -> None:
+        metrics.increment("invalidations")
+
+    event.listen(engine, "connect", on_connect)
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "checkin", on_checkin)
+    event.listen(engine, "invalidate", on_invalidate)
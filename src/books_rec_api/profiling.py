@@ -0,0 +1,171 @@
+"""
+On-demand profiling of a live worker for `POST /debug/profile`.
+
+`cpu` and `wall` sample the Python stacks of every thread at a fixed interval from a
+dedicated thread and return them in the collapsed-stack format read by flamegraph tools
+(`frame;frame;frame count` per line, root first). `wall` keeps every sample; `cpu` keeps
+a thread's sample only when its CPU clock advanced since the previous one, so threads
+blocked in I/O (a psycopg socket read, the event loop's selector) are left out. Where
+per-thread CPU clocks are unavailable, `cpu` instead drops threads parked in a known wait.
+`alloc` runs `tracemalloc` over the window and returns the source lines that allocated
+the most memory; snapshots are taken and compared off the event loop.
+
+The overhead is bounded by the sampling interval and the capped duration, and only one
+session runs per process at a time.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import FrameType
+
+from starlette.concurrency import run_in_threadpool
+
+# Innermost frames of a thread that is blocked rather than running Python code.
+_IDLE_FRAMES = frozenset(
+    {
+        ("threading.py", "wait"),
+        ("threading.py", "_wait_for_tstate_lock"),
+        ("selectors.py", "select"),
+        ("queue.py", "get"),
+    }
+)
+
+_session_lock = threading.Lock()
+
+
+class ProfileBusyError(RuntimeError):
+    pass
+
+
+def _frame_label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__") or os.path.basename(frame.f_code.co_filename)
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def _is_idle(frame: FrameType) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES
+
+
+def _thread_cpu_time(thread_id: int) -> float | None:
+    """
+    CPU seconds the thread has used, or None without per-thread CPU clocks.
+    """
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError):
+        return None
+
+
+def collapse_stack(frame: FrameType) -> str:
+    labels = []
+    current: FrameType | None = frame
+    while current is not None:
+        labels.append(_frame_label(current))
+        current = current.f_back
+    return ";".join(reversed(labels))
+
+
+def render_collapsed(samples: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class StackSampler:
+    """
+    Samples every other thread's stack each `interval` seconds until stopped.
+
+    Without `include_idle` only threads that used CPU since the previous sample are
+    kept (a thread's first sample only records its clock).
+    """
+
+    def __init__(self, interval: float, include_idle: bool) -> None:
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples: Counter[str] = Counter()
+        self._cpu_times: dict[int, float] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or not (self.include_idle or self._on_cpu(thread_id, frame)):
+                    continue
+                self.samples[collapse_stack(frame)] += 1
+
+    def _on_cpu(self, thread_id: int, frame: FrameType) -> bool:
+        cpu_time = _thread_cpu_time(thread_id)
+        if cpu_time is None:
+            return not _is_idle(frame)
+        previous = self._cpu_times.get(thread_id)
+        self._cpu_times[thread_id] = cpu_time
+        return previous is not None and cpu_time > previous
+
+
+def _acquire_session() -> None:
+    if not _session_lock.acquire(blocking=False):
+        raise ProfileBusyError("A profiling session is already running in this worker")
+
+
+async def profile_stacks(seconds: float, interval: float, include_idle: bool) -> str:
+    """
+    Samples all threads for `seconds` without blocking the event loop.
+    """
+    _acquire_session()
+    try:
+        sampler = StackSampler(interval=interval, include_idle=include_idle)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            samples = sampler.stop()
+        return render_collapsed(samples)
+    finally:
+        _session_lock.release()
+
+
+async def profile_allocations(seconds: float, limit: int) -> str:
+    """
+    Returns the `limit` source lines whose allocations grew the most over `seconds`.
+    """
+    _acquire_session()
+    started = not tracemalloc.is_tracing()
+    try:
+        if started:
+            tracemalloc.start()
+        # Snapshots walk every traced block: too slow to take on the event loop.
+        baseline = await run_in_threadpool(tracemalloc.take_snapshot)
+        start = time.perf_counter()
+        await asyncio.sleep(seconds)
+        snapshot = await run_in_threadpool(tracemalloc.take_snapshot)
+        elapsed = time.perf_counter() - start
+    finally:
+        if started:
+            tracemalloc.stop()
+        _session_lock.release()
+
+    stats = await run_in_threadpool(_top_allocations, baseline, snapshot)
+    lines = [f"# top {limit} allocation sites over {elapsed:.1f}s (size delta, count delta)"]
+    lines.extend(str(stat) for stat in stats[:limit])
+    return "\n".join(lines) + "\n"
+
+
+def _top_allocations(
+    baseline: tracemalloc.Snapshot, snapshot: tracemalloc.Snapshot
+) -> list[tracemalloc.StatisticDiff]:
+    # Allocations made by tracemalloc itself are not part of the workload.
+    own_files = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    return snapshot.filter_traces(own_files).compare_to(baseline.filter_traces(own_files), "lineno")
@@ -1,49 +1,648 @@
-from collections.abc import Sequence
+import functools
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator, Sequence
+from contextlib import AbstractContextManager, asynccontextmanager, contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any, Concatenate, ParamSpec, TypeVar
 
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Row,
+    Select,
+    and_,
+    column,
+    func,
+    literal_column,
+    or_,
+    select,
+    table,
+    text,
+)
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.orm.interfaces import ORMOption
 
+from books_rec_api.catalog_snapshot import CATALOG_COLUMNS
+from books_rec_api.circuit_breaker import CircuitBreaker
+from books_rec_api.deadline import (
+    QUERY_CANCELED,
+    DeadlineExceeded,
+    request_deadline_var,
+    statement_timeout_ms,
+)
 from books_rec_api.domain import BookId, PopularityScope
-from books_rec_api.models import Book, BookPopularity, BookSimilarity
+from books_rec_api.models import (
+    NEIGHBORS_RECS_VERSION,
+    Book,
+    BookCount,
+    BookGenre,
+    BookPopularity,
+    BookSimilarCards,
+    BookSimilarity,
+    PublishedRecsVersion,
+    book_card,
+    book_count_scope,
+)
+from books_rec_api.search_index import (
+    SEARCH_CONFIG,
+    SQLITE_COLUMN_WEIGHTS,
+    fts5_match_expression,
+)
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Errors that indicate the replica (not the query) is at fault: dropped or refused
+# connections, recovery conflicts and an exhausted replica pool.
+_FAILOVER_ERRORS = (sa_exc.OperationalError, sa_exc.TimeoutError)
+
+
+@dataclass(frozen=True, slots=True)
+class SimilarBooksLookup:
+    book_id: str
+    neighbor_ids: Sequence[str]
+    algo_id: str | None
+    recs_version: str | None
+    popularity_ids: Sequence[str] | None
+    popularity_recs_version: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class BookNeighbors:
+    book_id: str
+    neighbor_ids: Sequence[str]
+    algo_id: str | None
+    recs_version: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class BookSearchMatch:
+    book: Book
+    rank: float
+
+
+def _search_statement(
+    dialect: str, query: str, limit: int, after: tuple[float, str] | None
+) -> Select[tuple[Book, float]] | None:
+    """
+    Builds the ranked full-text query for the session's backend (see search_index), or
+    returns None when the query has nothing to match. Ordered by rank, then id, so
+    `after` (the last rank and id seen) continues the ordering as a keyset.
+    """
+    rank: ColumnElement[float]
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), query)
+        vector: ColumnElement[Any] = literal_column("books.search_vector")
+        rank = func.ts_rank(vector, tsquery, type_=Float)
+        stmt = select(Book, rank).where(vector.op("@@")(tsquery))
+    else:
+        expression = fts5_match_expression(query)
+        if expression is None:
+            return None
+        fts = table("books_fts", column("rowid"))
+        # bm25() is lower-is-better; negate it so both backends sort rank descending.
+        rank = -func.bm25(literal_column("books_fts"), *SQLITE_COLUMN_WEIGHTS, type_=Float)
+        stmt = (
+            select(Book, rank)
+            .join(fts, fts.c.rowid == literal_column("books.rowid"))
+            .where(literal_column("books_fts").op("MATCH")(expression))
+        )
+
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(or_(rank < after_rank, and_(rank == after_rank, Book.id > after_id)))
+
+    return stmt.order_by(rank.desc(), Book.id).limit(limit)
+
+
+def _to_search_matches(rows: Sequence[Row[tuple[Book, float]]]) -> list[BookSearchMatch]:
+    return [BookSearchMatch(book=row[0], rank=row[1]) for row in rows]
+
+
+def _load_columns(columns: Sequence[str] | None) -> list[ORMOption]:
+    # Restricts the Book load to `columns` (the primary key is always loaded).
+    if columns is None:
+        return []
+    return [load_only(*(getattr(Book, name) for name in columns), raiseload=True)]
+
+
+def _list_books_statement(
+    limit: int,
+    offset: int,
+    genre: str | None,
+    after_id: str | None,
+    columns: Sequence[str] | None = None,
+) -> Select[tuple[Book]]:
+    # Ordered by id so pages are stable and `after_id` (keyset) continues from a
+    # primary-key position instead of skipping `offset` rows.
+    if genre:
+        key = BookGenre.book_id
+        stmt = select(Book).join(BookGenre, key == Book.id).where(BookGenre.genre == genre)
+    else:
+        key = Book.id
+        stmt = select(Book)
+
+    if after_id is not None:
+        stmt = stmt.where(key > after_id)
+
+    return stmt.options(*_load_columns(columns)).order_by(key).limit(limit).offset(offset)
+
+
+def _stored_count_statement(genre: str | None) -> Select[tuple[int]]:
+    return select(BookCount.count).where(BookCount.scope == book_count_scope(genre))
+
+
+def _live_count_statement(genre: str | None) -> Select[tuple[int]]:
+    if genre:
+        return select(func.count()).select_from(BookGenre).where(BookGenre.genre == genre)
+    return select(func.count()).select_from(Book)
+
+
+def _similar_lookup_statement(book_id: BookId, scope: PopularityScope) -> Select[Any]:
+    return (
+        select(
+            Book.id,
+            BookSimilarity.neighbor_ids,
+            BookSimilarity.algo_id,
+            BookSimilarity.recs_version,
+            BookPopularity.book_ids,
+            BookPopularity.recs_version,
+        )
+        .outerjoin(BookSimilarity, BookSimilarity.book_id == Book.id)
+        .outerjoin(BookPopularity, BookPopularity.scope == scope)
+        .where(Book.id == book_id)
+    )
+
+
+def _to_similar_lookup(row: Row[Any] | None) -> SimilarBooksLookup | None:
+    if row is None:
+        return None
+
+    return SimilarBooksLookup(
+        book_id=row[0],
+        neighbor_ids=row[1] or [],
+        algo_id=row[2],
+        recs_version=row[3],
+        popularity_ids=row[4],
+        popularity_recs_version=row[5],
+    )
+
+
+def _neighbors_batch_statement(book_ids: Sequence[BookId]) -> Select[Any]:
+    return (
+        select(
+            Book.id,
+            BookSimilarity.neighbor_ids,
+            BookSimilarity.algo_id,
+            BookSimilarity.recs_version,
+        )
+        .outerjoin(BookSimilarity, BookSimilarity.book_id == Book.id)
+        .where(Book.id.in_(book_ids))
+    )
+
+
+def _to_neighbors_by_id(rows: Sequence[Row[Any]]) -> dict[str, BookNeighbors]:
+    return {
+        row[0]: BookNeighbors(
+            book_id=row[0], neighbor_ids=row[1] or [], algo_id=row[2], recs_version=row[3]
+        )
+        for row in rows
+    }
+
+
+def _shelf_cards_statement(book_id: BookId) -> Select[Any]:
+    return select(BookSimilarCards.cards).where(BookSimilarCards.book_id == book_id)
+
+
+def _book_cards_statement(book_ids: Sequence[str]) -> Select[Any]:
+    return select(Book.id, Book.title, Book.authors, Book.small_image_url).where(
+        Book.id.in_(book_ids)
+    )
+
+
+def _cards_from_shelf(
+    shelf: Sequence[dict[str, str | None]] | None, book_ids: Sequence[str]
+) -> tuple[dict[str, dict[str, str | None]], list[str]]:
+    """
+    Picks the requested cards out of an anchor's shelf; returns them with the ids it lacks.
+    """
+    wanted = set(book_ids)
+    cards = {str(card["id"]): card for card in shelf or () if card.get("id") in wanted}
+    return cards, [book_id for book_id in book_ids if book_id not in cards]
+
+
+def _to_book_cards(rows: Sequence[Row[Any]]) -> dict[str, dict[str, str | None]]:
+    return {row[0]: book_card(row[0], row[1], row[2], row[3]) for row in rows}
+
+
+def _recs_version_statement() -> Select[Any]:
+    similarity_version = (
+        select(PublishedRecsVersion.recs_version)
+        .where(PublishedRecsVersion.name == NEIGHBORS_RECS_VERSION)
+        .scalar_subquery()
+    )
+    popularity_version = (
+        select(BookPopularity.recs_version)
+        .where(BookPopularity.scope == "global")
+        .scalar_subquery()
+    )
+    return select(similarity_version, popularity_version)
+
+
+def _to_recs_version(row: Row[Any]) -> str:
+    return f"{row[0] or ''}|{row[1] or ''}"
+
+
+def _catalog_version_statement() -> Select[Any]:
+    # The stored total and its refresh stamp change on every import (deletes included);
+    # max(updated_at), read off its index, covers books inserted or edited in between.
+    in_scope = BookCount.scope == book_count_scope(None)
+    total = select(BookCount.count).where(in_scope).scalar_subquery()
+    imported_at = select(BookCount.refreshed_at).where(in_scope).scalar_subquery()
+    edited_at = select(func.max(Book.updated_at)).scalar_subquery()
+    return select(total, imported_at, edited_at)
+
+
+def _to_catalog_version(row: Row[Any]) -> str:
+    return f"{row[0] if row[0] is not None else ''}|{row[1] or ''}|{row[2] or ''}"
+
+
+def _catalog_rows_statement() -> Select[Any]:
+    return select(*(getattr(Book, name) for name in CATALOG_COLUMNS))
+
+
+# session.info key of the (transaction, deadline) the session's statement_timeout was
+# last set for.
+_DEADLINE_APPLIED = "statement_deadline"
+
+
+def _statement_timeout(session: Session) -> str | None:
+    """
+    The `SET LOCAL` that bounds the session's statements by the request deadline; None
+    without a deadline, off Postgres, or when already set for this transaction and
+    deadline. Raises `DeadlineExceeded` once the deadline has passed.
+    """
+    timeout_ms = statement_timeout_ms()
+    if timeout_ms is None or session.get_bind().dialect.name != "postgresql":
+        return None
+    if session.info.get(_DEADLINE_APPLIED) == _deadline_applied(session):
+        return None
+    return f"SET LOCAL statement_timeout = {timeout_ms}"
+
+
+def _deadline_applied(session: Session) -> tuple[object, float | None]:
+    return session.get_transaction(), request_deadline_var.get()
+
+
+def _apply_deadline(session: Session) -> None:
+    statement = _statement_timeout(session)
+    if statement is not None:
+        session.execute(text(statement))
+        session.info[_DEADLINE_APPLIED] = _deadline_applied(session)
+
+
+async def _apply_deadline_async(session: AsyncSession) -> None:
+    statement = _statement_timeout(session.sync_session)
+    if statement is not None:
+        await session.execute(text(statement))
+        session.info[_DEADLINE_APPLIED] = _deadline_applied(session.sync_session)
+
+
+def _is_query_canceled(exc: Exception) -> bool:
+    orig = exc.orig if isinstance(exc, sa_exc.DBAPIError) else None
+    return getattr(orig, "sqlstate", None) == QUERY_CANCELED
+
+
+# Reads whose run time grows with the catalog or the query rather than with the load on
+# the database; the breaker counts their errors but not their latency.
+_UNTIMED_READS = frozenset(
+    {"list_books", "count_books", "search_books", "get_book_ids", "get_catalog_rows"}
+)
+
+
+def _guarded(breaker: CircuitBreaker | None, timed: bool) -> AbstractContextManager[None]:
+    return breaker.guard(timed) if breaker is not None else nullcontext()
+
+
+@contextmanager
+def _cancelled_at_deadline(repo: "BooksRepository") -> Iterator[None]:
+    # A cancelled statement aborts the transaction; roll back so the request can still
+    # run its remaining reads (the popularity fallback) on the same session.
+    try:
+        yield
+    except sa_exc.OperationalError as exc:
+        if not _is_query_canceled(exc):
+            raise
+        repo.session.rollback()
+        raise DeadlineExceeded("Statement cancelled at the request deadline") from exc
+
+
+@asynccontextmanager
+async def _cancelled_at_deadline_async(repo: "AsyncBooksRepository") -> AsyncIterator[None]:
+    try:
+        yield
+    except sa_exc.OperationalError as exc:
+        if not _is_query_canceled(exc):
+            raise
+        await repo.session.rollback()
+        raise DeadlineExceeded("Statement cancelled at the request deadline") from exc
+
+
+def _fails_over(
+    method: Callable[Concatenate["BooksRepository", P], R],
+) -> Callable[Concatenate["BooksRepository", P], R]:
+    """
+    Bounds the read by the request deadline and the circuit breaker, and retries it once
+    on `fallback_session` (the primary) when the replica fails, then keeps using the
+    primary for the rest of the request. A statement cancelled at the deadline is not
+    retried, and reaches the breaker as `DeadlineExceeded`, which it does not count.
+    """
+    timed = method.__name__ not in _UNTIMED_READS
+
+    @functools.wraps(method)
+    def wrapper(self: "BooksRepository", /, *args: P.args, **kwargs: P.kwargs) -> R:
+        with _guarded(self.breaker, timed), _cancelled_at_deadline(self):
+            try:
+                _apply_deadline(self.session)
+                return method(self, *args, **kwargs)
+            except _FAILOVER_ERRORS as exc:
+                if self.fallback_session is None or _is_query_canceled(exc):
+                    raise
+                logger.warning("Replica read %s failed; retrying on primary", method.__name__)
+                self.session.rollback()
+                self.session, self.fallback_session = self.fallback_session, None
+                _apply_deadline(self.session)
+                return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _fails_over_async(
+    method: Callable[Concatenate["AsyncBooksRepository", P], Awaitable[R]],
+) -> Callable[Concatenate["AsyncBooksRepository", P], Awaitable[R]]:
+    timed = method.__name__ not in _UNTIMED_READS
+
+    @functools.wraps(method)
+    async def wrapper(self: "AsyncBooksRepository", /, *args: P.args, **kwargs: P.kwargs) -> R:
+        with _guarded(self.breaker, timed):
+            async with _cancelled_at_deadline_async(self):
+                try:
+                    await _apply_deadline_async(self.session)
+                    return await method(self, *args, **kwargs)
+                except _FAILOVER_ERRORS as exc:
+                    if self.fallback_session is None or _is_query_canceled(exc):
+                        raise
+                    logger.warning("Replica read %s failed; retrying on primary", method.__name__)
+                    await self.session.rollback()
+                    self.session, self.fallback_session = self.fallback_session, None
+                    await _apply_deadline_async(self.session)
+                    return await method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class BooksRepository:
-    def __init__(self, session: Session) -> None:
+    """
+    Read-only catalog and recommendation queries.
+
+    `session` is usually bound to the read replica; when `fallback_session` (the
+    primary) is given, reads that fail on the replica are retried there. With a
+    `breaker`, reads fail fast with `CircuitOpenError` while it is open.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        fallback_session: Session | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
         self.session = session
+        self.fallback_session = fallback_session
+        self.breaker = breaker
 
-    def get_by_id(self, book_id: BookId) -> Book | None:
-        return self.session.get(Book, book_id)
+    @_fails_over
+    def get_by_id(self, book_id: BookId, columns: Sequence[str] | None = None) -> Book | None:
+        """
+        Loads a book; `columns` limits the load to those attributes (see fieldsets).
+        """
+        return self.session.get(Book, book_id, options=_load_columns(columns))
 
+    @_fails_over
     def list_books(
-        self, limit: int = 20, offset: int = 0, genre: str | None = None
-    ) -> tuple[Sequence[Book], int]:
+        self,
+        limit: int = 20,
+        offset: int = 0,
+        genre: str | None = None,
+        after_id: str | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> Sequence[Book]:
         """
-        Returns a tuple of (items, total_count).
+        Returns one page of books ordered by id, starting after `after_id` when given.
         """
-        stmt = select(Book)
-        count_stmt = select(func.count()).select_from(Book)
+        stmt = _list_books_statement(limit, offset, genre, after_id, columns)
+        return self.session.scalars(stmt).all()
 
-        if genre:
-            from sqlalchemy import String
+    @_fails_over
+    def count_books(self, genre: str | None = None) -> int:
+        """
+        Returns the stored count for the catalog or a genre, counting live only when
+        `book_counts` has not been refreshed for that scope.
+        """
+        count = self.session.scalar(_stored_count_statement(genre))
+        if count is None:
+            count = self.session.execute(_live_count_statement(genre)).scalar_one()
+        return count
 
-            stmt = stmt.where(Book.genres.cast(String).like(f'%"{genre}"%'))
-            count_stmt = count_stmt.where(Book.genres.cast(String).like(f'%"{genre}"%'))
+    @_fails_over
+    def get_similarities(self, book_id: BookId) -> BookSimilarity | None:
+        """
+        Retrieves the pre-computed similarities for a given book.
+        """
+        return self.session.get(BookSimilarity, book_id)
 
-        stmt = stmt.limit(limit).offset(offset)
+    @_fails_over
+    def get_similar_lookup(
+        self, book_id: BookId, scope: PopularityScope = "global"
+    ) -> SimilarBooksLookup | None:
+        """
+        Resolves the anchor, its neighbor list and the popularity fallback in one statement.
 
-        total = self.session.execute(count_stmt).scalar_one()
-        items = self.session.scalars(stmt).all()
+        Returns None when the anchor book does not exist. A missing neighbor or popularity
+        row yields empty neighbors and `popularity_ids=None` respectively.
+        """
+        row = self.session.execute(_similar_lookup_statement(book_id, scope)).first()
+        return _to_similar_lookup(row)
 
-        return items, total
+    @_fails_over
+    def get_neighbors_batch(self, book_ids: Sequence[BookId]) -> dict[str, BookNeighbors]:
+        """
+        Resolves many anchors and their neighbor lists with a single IN query.
 
-    def get_similarities(self, book_id: BookId) -> BookSimilarity | None:
+        Anchors missing from the catalog are absent from the returned mapping.
         """
-        Retrieves the pre-computed similarities for a given book.
+        if not book_ids:
+            return {}
+        rows = self.session.execute(_neighbors_batch_statement(book_ids)).all()
+        return _to_neighbors_by_id(rows)
+
+    @_fails_over
+    def get_book_cards(
+        self, book_id: BookId, book_ids: Sequence[str]
+    ) -> dict[str, dict[str, str | None]]:
         """
-        return self.session.get(BookSimilarity, book_id)
+        Returns the compact cards of `book_ids` keyed by id, read from the anchor's
+        precomputed shelf; ids the shelf lacks are read from `books` with one IN query.
+
+        Ids missing from the catalog are absent from the returned mapping.
+        """
+        if not book_ids:
+            return {}
+        shelf = self.session.scalar(_shelf_cards_statement(book_id))
+        cards, missing = _cards_from_shelf(shelf, book_ids)
+        if missing:
+            cards.update(_to_book_cards(self.session.execute(_book_cards_statement(missing)).all()))
+        return cards
 
+    @_fails_over
     def get_popularity(self, scope: PopularityScope = "global") -> BookPopularity | None:
         """
         Retrieves the pre-computed popularity list.
         """
         return self.session.get(BookPopularity, scope)
+
+    @_fails_over
+    def get_recs_version(self) -> str:
+        """
+        Returns a stamp identifying the currently published neighbor and popularity artifacts.
+        """
+        return _to_recs_version(self.session.execute(_recs_version_statement()).one())
+
+    @_fails_over
+    def get_catalog_version(self) -> str:
+        """
+        Returns a stamp that changes when books are added to or removed from the catalog.
+        """
+        return _to_catalog_version(self.session.execute(_catalog_version_statement()).one())
+
+    @_fails_over
+    def get_book_ids(self) -> list[str]:
+        return list(self.session.scalars(select(Book.id)))
+
+    @_fails_over
+    def get_catalog_rows(self) -> Sequence[Row[Any]]:
+        """
+        Returns every book as a `CATALOG_COLUMNS` tuple, for the catalog snapshot.
+        """
+        return self.session.execute(_catalog_rows_statement()).all()
+
+    @_fails_over
+    def search_books(
+        self, query: str, limit: int = 20, after: tuple[float, str] | None = None
+    ) -> list[BookSearchMatch]:
+        """
+        Full-text search over title, original title, authors and description, best first.
+        """
+        stmt = _search_statement(self.session.get_bind().dialect.name, query, limit, after)
+        if stmt is None:
+            return []
+        return _to_search_matches(self.session.execute(stmt).all())
+
+
+class AsyncBooksRepository:
+    """
+    AsyncSession counterpart of BooksRepository used by the async serving stack.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        fallback_session: AsyncSession | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.session = session
+        self.fallback_session = fallback_session
+        self.breaker = breaker
+
+    @_fails_over_async
+    async def get_by_id(self, book_id: BookId, columns: Sequence[str] | None = None) -> Book | None:
+        return await self.session.get(Book, book_id, options=_load_columns(columns))
+
+    @_fails_over_async
+    async def list_books(
+        self,
+        limit: int = 20,
+        offset: int = 0,
+        genre: str | None = None,
+        after_id: str | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> Sequence[Book]:
+        stmt = _list_books_statement(limit, offset, genre, after_id, columns)
+        return (await self.session.scalars(stmt)).all()
+
+    @_fails_over_async
+    async def count_books(self, genre: str | None = None) -> int:
+        count = await self.session.scalar(_stored_count_statement(genre))
+        if count is None:
+            count = (await self.session.execute(_live_count_statement(genre))).scalar_one()
+        return count
+
+    @_fails_over_async
+    async def get_similar_lookup(
+        self, book_id: BookId, scope: PopularityScope = "global"
+    ) -> SimilarBooksLookup | None:
+        row = (await self.session.execute(_similar_lookup_statement(book_id, scope))).first()
+        return _to_similar_lookup(row)
+
+    @_fails_over_async
+    async def get_neighbors_batch(self, book_ids: Sequence[BookId]) -> dict[str, BookNeighbors]:
+        if not book_ids:
+            return {}
+        rows = (await self.session.execute(_neighbors_batch_statement(book_ids))).all()
+        return _to_neighbors_by_id(rows)
+
+    @_fails_over_async
+    async def get_book_cards(
+        self, book_id: BookId, book_ids: Sequence[str]
+    ) -> dict[str, dict[str, str | None]]:
+        if not book_ids:
+            return {}
+        shelf = await self.session.scalar(_shelf_cards_statement(book_id))
+        cards, missing = _cards_from_shelf(shelf, book_ids)
+        if missing:
+            rows = (await self.session.execute(_book_cards_statement(missing))).all()
+            cards.update(_to_book_cards(rows))
+        return cards
+
+    @_fails_over_async
+    async def get_popularity(self, scope: PopularityScope = "global") -> BookPopularity | None:
+        return await self.session.get(BookPopularity, scope)
+
+    @_fails_over_async
+    async def get_recs_version(self) -> str:
+        return _to_recs_version((await self.session.execute(_recs_version_statement())).one())
+
+    @_fails_over_async
+    async def get_catalog_version(self) -> str:
+        row = (await self.session.execute(_catalog_version_statement())).one()
+        return _to_catalog_version(row)
+
+    @_fails_over_async
+    async def get_book_ids(self) -> list[str]:
+        return list(await self.session.scalars(select(Book.id)))
+
+    @_fails_over_async
+    async def get_catalog_rows(self) -> Sequence[Row[Any]]:
+        return (await self.session.execute(_catalog_rows_statement())).all()
+
+    @_fails_over_async
+    async def search_books(
+        self, query: str, limit: int = 20, after: tuple[float, str] | None = None
+    ) -> list[BookSearchMatch]:
+        stmt = _search_statement(self.session.get_bind().dialect.name, query, limit, after)
+        if stmt is None:
+            return []
+        return _to_search_matches((await self.session.execute(stmt)).all())
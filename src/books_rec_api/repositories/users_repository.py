@@ -1,4 +1,5 @@
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from books_rec_api.domain import ExternalIdpId, InternalUserId
@@ -41,15 +42,73 @@ class UsersRepository:
         if user_model is None:
             return None
 
-        update_data = patch.model_dump(exclude_unset=True, exclude_none=True)
-        if not update_data:
+        if not _apply_preferences_patch(user_model, patch):
             return user_model
 
-        current_prefs = DomainPreferences(**user_model.domain_preferences)
-        merged_prefs = current_prefs.model_copy(update=update_data)
-
-        user_model.domain_preferences = merged_prefs.model_dump()
         self.session.commit()
         self.session.refresh(user_model)
 
         return user_model
+
+
+class AsyncUsersRepository:
+    """
+    AsyncSession counterpart of UsersRepository used by the async serving stack.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get_by_external_id(self, external_idp_id: ExternalIdpId) -> UserModel | None:
+        stmt = select(UserModel).where(UserModel.external_idp_id == external_idp_id)
+        return (await self.session.scalars(stmt)).first()
+
+    async def get_by_id(self, user_id: InternalUserId) -> UserModel | None:
+        return await self.session.get(UserModel, user_id)
+
+    async def create(
+        self,
+        id: InternalUserId,
+        external_idp_id: ExternalIdpId,
+        domain_preferences: DomainPreferences,
+    ) -> UserModel:
+        user_model = UserModel(
+            id=id,
+            external_idp_id=external_idp_id,
+            domain_preferences=domain_preferences.model_dump(),
+        )
+        self.session.add(user_model)
+        await self.session.commit()
+        await self.session.refresh(user_model)
+
+        return user_model
+
+    async def update_preferences(
+        self, user_id: InternalUserId, patch: DomainPreferencesUpdate
+    ) -> UserModel | None:
+        user_model = await self.session.get(UserModel, user_id)
+        if user_model is None:
+            return None
+
+        if not _apply_preferences_patch(user_model, patch):
+            return user_model
+
+        await self.session.commit()
+        await self.session.refresh(user_model)
+
+        return user_model
+
+
+def _apply_preferences_patch(user_model: UserModel, patch: DomainPreferencesUpdate) -> bool:
+    """
+    Merges the patch into the model's preferences. Returns False when there is nothing to update.
+    """
+    update_data = patch.model_dump(exclude_unset=True, exclude_none=True)
+    if not update_data:
+        return False
+
+    current_prefs = DomainPreferences(**user_model.domain_preferences)
+    merged_prefs = current_prefs.model_copy(update=update_data)
+
+    user_model.domain_preferences = merged_prefs.model_dump()
+    return True
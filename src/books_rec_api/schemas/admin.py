@@ -0,0 +1,40 @@
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class PoolStatsRead(BaseModel):
+    name: str = Field(description="Engine name, e.g. primary or async")
+    pool_class: str = Field(description="SQLAlchemy pool implementation")
+    size: int | None = Field(description="Configured pool size (QueuePool only)")
+    checked_out: int | None = Field(description="Connections currently checked out")
+    checked_in: int | None = Field(description="Idle connections held by the pool")
+    overflow: int | None = Field(description="Connections currently open beyond pool size")
+    max_overflow: int | None = Field(description="Configured overflow limit (-1 = unlimited)")
+    connects: int = Field(description="DBAPI connections opened since startup")
+    checkouts: int = Field(description="Pool checkouts since startup")
+    checkins: int = Field(description="Pool checkins since startup")
+    invalidations: int = Field(description="Connections invalidated (e.g. failed pre-ping)")
+    timeouts: int = Field(description="Checkouts that gave up after pool_timeout")
+    waits: int = Field(description="Checkouts that found the pool exhausted and had to wait")
+    wait_seconds_total: float = Field(description="Total time spent in those waits")
+    checkout_p50_ms: float = Field(description="Median checkout latency over recent checkouts")
+    checkout_p99_ms: float = Field(description="p99 checkout latency over recent checkouts")
+    checkout_max_ms: float = Field(description="Slowest recent checkout")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DbPoolStatsResponse(BaseModel):
+    pools: list[PoolStatsRead]
+
+
+class SingleFlightStatsRead(BaseModel):
+    name: str = Field(description="Single-flight group, e.g. books or books_async")
+    leaders: int = Field(description="Fetches that actually ran against the database")
+    coalesced: int = Field(description="Requests that shared another request's in-flight fetch")
+    in_flight: int = Field(description="Fetches currently running")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SingleFlightStatsResponse(BaseModel):
+    groups: list[SingleFlightStatsRead]
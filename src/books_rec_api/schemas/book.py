@@ -1,4 +1,5 @@
 from pydantic import BaseModel, ConfigDict, Field
+from pydantic.json_schema import SkipJsonSchema
 
 from books_rec_api.domain import BookId
 
@@ -22,3 +23,36 @@ class PaginatedBooks(BaseModel):
     total: int
     page: int
     size: int
+    next_cursor: str | None = None
+
+
+class PartialBookRead(BaseModel):
+    """
+    `BookRead` as returned with `?fields=`: `id` plus the requested fields only.
+    Documents that shape; unrequested fields are absent, never null.
+    """
+
+    id: BookId
+    title: str | SkipJsonSchema[None] = None
+    authors: list[str] | SkipJsonSchema[None] = None
+    genres: list[str] | SkipJsonSchema[None] = None
+    publication_year: int | None = None
+    description: str | None = None
+
+
+class PartialPaginatedBooks(BaseModel):
+    items: list[PartialBookRead]
+    total: int
+    page: int
+    size: int
+    next_cursor: str | None = None
+
+
+class BookSearchHit(BookRead):
+    rank: float
+
+
+class PaginatedBookSearch(BaseModel):
+    items: list[BookSearchHit]
+    size: int
+    next_cursor: str | None = None
@@ -47,3 +47,46 @@ class SimilarBooksResponse(BaseModel):
         description="Version of the published recommendation artifacts",
         examples=["2026-02-25T03:00Z"],
     )
+
+
+class BookCard(BaseModel):
+    id: BookId = Field(description="Unique identifier of the book", examples=["book-456"])
+    title: str = Field(description="Title of the book", examples=["Dune Messiah"])
+    author: str | None = Field(
+        default=None, description="First listed author", examples=["Frank Herbert"]
+    )
+    small_image_url: str | None = Field(
+        default=None,
+        description="URL to a small cover image",
+        examples=["https://example.com/dune-messiah-small.jpg"],
+    )
+
+
+class SimilarBooksExpandedResponse(SimilarBooksResponse):
+    books: list[BookCard] = Field(
+        description="Cards for the similar books, in similar_book_ids order (expand=books)"
+    )
+
+
+MAX_SIMILAR_BATCH_ANCHORS = 200
+
+
+class SimilarBooksBatchRequest(BaseModel):
+    book_ids: list[BookId] = Field(
+        min_length=1,
+        max_length=MAX_SIMILAR_BATCH_ANCHORS,
+        description="Anchor book identifiers; duplicates are resolved once",
+        examples=[["book-123", "book-456"]],
+    )
+    limit: int = Field(
+        default=20, ge=0, le=100, description="Max number of similar books per anchor"
+    )
+
+
+class SimilarBooksBatchResponse(BaseModel):
+    results: list[SimilarBooksResponse] = Field(
+        description="Per-anchor results in request order, each with its own trace_id"
+    )
+    not_found: list[BookId] = Field(
+        description="Anchor identifiers that are not in the catalog", examples=[["book-999"]]
+    )
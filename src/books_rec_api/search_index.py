@@ -0,0 +1,106 @@
+"""
+Full-text index behind `GET /books/search`.
+
+On Postgres `books.search_vector` is a stored generated `tsvector` (title and original
+title weighted A, authors B, description D) with a GIN index, so every writer - the
+importer's upserts, the first-boot seed and ORM writes - keeps it current. SQLite, used
+by the tests and local runs, gets an external-content FTS5 table kept in sync by
+triggers, ranked with column weights that mirror the Postgres ones.
+
+Neither object is mapped on `Book`: `select(Book)` never loads the vector, and the DDL
+is attached to the `books` table for `create_all` and reused by the migration.
+"""
+
+import re
+from typing import Any
+
+from sqlalchemy import Connection, Table, event
+
+SEARCH_CONFIG = "english"
+
+POSTGRES_SEARCH_DDL = (
+    f"""
+    ALTER TABLE books ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(original_title, '')), 'A')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(authors, '[]'::json)), 'B')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX ix_books_search_vector ON books USING gin (search_vector)",
+)
+
+# Database-only objects that alembic autogenerate must not try to drop.
+UNMAPPED_SEARCH_OBJECTS = frozenset({"search_vector", "ix_books_search_vector", "books_fts"})
+
+_FTS_COLUMNS = "title, original_title, authors, description"
+_FTS_NEW_ROW = "new.rowid, new.title, new.original_title, new.authors, new.description"
+_FTS_OLD_ROW = "old.rowid, old.title, old.original_title, old.authors, old.description"
+
+SQLITE_SEARCH_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE books_fts USING fts5(
+        {_FTS_COLUMNS}, content='books', content_rowid='rowid', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts (rowid, {_FTS_COLUMNS}) VALUES ({_FTS_NEW_ROW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', {_FTS_OLD_ROW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER books_fts_au AFTER UPDATE ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', {_FTS_OLD_ROW});
+        INSERT INTO books_fts (rowid, {_FTS_COLUMNS}) VALUES ({_FTS_NEW_ROW});
+    END
+    """,
+    "INSERT INTO books_fts (books_fts) VALUES ('rebuild')",
+)
+
+# bm25() weights per FTS5 column, in _FTS_COLUMNS order (A, A, B, D as on Postgres).
+SQLITE_COLUMN_WEIGHTS = (10.0, 10.0, 4.0, 1.0)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts5_match_expression(query: str) -> str | None:
+    """
+    Turns free text into an FTS5 query matching every word, with each word quoted so
+    user input can never be parsed as FTS5 syntax. Returns None when no word is left.
+    """
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"' for token in tokens)
+
+
+def _statements_for(dialect: str) -> tuple[str, ...]:
+    if dialect == "postgresql":
+        return POSTGRES_SEARCH_DDL
+    if dialect == "sqlite":
+        return SQLITE_SEARCH_DDL
+    return ()
+
+
+def install_search_index(books: Table) -> None:
+    """
+    Creates the backend's search objects whenever `books` is created with `create_all`.
+    """
+
+    def after_create(target: Table, connection: Connection, **_: Any) -> None:
+        for statement in _statements_for(connection.dialect.name):
+            connection.exec_driver_sql(statement)
+
+    def before_drop(target: Table, connection: Connection, **_: Any) -> None:
+        if connection.dialect.name == "sqlite":
+            connection.exec_driver_sql("DROP TABLE IF EXISTS books_fts")
+
+    event.listen(books, "after_create", after_create)
+    event.listen(books, "before_drop", before_drop)
@@ -0,0 +1,49 @@
+"""
+Per-request stage timings reported in the `Server-Timing` response header.
+
+`EvalContextMiddleware` installs a fresh `ServerTiming` for every request; code on the
+request path wraps a stage in `timed(name)`, which is a no-op outside a request. The
+collector is shared by reference, so stages recorded in the threadpool (sync routes)
+are visible to the middleware when the response starts.
+"""
+
+import contextvars
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class ServerTiming:
+    __slots__ = ("_stages",)
+
+    def __init__(self) -> None:
+        self._stages: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self._stages[name] = self._stages.get(name, 0.0) + seconds
+
+    def header_value(self, total_seconds: float) -> str:
+        """
+        Renders the recorded stages, in recording order, followed by the total as `app`.
+        """
+        stages = [*self._stages.items(), ("app", total_seconds)]
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages)
+
+
+server_timing_var: contextvars.ContextVar[ServerTiming | None] = contextvars.ContextVar(
+    "server_timing", default=None
+)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    timing = server_timing_var.get()
+    if timing is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start)
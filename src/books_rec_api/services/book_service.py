@@ -1,41 +1,267 @@
 import json
 import logging
 import time
+import uuid
+from collections.abc import Awaitable, Callable, Collection, Hashable, Mapping, Sequence
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import TypeVar
 
-from pydantic import validate_call
+from pydantic import BaseModel, validate_call
 
+from books_rec_api.book_id_filter import BloomFilter, BookIdFilterStore
+from books_rec_api.cache import (
+    CachedNeighbors,
+    CachedPopularity,
+    CachedSimilarResponse,
+    LastKnownGood,
+    SimilarBooksCache,
+    VersionedSnapshot,
+)
+from books_rec_api.catalog_snapshot import CatalogBook, CatalogSnapshot, CatalogSnapshotStore
+from books_rec_api.circuit_breaker import UNAVAILABLE_ERRORS
+from books_rec_api.deadline import DeadlineExceeded, narrowed, remaining
 from books_rec_api.domain import AlgoId, BookId, RecsVersion
-from books_rec_api.repositories.books_repository import BooksRepository
-from books_rec_api.schemas.book import BookRead, PaginatedBooks
-from books_rec_api.schemas.recommendation import SimilarBooksResponse
+from books_rec_api.fieldsets import book_columns, sparse_book_model, sparse_page_model
+from books_rec_api.http_cache import content_etag, etag_matches
+from books_rec_api.metrics import (
+    similar_degraded_requests,
+    similar_fallback_requests,
+    similar_neighbors_count,
+    similar_requests,
+)
+from books_rec_api.models import Book, BookPopularity
+from books_rec_api.neighbors_artifact import NeighborsArtifact, NeighborsArtifactStore
+from books_rec_api.packed_ids import freeze_book_ids
+from books_rec_api.pagination import (
+    decode_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    encode_search_cursor,
+)
+from books_rec_api.repositories.books_repository import (
+    AsyncBooksRepository,
+    BookNeighbors,
+    BookSearchMatch,
+    BooksRepository,
+    SimilarBooksLookup,
+)
+from books_rec_api.schemas.book import BookRead, BookSearchHit, PaginatedBooks, PaginatedBookSearch
+from books_rec_api.schemas.recommendation import (
+    BookCard,
+    SimilarBooksBatchResponse,
+    SimilarBooksExpandedResponse,
+    SimilarBooksResponse,
+)
+from books_rec_api.server_timing import timed
+from books_rec_api.single_flight import AsyncSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
+R = TypeVar("R")
+T = TypeVar("T")
+V = TypeVar("V")
+
+# Neighbors of an anchor whose lookup ran out of its deadline budget, or that the catalog
+# holds but the neighbors artifact does not: the response comes from the popularity list.
+_NO_NEIGHBORS = CachedNeighbors(neighbor_ids=(), algo_id=None, recs_version=None)
+
+# algo_id of responses served from the last-known-good lists while the database is down.
+DEGRADED_ALGO_ID = "degraded"
+
+# Stands in for the trace_id while a response body is serialized for the response cache.
+# Longer than any BookId, so it cannot collide with the ids that precede it in the body.
+_TRACE_ID_PLACEHOLDER = "__trace_id_placeholder_6f1d2c8e4b9a4f0e__"
+_TRACE_ID_PLACEHOLDER_JSON = json.dumps(_TRACE_ID_PLACEHOLDER).encode("utf-8")
+
+
+@dataclass(frozen=True, slots=True)
+class SimilarBooksBody:
+    """
+    Serialized similar-books response; `content` is None when the client's
+    If-None-Match already matches `etag`.
+    """
+
+    content: bytes | None
+    etag: str
+    degraded: bool = False
+
+
+def _to_book(book: Book | CatalogBook, fields: frozenset[str] | None) -> BaseModel:
+    model = BookRead if fields is None else sparse_book_model(fields)
+    return model.model_validate(book)
+
+
+def _to_page(
+    rows: Sequence[Book | CatalogBook],
+    total: int,
+    page: int,
+    size: int,
+    genre: str | None,
+    fields: frozenset[str] | None,
+) -> BaseModel:
+    items = rows[:size]
+    next_cursor = encode_cursor(items[-1].id, genre) if len(rows) > size else None
+    page_model = PaginatedBooks if fields is None else sparse_page_model(fields)
+    return page_model(
+        items=[_to_book(item, fields) for item in items],
+        total=total,
+        page=page,
+        size=size,
+        next_cursor=next_cursor,
+    )
+
+
+def _from_catalog(
+    catalog: CatalogSnapshot, book_id: BookId, fields: frozenset[str] | None
+) -> BaseModel | None:
+    book = catalog.get(book_id)
+    return _to_book(book, fields) if book is not None else None
+
+
+def _request_key(request: tuple[object, ...]) -> bytes:
+    # Field sets are sorted so the key does not depend on set iteration order.
+    return json.dumps(request, default=sorted).encode("utf-8")
+
+
+def _to_search_page(
+    matches: Sequence[BookSearchMatch], query: str, size: int
+) -> PaginatedBookSearch:
+    page = matches[:size]
+    next_cursor = (
+        encode_search_cursor(page[-1].rank, page[-1].book.id, query)
+        if len(matches) > size
+        else None
+    )
+    return PaginatedBookSearch(
+        items=[
+            BookSearchHit(rank=match.rank, **BookRead.model_validate(match.book).model_dump())
+            for match in page
+        ],
+        size=size,
+        next_cursor=next_cursor,
+    )
+
+
+def _page_position(
+    page: int, size: int, genre: str | None, cursor: str | None
+) -> tuple[str | None, int]:
+    """
+    Returns the keyset position (`after_id`) and offset of the requested page; a cursor
+    replaces the page number.
+    """
+    after_id = decode_cursor(cursor, genre) if cursor else None
+    offset = 0 if after_id is not None else (page - 1) * size
+    return after_id, offset
+
+
+def _catalog_page(
+    catalog: CatalogSnapshot,
+    page: int,
+    size: int,
+    genre: str | None,
+    cursor: str | None,
+    fields: frozenset[str] | None,
+) -> BaseModel:
+    after_id, offset = _page_position(page, size, genre, cursor)
+    rows = catalog.list_books(size + 1, offset, genre, after_id)
+    return _to_page(rows, catalog.count(genre), page, size, genre, fields)
+
+
+def _catalog_etag(version: str | None, request: tuple[object, ...]) -> str | None:
+    if version is None:
+        return None
+    return content_etag(version.encode("utf-8"), _request_key(request))
+
+
+def _book_key(book_id: BookId, columns: object) -> tuple[str, str, object]:
+    return ("book", book_id, columns)
+
+
+def _similar_key(book_id: BookId, version: str | None) -> tuple[str, str, object]:
+    return ("similar", book_id, version)
+
+
+def _popularity_key(version: str | None) -> tuple[str, str, object]:
+    return ("popularity", "global", version)
+
 
 class BookService:
-    def __init__(self, repo: BooksRepository) -> None:
+    def __init__(
+        self,
+        repo: BooksRepository,
+        cache: SimilarBooksCache | None = None,
+        artifacts: NeighborsArtifactStore | None = None,
+        flights: SingleFlight | None = None,
+        id_filter: BookIdFilterStore | None = None,
+        catalog: CatalogSnapshotStore | None = None,
+        lookup_budget: float = 1.0,
+        last_known_good: LastKnownGood | None = None,
+        catalog_stamp: VersionedSnapshot[str] | None = None,
+    ) -> None:
         self.repo = repo
+        self.cache = cache
+        self.artifacts = artifacts
+        self.flights = flights
+        self.id_filter = id_filter
+        self.catalog = catalog
+        self.lookup_budget = lookup_budget
+        self.last_known_good = last_known_good
+        self.catalog_stamp = catalog_stamp
 
     @validate_call
-    def get_book(self, book_id: BookId) -> BookRead | None:
-        book = self.repo.get_by_id(book_id)
-        if not book:
+    def get_book(self, book_id: BookId, fields: frozenset[str] | None = None) -> BaseModel | None:
+        """
+        Returns the book as `BookRead`, or as a slim model holding only `fields`.
+        """
+        catalog = self._current_catalog()
+        if catalog is not None:
+            return _from_catalog(catalog, book_id, fields)
+        if self._rejects(book_id):
             return None
-        return BookRead.model_validate(book)
+        columns = book_columns(fields)
+        book = self._coalesce(
+            _book_key(book_id, columns),
+            lambda repo: repo.get_by_id(book_id, columns=columns),
+            lambda row: _to_book(row, fields) if row is not None else None,
+        )
+        if book is None:
+            _record_false_positive(self.id_filter)
+        return book
 
     @validate_call
-    def get_books(self, page: int = 1, size: int = 20, genre: str | None = None) -> PaginatedBooks:
-
-        offset = (page - 1) * size
-        items, total = self.repo.list_books(limit=size, offset=offset, genre=genre)
+    def get_books(
+        self,
+        page: int = 1,
+        size: int = 20,
+        genre: str | None = None,
+        cursor: str | None = None,
+        fields: frozenset[str] | None = None,
+    ) -> BaseModel:
+        catalog = self._current_catalog()
+        if catalog is not None:
+            return _catalog_page(catalog, page, size, genre, cursor, fields)
 
-        return PaginatedBooks(
-            items=[BookRead.model_validate(item) for item in items],
-            total=total,
-            page=page,
-            size=size,
+        after_id, offset = _page_position(page, size, genre, cursor)
+        # One extra row tells whether a next page exists without another query.
+        rows = self.repo.list_books(
+            limit=size + 1,
+            offset=offset,
+            genre=genre,
+            after_id=after_id,
+            columns=book_columns(fields),
         )
+        total = self.repo.count_books(genre=genre)
+
+        return _to_page(rows, total, page, size, genre, fields)
+
+    @validate_call
+    def search_books(
+        self, q: str, size: int = 20, cursor: str | None = None
+    ) -> PaginatedBookSearch:
+        after = decode_search_cursor(cursor, q) if cursor else None
+        matches = self.repo.search_books(q, limit=size + 1, after=after)
+        return _to_search_page(matches, q, size)
 
     @validate_call
     def get_similar_books(
@@ -43,73 +269,1209 @@ class BookService:
     ) -> SimilarBooksResponse | None:
         start_time = time.perf_counter()
 
-        # 1. Validate book exists
-        book = self.repo.get_by_id(book_id)
-        if not book:
+        try:
+            artifact, version = self._resolve_source()
+            selection = self._select_similar(book_id, limit, artifact, version)
+        except UNAVAILABLE_ERRORS as exc:
+            selection = _select_last_known_good(
+                self.last_known_good, self.id_filter, book_id, limit, exc
+            )
+        if selection is None:
+            return None
+
+        # Telemetry logging and response
+        with timed("serialize"):
+            return selection.to_response(trace_id, start_time)
+
+    @validate_call
+    def get_similar_books_json(
+        self,
+        book_id: BookId,
+        limit: int,
+        trace_id: str,
+        if_none_match: str | None = None,
+        expand_books: bool = False,
+    ) -> SimilarBooksBody | None:
+        """
+        Returns the serialized `SimilarBooksResponse` body for the similar-books route,
+        or `SimilarBooksExpandedResponse` with the book cards when `expand_books` is set.
+
+        Bodies are cached per (book_id, limit, expand_books) under the current artifact
+        version and only the trace_id is spliced in per request, so a hit skips selection
+        and model serialization entirely. The ETag hashes the body without its trace_id;
+        when it matches `if_none_match` no body is rendered.
+
+        While the database is unavailable (or the circuit breaker is open) the body is
+        built from the last-known-good lists instead, without cards.
+        """
+        start_time = time.perf_counter()
+
+        key = (book_id, limit, expand_books)
+        try:
+            body = self._similar_body(book_id, key)
+        except UNAVAILABLE_ERRORS as exc:
+            body = _last_known_good_body(self.last_known_good, self.id_filter, key, exc)
+        if body is None:
+            return None
+
+        return _render_body(body, trace_id, start_time, if_none_match)
+
+    @validate_call
+    def get_similar_books_batch(
+        self, book_ids: list[BookId], limit: int
+    ) -> SimilarBooksBatchResponse:
+        """
+        Resolves several anchors with one IN query and at most one popularity lookup.
+
+        Each anchor gets the same filtering and fallback as `get_similar_books` and its
+        own trace_id.
+        """
+        start_time = time.perf_counter()
+        anchors = list(dict.fromkeys(book_ids))
+
+        artifact = _current_artifact(self.artifacts)
+        if artifact is not None:
+            selections = _batch_from_artifact(artifact, anchors, limit)
+            unlisted = _unlisted_anchors(anchors, selections)
+            if unlisted:
+                selections += self._select_unlisted(artifact, unlisted, limit)
+            return _to_batch_response(anchors, selections, start_time)
+
+        version = self._recs_version()
+
+        neighbors_by_id, misses = _cached_neighbors_batch(self.cache, version, anchors)
+        if misses:
+            rows = self.repo.get_neighbors_batch(misses)
+            neighbors_by_id.update(
+                _store_neighbors_batch(self.cache, version, rows, self.last_known_good)
+            )
+
+        selections = _select_batch(anchors, limit, neighbors_by_id)
+        if _needs_fallback(selections):
+            _fill_from_popularity(selections, self._load_popularity(version))
+
+        return _to_batch_response(anchors, selections, start_time)
+
+    def catalog_etag(self, *request: object) -> str | None:
+        """
+        Returns the ETag of the catalog response for `request` (the route and its
+        parameters), derived from the catalog version without loading the response, or
+        None when there is no version to derive it from.
+        """
+        return _catalog_etag(self._catalog_version(), request)
+
+    def warm(self, hot_anchors: int = 0, limit: int = 20) -> int:
+        """
+        Primes the catalog snapshot, the book id filter, the recs version, the popularity
+        list and, for the `hot_anchors` most popular books, the cached similar-books
+        response at `limit`. Returns how many anchors were primed; nothing is logged or
+        counted as a served request.
+        """
+        self._current_catalog()
+        self._current_filter()
+        artifact, version = self._resolve_source()
+        popularity = artifact.popularity if artifact is not None else self._load_popularity(version)
+        anchors = _hot_anchors(popularity, hot_anchors)
+        for book_id in anchors:
+            key = (book_id, limit, False)
+            if _cached_response(self.cache, version, key) is not None:
+                continue
+            selection = self._select_similar(book_id, limit, artifact, version)
+            if selection is not None:
+                _store_response(self.cache, version, key, selection)
+        return len(anchors)
+
+    def _catalog_version(self) -> str | None:
+        """
+        The catalog version that catalog responses are validated against: the snapshot's
+        when one serves them, so a validator never runs ahead of the content it tags.
+        """
+        if self.catalog is not None:
+            self._current_catalog()
+            return self.catalog.version
+        stamp = self.catalog_stamp
+        if stamp is None:
+            return None
+        version = stamp.fresh()
+        if version is None:
+            version = self.repo.get_catalog_version()
+            stamp.install(version, version)
+        return version
+
+    def _similar_body(
+        self, book_id: BookId, key: tuple[str, int, bool]
+    ) -> CachedSimilarResponse | None:
+        _, limit, expand_books = key
+        artifact, version = self._resolve_source()
+        body = _cached_response(self.cache, version, key)
+        if body is not None:
+            return body
+        selection = self._select_similar(book_id, limit, artifact, version)
+        if selection is None:
+            return None
+        if expand_books:
+            with timed("cards"):
+                cards = self.repo.get_book_cards(book_id, selection.result_ids)
+            selection.attach_cards(cards)
+        with timed("serialize"):
+            return _store_response(self.cache, version, key, selection)
+
+    def _resolve_source(self) -> tuple[NeighborsArtifact | None, str | None]:
+        artifact = _current_artifact(self.artifacts)
+        if artifact is not None:
+            return artifact, _artifact_version(artifact)
+        with timed("db"):
+            version = self._recs_version()
+        return None, version
+
+    def _recs_version(self) -> str | None:
+        if self.cache is None:
+            return None
+        version = self.cache.fresh_version()
+        if version is None:
+            version = self.repo.get_recs_version()
+            self.cache.record_version(version)
+        return version
+
+    def _select_similar(
+        self,
+        book_id: BookId,
+        limit: int,
+        artifact: NeighborsArtifact | None,
+        version: str | None,
+    ) -> "_SimilarSelection | None":
+        if artifact is not None:
+            with timed("artifact"):
+                selection = _select_from_artifact(artifact, book_id, limit)
+            if selection is not None:
+                return selection
+            unlisted = self._select_unlisted(artifact, [book_id], limit)
+            return unlisted[0] if unlisted else None
+
+        # 1. Validate book exists and fetch similarities (single round trip on a cache miss)
+        with timed("db"):
+            loaded = self._load_neighbors(book_id, version)
+        if loaded is None:
+            return None
+
+        # 2. Filter out anchor book and duplicates
+        selection = _select_loaded(book_id, limit, loaded)
+
+        # 3. Fallback to popularity if needed
+        if selection.needs_fallback:
+            with timed("fallback"):
+                popularity = (
+                    loaded.popularity if loaded.with_popularity else self._load_popularity(version)
+                )
+                selection.fill_from(popularity)
+
+        return selection
+
+    def _select_unlisted(
+        self, artifact: NeighborsArtifact, anchors: Sequence[BookId], limit: int
+    ) -> "list[_SimilarSelection]":
+        """
+        Selections for anchors missing from the artifact (books imported since it was
+        built): those the catalog holds get the artifact's popularity list, like a book
+        without neighbors on the database path; the others are not found.
+        """
+        candidates = [anchor for anchor in anchors if not self._rejects(anchor)]
+        if not candidates:
+            return []
+        version = _artifact_version(artifact)
+        known = _known_unlisted(self.artifacts, version, candidates)
+        unknown = [anchor for anchor in candidates if anchor not in known]
+        if unknown:
+            # Only tells which anchors exist; their stored neighbors may be newer than
+            # the artifact and are not mixed into its responses.
+            with timed("db"):
+                found = self.repo.get_neighbors_batch(unknown)
+            known.update(_store_unlisted(self.artifacts, version, unknown, found.keys()))
+        return _select_existing(artifact, candidates, known, limit, self.id_filter)
+
+    def _load_neighbors(self, book_id: BookId, version: str | None) -> "_LoadedNeighbors | None":
+        """
+        Returns the anchor's neighbors and, when it came with them, the popularity list.
+
+        A cache hit comes without the popularity list, so the caller only resolves it
+        when the neighbors do not fill the requested limit. The lookup gets
+        `lookup_budget` of the request's remaining deadline; when it runs out the
+        result is degraded and the response is served from the popularity list.
+        """
+        cached = _cached_neighbors(self.cache, version, book_id)
+        if cached is not None:
+            return _LoadedNeighbors(cached)
+        if self._rejects(book_id):
+            return None
+
+        try:
+            with narrowed(self.lookup_budget):
+                lookup = self._coalesce(
+                    _similar_key(book_id, version),
+                    lambda repo: repo.get_similar_lookup(book_id),
+                    _as_is,
+                )
+        except DeadlineExceeded:
+            _log_degraded(book_id)
+            return _LoadedNeighbors(_NO_NEIGHBORS, degraded=True)
+        if lookup is None:
+            _record_false_positive(self.id_filter)
+            return None
+        return _store_lookup(self.cache, version, book_id, lookup, self.last_known_good)
+
+    def _refreshed(
+        self, holder: VersionedSnapshot[V], load: Callable[[], V], force: bool = False
+    ) -> V:
+        """
+        Returns the catalog-derived value in `holder`, rebuilding it with `load` when the
+        catalog version changed since it was built. `force` checks the version even when
+        the holder is not due for a check.
+        """
+        value = None if force else holder.fresh()
+        if value is None:
+            version = self.repo.get_catalog_version()
+            value = holder.record_version(version)
+            if value is None:
+                value = holder.install(version, load())
+        return value
+
+    def _current_catalog(self) -> CatalogSnapshot | None:
+        if self.catalog is None:
+            return None
+        return self._refreshed(self.catalog, lambda: CatalogSnapshot(self.repo.get_catalog_rows()))
+
+    def _current_filter(self, force: bool = False) -> BloomFilter | None:
+        id_filter = self.id_filter
+        if id_filter is None:
+            return None
+        return self._refreshed(id_filter, lambda: id_filter.build(self.repo.get_book_ids()), force)
+
+    def _rejects(self, book_id: BookId) -> bool:
+        """
+        True when the id filter shows the book cannot exist, so no lookup is needed.
+
+        A filter built before the book was imported would reject it until the next
+        scheduled check, so a miss re-checks the catalog version first unless it was
+        checked within the filter's `miss_recheck_seconds`.
+        """
+        id_filter = self.id_filter
+        bloom = self._current_filter()
+        if id_filter is None or bloom is None or book_id in bloom:
+            return False
+        if _due_for_miss_recheck(id_filter):
+            bloom = self._current_filter(force=True)
+            if bloom is None or book_id in bloom:
+                return False
+        id_filter.record_rejection()
+        return True
+
+    def _load_popularity(self, version: str | None) -> CachedPopularity | None:
+        cached = _cached_popularity(self.cache, version)
+        if cached is not None:
+            return cached
+        popularity = self._coalesce(
+            _popularity_key(version),
+            lambda repo: repo.get_popularity(scope="global"),
+            _to_cached_popularity,
+        )
+        return _store_popularity(self.cache, version, popularity, self.last_known_good)
+
+    def _coalesce(
+        self, key: Hashable, read: Callable[[BooksRepository], R], detach: Callable[[R], T]
+    ) -> T:
+        """
+        Runs `read`, sharing one in-flight call with concurrent requests for `key`.
+
+        The leader reads on its own session and the result reaches requests that do not
+        own it, so `detach` turns it into plain values (no ORM instances) first. A
+        follower waits for it no longer than its own deadline; when the leader's shorter
+        deadline ran out first, the follower reads alone with the time it has left.
+        """
+        if self.flights is None:
+            return detach(read(self.repo))
+
+        led = False
+
+        def fetch() -> T:
+            nonlocal led
+            led = True
+            return detach(read(self.repo))
+
+        try:
+            return self.flights.do(key, fetch, timeout=remaining())
+        except DeadlineExceeded:
+            if led or _expired():
+                raise
+        return detach(read(self.repo))
+
+
+class AsyncBookService:
+    """
+    Async counterpart of BookService backed by AsyncBooksRepository.
+
+    Shares the selection, fallback and telemetry helpers with the sync service so both
+    stacks return identical responses.
+    """
+
+    def __init__(
+        self,
+        repo: AsyncBooksRepository,
+        cache: SimilarBooksCache | None = None,
+        artifacts: NeighborsArtifactStore | None = None,
+        flights: AsyncSingleFlight | None = None,
+        id_filter: BookIdFilterStore | None = None,
+        catalog: CatalogSnapshotStore | None = None,
+        lookup_budget: float = 1.0,
+        last_known_good: LastKnownGood | None = None,
+        catalog_stamp: VersionedSnapshot[str] | None = None,
+    ) -> None:
+        self.repo = repo
+        self.cache = cache
+        self.artifacts = artifacts
+        self.flights = flights
+        self.id_filter = id_filter
+        self.catalog = catalog
+        self.lookup_budget = lookup_budget
+        self.last_known_good = last_known_good
+        self.catalog_stamp = catalog_stamp
+
+    @validate_call
+    async def get_book(
+        self, book_id: BookId, fields: frozenset[str] | None = None
+    ) -> BaseModel | None:
+        catalog = await self._current_catalog()
+        if catalog is not None:
+            return _from_catalog(catalog, book_id, fields)
+        if await self._rejects(book_id):
+            return None
+        columns = book_columns(fields)
+        book = await self._coalesce(
+            _book_key(book_id, columns),
+            lambda repo: repo.get_by_id(book_id, columns=columns),
+            lambda row: _to_book(row, fields) if row is not None else None,
+        )
+        if book is None:
+            _record_false_positive(self.id_filter)
+        return book
+
+    @validate_call
+    async def get_books(
+        self,
+        page: int = 1,
+        size: int = 20,
+        genre: str | None = None,
+        cursor: str | None = None,
+        fields: frozenset[str] | None = None,
+    ) -> BaseModel:
+        catalog = await self._current_catalog()
+        if catalog is not None:
+            return _catalog_page(catalog, page, size, genre, cursor, fields)
+
+        after_id, offset = _page_position(page, size, genre, cursor)
+        rows = await self.repo.list_books(
+            limit=size + 1,
+            offset=offset,
+            genre=genre,
+            after_id=after_id,
+            columns=book_columns(fields),
+        )
+        total = await self.repo.count_books(genre=genre)
+
+        return _to_page(rows, total, page, size, genre, fields)
+
+    @validate_call
+    async def search_books(
+        self, q: str, size: int = 20, cursor: str | None = None
+    ) -> PaginatedBookSearch:
+        after = decode_search_cursor(cursor, q) if cursor else None
+        matches = await self.repo.search_books(q, limit=size + 1, after=after)
+        return _to_search_page(matches, q, size)
+
+    @validate_call
+    async def get_similar_books(
+        self, book_id: BookId, limit: int, trace_id: str
+    ) -> SimilarBooksResponse | None:
+        start_time = time.perf_counter()
+
+        try:
+            artifact, version = await self._resolve_source()
+            selection = await self._select_similar(book_id, limit, artifact, version)
+        except UNAVAILABLE_ERRORS as exc:
+            selection = _select_last_known_good(
+                self.last_known_good, self.id_filter, book_id, limit, exc
+            )
+        if selection is None:
+            return None
+
+        with timed("serialize"):
+            return selection.to_response(trace_id, start_time)
+
+    @validate_call
+    async def get_similar_books_json(
+        self,
+        book_id: BookId,
+        limit: int,
+        trace_id: str,
+        if_none_match: str | None = None,
+        expand_books: bool = False,
+    ) -> SimilarBooksBody | None:
+        start_time = time.perf_counter()
+
+        key = (book_id, limit, expand_books)
+        try:
+            body = await self._similar_body(book_id, key)
+        except UNAVAILABLE_ERRORS as exc:
+            body = _last_known_good_body(self.last_known_good, self.id_filter, key, exc)
+        if body is None:
+            return None
+
+        return _render_body(body, trace_id, start_time, if_none_match)
+
+    @validate_call
+    async def get_similar_books_batch(
+        self, book_ids: list[BookId], limit: int
+    ) -> SimilarBooksBatchResponse:
+        start_time = time.perf_counter()
+        anchors = list(dict.fromkeys(book_ids))
+
+        artifact = _current_artifact(self.artifacts)
+        if artifact is not None:
+            selections = _batch_from_artifact(artifact, anchors, limit)
+            unlisted = _unlisted_anchors(anchors, selections)
+            if unlisted:
+                selections += await self._select_unlisted(artifact, unlisted, limit)
+            return _to_batch_response(anchors, selections, start_time)
+
+        version = await self._recs_version()
+
+        neighbors_by_id, misses = _cached_neighbors_batch(self.cache, version, anchors)
+        if misses:
+            rows = await self.repo.get_neighbors_batch(misses)
+            neighbors_by_id.update(
+                _store_neighbors_batch(self.cache, version, rows, self.last_known_good)
+            )
+
+        selections = _select_batch(anchors, limit, neighbors_by_id)
+        if _needs_fallback(selections):
+            _fill_from_popularity(selections, await self._load_popularity(version))
+
+        return _to_batch_response(anchors, selections, start_time)
+
+    async def catalog_etag(self, *request: object) -> str | None:
+        return _catalog_etag(await self._catalog_version(), request)
+
+    async def warm(self, hot_anchors: int = 0, limit: int = 20) -> int:
+        await self._current_catalog()
+        await self._current_filter()
+        artifact, version = await self._resolve_source()
+        if artifact is not None:
+            popularity: CachedPopularity | None = artifact.popularity
+        else:
+            popularity = await self._load_popularity(version)
+        anchors = _hot_anchors(popularity, hot_anchors)
+        for book_id in anchors:
+            key = (book_id, limit, False)
+            if _cached_response(self.cache, version, key) is not None:
+                continue
+            selection = await self._select_similar(book_id, limit, artifact, version)
+            if selection is not None:
+                _store_response(self.cache, version, key, selection)
+        return len(anchors)
+
+    async def _catalog_version(self) -> str | None:
+        if self.catalog is not None:
+            await self._current_catalog()
+            return self.catalog.version
+        stamp = self.catalog_stamp
+        if stamp is None:
+            return None
+        version = stamp.fresh()
+        if version is None:
+            version = await self.repo.get_catalog_version()
+            stamp.install(version, version)
+        return version
+
+    async def _similar_body(
+        self, book_id: BookId, key: tuple[str, int, bool]
+    ) -> CachedSimilarResponse | None:
+        _, limit, expand_books = key
+        artifact, version = await self._resolve_source()
+        body = _cached_response(self.cache, version, key)
+        if body is not None:
+            return body
+        selection = await self._select_similar(book_id, limit, artifact, version)
+        if selection is None:
             return None
+        if expand_books:
+            with timed("cards"):
+                cards = await self.repo.get_book_cards(book_id, selection.result_ids)
+            selection.attach_cards(cards)
+        with timed("serialize"):
+            return _store_response(self.cache, version, key, selection)
+
+    async def _resolve_source(self) -> tuple[NeighborsArtifact | None, str | None]:
+        artifact = _current_artifact(self.artifacts)
+        if artifact is not None:
+            return artifact, _artifact_version(artifact)
+        with timed("db"):
+            version = await self._recs_version()
+        return None, version
+
+    async def _recs_version(self) -> str | None:
+        if self.cache is None:
+            return None
+        version = self.cache.fresh_version()
+        if version is None:
+            version = await self.repo.get_recs_version()
+            self.cache.record_version(version)
+        return version
+
+    async def _select_similar(
+        self,
+        book_id: BookId,
+        limit: int,
+        artifact: NeighborsArtifact | None,
+        version: str | None,
+    ) -> "_SimilarSelection | None":
+        if artifact is not None:
+            with timed("artifact"):
+                selection = _select_from_artifact(artifact, book_id, limit)
+            if selection is not None:
+                return selection
+            unlisted = await self._select_unlisted(artifact, [book_id], limit)
+            return unlisted[0] if unlisted else None
+
+        with timed("db"):
+            loaded = await self._load_neighbors(book_id, version)
+        if loaded is None:
+            return None
+
+        selection = _select_loaded(book_id, limit, loaded)
+
+        if selection.needs_fallback:
+            with timed("fallback"):
+                popularity = (
+                    loaded.popularity
+                    if loaded.with_popularity
+                    else await self._load_popularity(version)
+                )
+                selection.fill_from(popularity)
+
+        return selection
+
+    async def _select_unlisted(
+        self, artifact: NeighborsArtifact, anchors: Sequence[BookId], limit: int
+    ) -> "list[_SimilarSelection]":
+        candidates = [anchor for anchor in anchors if not await self._rejects(anchor)]
+        if not candidates:
+            return []
+        version = _artifact_version(artifact)
+        known = _known_unlisted(self.artifacts, version, candidates)
+        unknown = [anchor for anchor in candidates if anchor not in known]
+        if unknown:
+            with timed("db"):
+                found = await self.repo.get_neighbors_batch(unknown)
+            known.update(_store_unlisted(self.artifacts, version, unknown, found.keys()))
+        return _select_existing(artifact, candidates, known, limit, self.id_filter)
+
+    async def _load_neighbors(
+        self, book_id: BookId, version: str | None
+    ) -> "_LoadedNeighbors | None":
+        cached = _cached_neighbors(self.cache, version, book_id)
+        if cached is not None:
+            return _LoadedNeighbors(cached)
+        if await self._rejects(book_id):
+            return None
+
+        try:
+            with narrowed(self.lookup_budget):
+                lookup = await self._coalesce(
+                    _similar_key(book_id, version),
+                    lambda repo: repo.get_similar_lookup(book_id),
+                    _as_is,
+                )
+        except DeadlineExceeded:
+            _log_degraded(book_id)
+            return _LoadedNeighbors(_NO_NEIGHBORS, degraded=True)
+        if lookup is None:
+            _record_false_positive(self.id_filter)
+            return None
+        return _store_lookup(self.cache, version, book_id, lookup, self.last_known_good)
+
+    async def _refreshed(
+        self, holder: VersionedSnapshot[V], load: Callable[[], Awaitable[V]], force: bool = False
+    ) -> V:
+        value = None if force else holder.fresh()
+        if value is None:
+            version = await self.repo.get_catalog_version()
+            value = holder.record_version(version)
+            if value is None:
+                value = holder.install(version, await load())
+        return value
+
+    async def _current_catalog(self) -> CatalogSnapshot | None:
+        if self.catalog is None:
+            return None
+
+        async def load() -> CatalogSnapshot:
+            return CatalogSnapshot(await self.repo.get_catalog_rows())
+
+        return await self._refreshed(self.catalog, load)
+
+    async def _current_filter(self, force: bool = False) -> BloomFilter | None:
+        id_filter = self.id_filter
+        if id_filter is None:
+            return None
+
+        async def load() -> BloomFilter:
+            return id_filter.build(await self.repo.get_book_ids())
+
+        return await self._refreshed(id_filter, load, force)
 
-        # 2. Fetch similarities
-        similarities = self.repo.get_similarities(book_id)
-        neighbor_ids: list[str] = similarities.neighbor_ids if similarities else []
-        algo_id = similarities.algo_id if similarities else None
-        recs_version = similarities.recs_version if similarities else None
+    async def _rejects(self, book_id: BookId) -> bool:
+        id_filter = self.id_filter
+        bloom = await self._current_filter()
+        if id_filter is None or bloom is None or book_id in bloom:
+            return False
+        if _due_for_miss_recheck(id_filter):
+            bloom = await self._current_filter(force=True)
+            if bloom is None or book_id in bloom:
+                return False
+        id_filter.record_rejection()
+        return True
 
-        # Filter out anchor book and duplicates
-        seen = {book_id}
-        filtered_neighbors = []
+    async def _load_popularity(self, version: str | None) -> CachedPopularity | None:
+        cached = _cached_popularity(self.cache, version)
+        if cached is not None:
+            return cached
+        popularity = await self._coalesce(
+            _popularity_key(version),
+            lambda repo: repo.get_popularity(scope="global"),
+            _to_cached_popularity,
+        )
+        return _store_popularity(self.cache, version, popularity, self.last_known_good)
+
+    async def _coalesce(
+        self,
+        key: Hashable,
+        read: Callable[[AsyncBooksRepository], Awaitable[R]],
+        detach: Callable[[R], T],
+    ) -> T:
+        if self.flights is None:
+            return detach(await read(self.repo))
+
+        led = False
+
+        async def fetch() -> T:
+            nonlocal led
+            led = True
+            return detach(await read(self.repo))
+
+        try:
+            return await self.flights.do(key, fetch, timeout=remaining())
+        except DeadlineExceeded:
+            if led or _expired():
+                raise
+        return detach(await read(self.repo))
+
+
+def _as_is(value: V) -> V:
+    return value
+
+
+def _expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+@dataclass(frozen=True, slots=True)
+class _LoadedNeighbors:
+    """
+    An anchor's neighbors and, when the lookup returned it with them, the popularity
+    list. `degraded` marks a lookup that ran out of its deadline budget.
+    """
+
+    neighbors: CachedNeighbors
+    popularity: CachedPopularity | None = None
+    with_popularity: bool = False
+    degraded: bool = False
+
+
+@dataclass
+class _SimilarSelection:
+    """
+    Accumulates the ordered, de-duplicated result list for one similar-books request.
+    """
+
+    book_id: BookId
+    limit: int
+    algo_id: str | None
+    recs_version: str | None
+    result_ids: list[str] = field(default_factory=list)
+    seen: set[str] = field(default_factory=set)
+    neighbors_count: int = 0
+    fallback_count: int = 0
+    cards: list[dict[str, str | None]] | None = None
+    degraded: bool = False
+
+    @classmethod
+    def from_neighbors(
+        cls, book_id: BookId, limit: int, neighbors: CachedNeighbors
+    ) -> "_SimilarSelection":
+        selection = cls(
+            book_id=book_id,
+            limit=limit,
+            algo_id=neighbors.algo_id,
+            recs_version=neighbors.recs_version,
+            seen={book_id},
+        )
         if limit > 0:
-            for nid in neighbor_ids:
-                if nid not in seen:
-                    seen.add(BookId(nid))
-                    filtered_neighbors.append(nid)
-                    if len(filtered_neighbors) >= limit:
+            for nid in neighbors.neighbor_ids:
+                if nid not in selection.seen:
+                    selection.seen.add(BookId(nid))
+                    selection.result_ids.append(nid)
+                    if len(selection.result_ids) >= limit:
                         break
 
-        neighbors_count = len(filtered_neighbors)
-        result_ids = filtered_neighbors.copy()
+        selection.neighbors_count = len(selection.result_ids)
+        return selection
 
-        # 3. Fallback to popularity if needed
-        fallback_count = 0
-        if len(result_ids) < limit:
-            popularity = self.repo.get_popularity(scope="global")
-            if popularity and popularity.book_ids:
-                if not recs_version:
-                    recs_version = popularity.recs_version
-                for pid in popularity.book_ids:
-                    if pid not in seen:
-                        seen.add(BookId(pid))
-                        result_ids.append(pid)
-                        fallback_count += 1
-                        if len(result_ids) >= limit:
-                            break
-
-        latency_ms = int((time.perf_counter() - start_time) * 1000)
-
-        # 4. Telemetry logging
-        log_event = {
-            "event_name": "similar_request",
-            "ts": datetime.utcnow().isoformat() + "Z",
-            "request_id": trace_id,
-            "anchor_book_id": book_id,
-            "limit": limit,
-            "returned_count": len(result_ids),
-            "neighbors_count": neighbors_count,
-            "fallback_count": fallback_count,
-            "latency_ms": latency_ms,
-            "status_code": 200,
+    @property
+    def needs_fallback(self) -> bool:
+        return len(self.result_ids) < self.limit
+
+    def fill_from(self, popularity: CachedPopularity | None) -> None:
+        if not popularity or not popularity.book_ids:
+            return
+
+        if not self.recs_version:
+            self.recs_version = popularity.recs_version
+        for pid in popularity.book_ids:
+            if pid not in self.seen:
+                self.seen.add(BookId(pid))
+                self.result_ids.append(pid)
+                self.fallback_count += 1
+                if len(self.result_ids) >= self.limit:
+                    break
+
+    def attach_cards(self, cards_by_id: dict[str, dict[str, str | None]]) -> None:
+        """
+        Orders the looked-up cards like `result_ids`; ids without a card are skipped.
+        """
+        self.cards = [cards_by_id[nid] for nid in self.result_ids if nid in cards_by_id]
+
+    def log_fields(self) -> dict[str, object]:
+        fields: dict[str, object] = {
+            "anchor_book_id": self.book_id,
+            "limit": self.limit,
+            "returned_count": len(self.result_ids),
+            "neighbors_count": self.neighbors_count,
+            "fallback_count": self.fallback_count,
         }
-        if algo_id:
-            log_event["algo_id"] = algo_id
-        if recs_version:
-            log_event["recs_version"] = recs_version
+        if self.algo_id:
+            fields["algo_id"] = self.algo_id
+        if self.recs_version:
+            fields["recs_version"] = self.recs_version
+        if self.degraded:
+            fields["degraded"] = True
+        return fields
 
-        # Output telemetry event as JSON
-        logger.info("TELEMETRY: %s", json.dumps(log_event))
+    def to_response(self, trace_id: str, start_time: float) -> SimilarBooksResponse:
+        _log_similar_request(trace_id, start_time, self.log_fields())
+        return self.build_response(trace_id)
 
-        return SimilarBooksResponse(
-            book_id=BookId(book_id),
-            similar_book_ids=[BookId(nid) for nid in result_ids],
+    def build_response(self, trace_id: str) -> SimilarBooksResponse:
+        response = SimilarBooksResponse(
+            book_id=BookId(self.book_id),
+            similar_book_ids=[BookId(nid) for nid in self.result_ids],
             trace_id=trace_id,
-            algo_id=AlgoId(algo_id) if algo_id else AlgoId("unknown"),
-            recs_version=RecsVersion(recs_version) if recs_version else RecsVersion("unknown"),
+            algo_id=AlgoId(self.algo_id) if self.algo_id else AlgoId("unknown"),
+            recs_version=(
+                RecsVersion(self.recs_version) if self.recs_version else RecsVersion("unknown")
+            ),
+        )
+        if self.cards is None:
+            return response
+        return SimilarBooksExpandedResponse(
+            **dict(response),
+            books=[BookCard.model_validate(card) for card in self.cards],
+        )
+
+
+def _log_similar_request(
+    trace_id: str, start_time: float, fields: dict[str, object], status_code: int = 200
+) -> None:
+    latency_ms = int((time.perf_counter() - start_time) * 1000)
+
+    log_event = {
+        "event_name": "similar_request",
+        "ts": datetime.utcnow().isoformat() + "Z",
+        "request_id": trace_id,
+        **fields,
+        "latency_ms": latency_ms,
+        "status_code": status_code,
+    }
+
+    # Output telemetry event as JSON
+    logger.info("TELEMETRY: %s", json.dumps(log_event))
+
+    similar_requests.inc()
+    if fields.get("fallback_count"):
+        similar_fallback_requests.inc()
+    if fields.get("degraded"):
+        similar_degraded_requests.inc()
+    neighbors_count = fields.get("neighbors_count")
+    if isinstance(neighbors_count, int):
+        similar_neighbors_count.observe(neighbors_count)
+
+
+def _select_last_known_good(
+    last_known_good: LastKnownGood | None,
+    id_filter: BookIdFilterStore | None,
+    book_id: BookId,
+    limit: int,
+    error: Exception,
+) -> _SimilarSelection | None:
+    """
+    Builds the selection from the anchor's last-known-good neighbors and popularity list,
+    tagged with `DEGRADED_ALGO_ID`. Returns None for an id the current id filter rejects.
+    Re-raises `error` when nothing was ever loaded to serve from, or when the anchor has
+    no kept neighbors and there is no id filter to tell whether it exists: popularity
+    alone would answer 200 for any id.
+    """
+    neighbors = last_known_good.neighbors(book_id) if last_known_good is not None else None
+    popularity = last_known_good.popularity if last_known_good is not None else None
+    if neighbors is None and popularity is None:
+        raise error
+    bloom = id_filter.current if id_filter is not None else None
+    if bloom is not None and book_id not in bloom:
+        return None
+    if bloom is None and neighbors is None:
+        raise error
+
+    logger.warning(
+        "similar_served_from_last_known_good",
+        extra={"anchor_book_id": book_id, "error": type(error).__name__},
+    )
+    selection = _SimilarSelection.from_neighbors(book_id, limit, neighbors or _NO_NEIGHBORS)
+    selection.algo_id = DEGRADED_ALGO_ID
+    selection.degraded = True
+    if selection.needs_fallback:
+        selection.fill_from(popularity)
+    return selection
+
+
+def _last_known_good_body(
+    last_known_good: LastKnownGood | None,
+    id_filter: BookIdFilterStore | None,
+    key: tuple[str, int, bool],
+    error: Exception,
+) -> CachedSimilarResponse | None:
+    book_id, limit, expand_books = key
+    selection = _select_last_known_good(last_known_good, id_filter, BookId(book_id), limit, error)
+    if selection is None:
+        return None
+    # Cards are read from the database: with `expand_books` the degraded shelf is sent
+    # without `books` rather than with an empty list.
+    with timed("serialize"):
+        return _store_response(None, None, key, selection)
+
+
+def _select_loaded(book_id: BookId, limit: int, loaded: _LoadedNeighbors) -> _SimilarSelection:
+    selection = _SimilarSelection.from_neighbors(book_id, limit, loaded.neighbors)
+    selection.degraded = loaded.degraded
+    return selection
+
+
+def _known_unlisted(
+    artifacts: NeighborsArtifactStore | None, version: str, anchors: Sequence[BookId]
+) -> dict[str, bool]:
+    """
+    Catalog existence of the artifact-unlisted `anchors` already read under `version`.
+    """
+    if artifacts is None:
+        return {}
+    known: dict[str, bool] = {}
+    for anchor in anchors:
+        exists = artifacts.unlisted.get(version, anchor)
+        if exists is not None:
+            known[anchor] = exists
+    return known
+
+
+def _store_unlisted(
+    artifacts: NeighborsArtifactStore | None,
+    version: str,
+    anchors: Sequence[BookId],
+    existing: Collection[str],
+) -> dict[str, bool]:
+    read: dict[str, bool] = {anchor: anchor in existing for anchor in anchors}
+    if artifacts is not None:
+        for anchor, exists in read.items():
+            artifacts.unlisted.put(version, anchor, exists)
+    return read
+
+
+def _select_existing(
+    artifact: NeighborsArtifact,
+    candidates: Sequence[BookId],
+    existing: Mapping[str, bool],
+    limit: int,
+    id_filter: BookIdFilterStore | None,
+) -> list[_SimilarSelection]:
+    selections = []
+    for anchor in candidates:
+        if not existing[anchor]:
+            _record_false_positive(id_filter)
+            continue
+        selection = _SimilarSelection.from_neighbors(anchor, limit, _NO_NEIGHBORS)
+        selection.fill_from(artifact.popularity)
+        selections.append(selection)
+    return selections
+
+
+def _unlisted_anchors(
+    anchors: Sequence[BookId], selections: Sequence[_SimilarSelection]
+) -> list[BookId]:
+    listed = {selection.book_id for selection in selections}
+    return [anchor for anchor in anchors if anchor not in listed]
+
+
+def _needs_fallback(selections: Sequence[_SimilarSelection]) -> bool:
+    return any(selection.needs_fallback for selection in selections)
+
+
+def _fill_from_popularity(
+    selections: Sequence[_SimilarSelection], popularity: CachedPopularity | None
+) -> None:
+    for selection in selections:
+        if selection.needs_fallback:
+            selection.fill_from(popularity)
+
+
+def _hot_anchors(popularity: CachedPopularity | None, count: int) -> list[BookId]:
+    return [BookId(book_id) for book_id in popularity.book_ids[:count]] if popularity else []
+
+
+def _due_for_miss_recheck(id_filter: BookIdFilterStore) -> bool:
+    return not id_filter.checked_within(id_filter.miss_recheck_seconds)
+
+
+def _log_degraded(book_id: BookId) -> None:
+    logger.warning("similar_lookup_deadline_exceeded", extra={"anchor_book_id": book_id})
+
+
+def _record_false_positive(id_filter: BookIdFilterStore | None) -> None:
+    # The lookup only ran because the filter let the id through.
+    if id_filter is not None:
+        id_filter.record_false_positive()
+
+
+def _current_artifact(artifacts: NeighborsArtifactStore | None) -> NeighborsArtifact | None:
+    return artifacts.current() if artifacts is not None else None
+
+
+def _artifact_version(artifact: NeighborsArtifact) -> str:
+    return f"artifact:{artifact.recs_version}|{artifact.popularity.recs_version or ''}"
+
+
+def _select_from_artifact(
+    artifact: NeighborsArtifact, book_id: BookId, limit: int
+) -> _SimilarSelection | None:
+    neighbors = artifact.get_neighbors(book_id)
+    if neighbors is None:
+        return None
+
+    selection = _SimilarSelection.from_neighbors(book_id, limit, neighbors)
+    if selection.needs_fallback:
+        selection.fill_from(artifact.popularity)
+    return selection
+
+
+def _batch_from_artifact(
+    artifact: NeighborsArtifact, anchors: Sequence[BookId], limit: int
+) -> list[_SimilarSelection]:
+    neighbors_by_id: dict[str, CachedNeighbors] = {}
+    for anchor in anchors:
+        neighbors = artifact.get_neighbors(anchor)
+        if neighbors is not None:
+            neighbors_by_id[anchor] = neighbors
+
+    selections = _select_batch(anchors, limit, neighbors_by_id)
+    _fill_from_popularity(selections, artifact.popularity)
+    return selections
+
+
+def _cached_neighbors(
+    cache: SimilarBooksCache | None, version: str | None, book_id: BookId
+) -> CachedNeighbors | None:
+    if cache is None or version is None:
+        return None
+    return cache.neighbors.get(version, book_id)
+
+
+def _cached_popularity(
+    cache: SimilarBooksCache | None, version: str | None
+) -> CachedPopularity | None:
+    if cache is None or version is None:
+        return None
+    return cache.popularity.get(version, "global")
+
+
+def _cached_neighbors_batch(
+    cache: SimilarBooksCache | None, version: str | None, anchors: Sequence[BookId]
+) -> tuple[dict[str, CachedNeighbors], list[BookId]]:
+    found: dict[str, CachedNeighbors] = {}
+    misses: list[BookId] = []
+    for anchor in anchors:
+        cached = _cached_neighbors(cache, version, anchor)
+        if cached is not None:
+            found[anchor] = cached
+        else:
+            misses.append(anchor)
+    return found, misses
+
+
+def _store_neighbors_batch(
+    cache: SimilarBooksCache | None,
+    version: str | None,
+    rows: dict[str, BookNeighbors],
+    last_known_good: LastKnownGood | None = None,
+) -> dict[str, CachedNeighbors]:
+    stored: dict[str, CachedNeighbors] = {}
+    for book_id, row in rows.items():
+        neighbors = CachedNeighbors(
+            neighbor_ids=freeze_book_ids(row.neighbor_ids),
+            algo_id=row.algo_id,
+            recs_version=row.recs_version,
         )
+        if cache is not None and version is not None:
+            cache.neighbors.put(version, book_id, neighbors)
+        if last_known_good is not None:
+            last_known_good.put_neighbors(book_id, neighbors)
+        stored[book_id] = neighbors
+    return stored
+
+
+def _select_batch(
+    anchors: Sequence[BookId], limit: int, neighbors_by_id: dict[str, CachedNeighbors]
+) -> list[_SimilarSelection]:
+    return [
+        _SimilarSelection.from_neighbors(anchor, limit, neighbors_by_id[anchor])
+        for anchor in anchors
+        if anchor in neighbors_by_id
+    ]
+
+
+def _to_batch_response(
+    anchors: Sequence[BookId], selections: Sequence[_SimilarSelection], start_time: float
+) -> SimilarBooksBatchResponse:
+    by_id = {selection.book_id: selection for selection in selections}
+    return SimilarBooksBatchResponse(
+        results=[
+            by_id[anchor].to_response(str(uuid.uuid4()), start_time)
+            for anchor in anchors
+            if anchor in by_id
+        ],
+        not_found=[anchor for anchor in anchors if anchor not in by_id],
+    )
+
+
+def _store_lookup(
+    cache: SimilarBooksCache | None,
+    version: str | None,
+    book_id: BookId,
+    lookup: SimilarBooksLookup,
+    last_known_good: LastKnownGood | None = None,
+) -> _LoadedNeighbors:
+    neighbors = CachedNeighbors(
+        neighbor_ids=freeze_book_ids(lookup.neighbor_ids),
+        algo_id=lookup.algo_id,
+        recs_version=lookup.recs_version,
+    )
+    popularity = (
+        CachedPopularity(
+            book_ids=freeze_book_ids(lookup.popularity_ids),
+            recs_version=lookup.popularity_recs_version,
+        )
+        if lookup.popularity_ids is not None
+        else None
+    )
+    if cache is not None and version is not None:
+        cache.neighbors.put(version, book_id, neighbors)
+        if popularity is not None:
+            cache.popularity.put(version, "global", popularity)
+    if last_known_good is not None:
+        last_known_good.put_neighbors(book_id, neighbors)
+        if popularity is not None:
+            last_known_good.put_popularity(popularity)
+    return _LoadedNeighbors(neighbors, popularity, with_popularity=True)
+
+
+def _cached_response(
+    cache: SimilarBooksCache | None, version: str | None, key: tuple[str, int, bool]
+) -> CachedSimilarResponse | None:
+    if cache is None or cache.responses is None or version is None:
+        return None
+    return cache.responses.get(version, key)
+
+
+def _store_response(
+    cache: SimilarBooksCache | None,
+    version: str | None,
+    key: tuple[str, int, bool],
+    selection: _SimilarSelection,
+) -> CachedSimilarResponse:
+    body = selection.build_response(_TRACE_ID_PLACEHOLDER).model_dump_json().encode("utf-8")
+    prefix, _, suffix = body.partition(_TRACE_ID_PLACEHOLDER_JSON)
+    response = CachedSimilarResponse(
+        prefix=prefix,
+        suffix=suffix,
+        etag=content_etag(prefix, suffix),
+        log_fields=selection.log_fields(),
+    )
+    # A degraded body only reflects this request running out of time.
+    if (
+        cache is not None
+        and cache.responses is not None
+        and version is not None
+        and not selection.degraded
+    ):
+        cache.responses.put(version, key, response)
+    return response
+
+
+def _render_body(
+    body: CachedSimilarResponse, trace_id: str, start_time: float, if_none_match: str | None
+) -> SimilarBooksBody:
+    degraded = bool(body.log_fields.get("degraded"))
+    if etag_matches(if_none_match, body.etag):
+        _log_similar_request(trace_id, start_time, body.log_fields, status_code=304)
+        return SimilarBooksBody(content=None, etag=body.etag, degraded=degraded)
+
+    _log_similar_request(trace_id, start_time, body.log_fields)
+    return SimilarBooksBody(content=body.render(trace_id), etag=body.etag, degraded=degraded)
+
+
+def _to_cached_popularity(popularity: BookPopularity | None) -> CachedPopularity | None:
+    if popularity is None:
+        return None
+    return CachedPopularity(
+        book_ids=freeze_book_ids(popularity.book_ids), recs_version=popularity.recs_version
+    )
+
+
+def _store_popularity(
+    cache: SimilarBooksCache | None,
+    version: str | None,
+    popularity: CachedPopularity | None,
+    last_known_good: LastKnownGood | None = None,
+) -> CachedPopularity | None:
+    if popularity is None:
+        return None
+
+    if cache is not None and version is not None:
+        cache.popularity.put(version, "global", popularity)
+    if last_known_good is not None:
+        last_known_good.put_popularity(popularity)
+    return popularity
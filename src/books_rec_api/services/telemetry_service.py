@@ -2,6 +2,7 @@ import json
 import logging
 from collections.abc import Sequence
 
+from books_rec_api.metrics import telemetry_events_duplicate, telemetry_events_inserted
 from books_rec_api.repositories.telemetry_repository import (
     TelemetryInsertResult,
     TelemetryRepository,
@@ -28,6 +29,8 @@ class TelemetryService:
             # Emit as a structured JSON log that the log shipper will identify
             logger.info("TELEMETRY: %s", json.dumps(event_dict))
 
+        telemetry_events_inserted.inc(insert_result.inserted_count)
+        telemetry_events_duplicate.inc(insert_result.duplicate_count)
         logger.info(
             "Telemetry ingest batch complete inserted=%s duplicates=%s total=%s",
             insert_result.inserted_count,
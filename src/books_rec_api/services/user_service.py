@@ -4,26 +4,27 @@ from pydantic import validate_call
 
 from books_rec_api.domain import ExternalIdpId, InternalUserId
 from books_rec_api.models import User as UserModel
-from books_rec_api.repositories.users_repository import UsersRepository
+from books_rec_api.repositories.users_repository import AsyncUsersRepository, UsersRepository
 from books_rec_api.schemas.user import DomainPreferences, DomainPreferencesUpdate, UserRead
 
 
+def _map_to_schema(user_model: UserModel) -> UserRead:
+    return UserRead(
+        id=InternalUserId(user_model.id),
+        external_idp_id=ExternalIdpId(user_model.external_idp_id),
+        domain_preferences=DomainPreferences(**user_model.domain_preferences),
+    )
+
+
 class UserService:
     def __init__(self, repo: UsersRepository) -> None:
         self.repo = repo
 
-    def _map_to_schema(self, user_model: UserModel) -> UserRead:
-        return UserRead(
-            id=InternalUserId(user_model.id),
-            external_idp_id=ExternalIdpId(user_model.external_idp_id),
-            domain_preferences=DomainPreferences(**user_model.domain_preferences),
-        )
-
     @validate_call
     def get_or_create_shadow_user(self, external_idp_id: ExternalIdpId) -> UserRead:
         existing = self.repo.get_by_external_id(external_idp_id)
         if existing is not None:
-            return self._map_to_schema(existing)
+            return _map_to_schema(existing)
 
         user_id = InternalUserId(f"usr_{uuid4()}")
         new_user = self.repo.create(
@@ -31,7 +32,7 @@ class UserService:
             external_idp_id=external_idp_id,
             domain_preferences=DomainPreferences(),
         )
-        return self._map_to_schema(new_user)
+        return _map_to_schema(new_user)
 
     @validate_call
     def update_preferences(
@@ -40,4 +41,36 @@ class UserService:
         updated_user = self.repo.update_preferences(user_id=user_id, patch=patch)
         if updated_user is None:
             return None
-        return self._map_to_schema(updated_user)
+        return _map_to_schema(updated_user)
+
+
+class AsyncUserService:
+    """
+    Async counterpart of UserService backed by AsyncUsersRepository.
+    """
+
+    def __init__(self, repo: AsyncUsersRepository) -> None:
+        self.repo = repo
+
+    @validate_call
+    async def get_or_create_shadow_user(self, external_idp_id: ExternalIdpId) -> UserRead:
+        existing = await self.repo.get_by_external_id(external_idp_id)
+        if existing is not None:
+            return _map_to_schema(existing)
+
+        user_id = InternalUserId(f"usr_{uuid4()}")
+        new_user = await self.repo.create(
+            id=user_id,
+            external_idp_id=external_idp_id,
+            domain_preferences=DomainPreferences(),
+        )
+        return _map_to_schema(new_user)
+
+    @validate_call
+    async def update_preferences(
+        self, user_id: InternalUserId, patch: DomainPreferencesUpdate
+    ) -> UserRead | None:
+        updated_user = await self.repo.update_preferences(user_id=user_id, patch=patch)
+        if updated_user is None:
+            return None
+        return _map_to_schema(updated_user)
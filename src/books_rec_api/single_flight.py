@@ -0,0 +1,150 @@
+"""
+Request coalescing ("single-flight") for identical concurrent reads.
+
+While a fetch for a key is in flight, every other caller asking for the same key waits
+for it and receives its result (or exception) instead of issuing its own query, so a
+burst of requests for one cold anchor costs a single round trip. Nothing is retained
+once the fetch completes; caching stays the job of `SimilarBooksCache`.
+
+The fetch runs on the leader's resources (its session), and a follower waits at most its
+own `timeout` (what is left of its request deadline) before giving up with
+`DeadlineExceeded`; the fetch itself keeps running for the others.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from books_rec_api.deadline import DeadlineExceeded
+
+V = TypeVar("V")
+
+
+@dataclass(frozen=True, slots=True)
+class SingleFlightStats:
+    name: str
+    leaders: int
+    coalesced: int
+    in_flight: int
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Thread-safe single-flight group for the sync (threadpool) serving stack.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fetch: Callable[[], V], timeout: float | None = None) -> V:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            if not call.done.wait(_wait_seconds(timeout)):
+                raise DeadlineExceeded("Request deadline exceeded waiting for a shared read")
+            if call.error is not None:
+                raise call.error
+            value: V = call.value
+            return value
+
+        try:
+            result = fetch()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        else:
+            call.value = result
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return result
+
+    def stats(self) -> SingleFlightStats:
+        with self._lock:
+            return SingleFlightStats(
+                name=self.name,
+                leaders=self._leaders,
+                coalesced=self._coalesced,
+                in_flight=len(self._calls),
+            )
+
+
+class AsyncSingleFlight:
+    """
+    Single-flight group for the async serving stack.
+
+    The fetch runs as its own task and every caller awaits it through `asyncio.shield`,
+    so a cancelled caller (e.g. a client disconnect) does not cancel the fetch for the
+    callers still waiting on it. A cancelled leader still waits for the fetch before it
+    unwinds, so the session the fetch runs on is not closed under it.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._tasks: dict[Hashable, asyncio.Future[Any]] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    async def do(
+        self, key: Hashable, fetch: Callable[[], Awaitable[V]], timeout: float | None = None
+    ) -> V:
+        task = self._tasks.get(key)
+        if task is not None:
+            self._coalesced += 1
+            try:
+                value: V = await asyncio.wait_for(asyncio.shield(task), _wait_seconds(timeout))
+            except TimeoutError:
+                raise DeadlineExceeded(
+                    "Request deadline exceeded waiting for a shared read"
+                ) from None
+            return value
+
+        task = asyncio.ensure_future(fetch())
+        self._tasks[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        self._leaders += 1
+        try:
+            value = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            await asyncio.wait([task])
+            raise
+        return value
+
+    def _forget(self, key: Hashable, task: asyncio.Future[Any]) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def stats(self) -> SingleFlightStats:
+        return SingleFlightStats(
+            name=self.name,
+            leaders=self._leaders,
+            coalesced=self._coalesced,
+            in_flight=len(self._tasks),
+        )
+
+
+def _wait_seconds(timeout: float | None) -> float | None:
+    return None if timeout is None else max(timeout, 0.0)
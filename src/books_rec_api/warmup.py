@@ -0,0 +1,158 @@
+"""
+Startup warmup run from the application lifespan, and the readiness it reports.
+
+Without it the first requests after a deploy pay for opening pool connections,
+configuring the ORM mappers and loading the recs version and popularity list. The
+lifespan runs the steps in a background task so `GET /healthz/live` answers at once while
+`GET /healthz/ready` returns 503 until every step has succeeded. A failed attempt is
+logged and retried from the first step after `warmup_retry_seconds`.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import AsyncExitStack, ExitStack
+
+from sqlalchemy import Engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import configure_mappers
+
+from books_rec_api import database
+from books_rec_api.config import settings
+from books_rec_api.dependencies.books import (
+    async_book_reads_flights,
+    book_id_filter,
+    book_reads_flights,
+    catalog_snapshot,
+    last_known_good,
+    neighbors_artifact_store,
+    similar_books_cache,
+)
+from books_rec_api.repositories.books_repository import AsyncBooksRepository, BooksRepository
+from books_rec_api.services.book_service import AsyncBookService, BookService
+
+logger = logging.getLogger(__name__)
+
+WarmupStep = tuple[str, Callable[[], Awaitable[object]]]
+
+
+class WarmupState:
+    def __init__(self) -> None:
+        self.ready = False
+        self.attempts = 0
+        self.last_error: str | None = None
+        self.step_seconds: dict[str, float] = {}
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self.last_error = None
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "status": "ready" if self.ready else "warming",
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "steps_ms": {name: round(s * 1000, 3) for name, s in self.step_seconds.items()},
+        }
+
+
+def warm_pool(engine: Engine, connections: int) -> None:
+    """
+    Opens `connections` connections at once, then returns them to the pool idle.
+    """
+    with ExitStack() as stack:
+        for _ in range(connections):
+            stack.enter_context(engine.connect()).execute(text("SELECT 1"))
+
+
+async def warm_async_pool(engine: AsyncEngine, connections: int) -> None:
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            connection = await stack.enter_async_context(engine.connect())
+            await connection.execute(text("SELECT 1"))
+
+
+async def run_warmup(state: WarmupState, steps: Sequence[WarmupStep], retry_seconds: float) -> None:
+    """
+    Runs `steps` in order, retrying the whole sequence until it succeeds once.
+    """
+    while True:
+        state.attempts += 1
+        try:
+            for name, step in steps:
+                start = time.perf_counter()
+                await step()
+                state.step_seconds[name] = time.perf_counter() - start
+        except Exception as exc:
+            state.last_error = f"{type(exc).__name__}: {exc}"
+            logger.warning(
+                "warmup_failed", extra={"attempt": state.attempts, "error": state.last_error}
+            )
+            await asyncio.sleep(retry_seconds)
+            continue
+
+        state.mark_ready()
+        logger.info("warmup_complete", extra=state.snapshot())
+        return
+
+
+def _warm_similar() -> int:
+    session_factory = database.ReplicaSessionLocal or database.SessionLocal
+    with session_factory() as session:
+        service = BookService(
+            repo=BooksRepository(session=session),
+            cache=similar_books_cache,
+            artifacts=neighbors_artifact_store,
+            flights=book_reads_flights,
+            id_filter=book_id_filter,
+            catalog=catalog_snapshot,
+            last_known_good=last_known_good,
+        )
+        return service.warm(settings.warmup_hot_anchors, settings.warmup_similar_limit)
+
+
+async def _warm_similar_async() -> int:
+    session_factory = database.AsyncReplicaSessionLocal or database.AsyncSessionLocal
+    if session_factory is None:
+        raise RuntimeError("Async database stack is disabled; set BOOKS_REC_DB_ASYNC=true")
+    async with session_factory() as session:
+        service = AsyncBookService(
+            repo=AsyncBooksRepository(session=session),
+            cache=similar_books_cache,
+            artifacts=neighbors_artifact_store,
+            flights=async_book_reads_flights,
+            id_filter=book_id_filter,
+            catalog=catalog_snapshot,
+            last_known_good=last_known_good,
+        )
+        return await service.warm(settings.warmup_hot_anchors, settings.warmup_similar_limit)
+
+
+async def _warm_pools() -> None:
+    connections = settings.db_pool_size
+    for engine in (database.engine, database.replica_engine):
+        if engine is not None:
+            await asyncio.to_thread(warm_pool, engine, connections)
+    for async_engine in (database.async_engine, database.async_replica_engine):
+        if async_engine is not None:
+            await warm_async_pool(async_engine, connections)
+
+
+def warmup_steps() -> list[WarmupStep]:
+    """
+    The configured engines' pools, the ORM mappers, then the serving stack's catalog
+    snapshot, book id filter, recs version, popularity list (also kept as the
+    last-known-good fallback) and hot anchors.
+    """
+    warm_similar = (
+        _warm_similar_async if settings.db_async else lambda: asyncio.to_thread(_warm_similar)
+    )
+    return [
+        ("pool", _warm_pools),
+        ("mappers", lambda: asyncio.to_thread(configure_mappers)),
+        ("similar", warm_similar),
+    ]
+
+
+warmup_state = WarmupState()
@@ -1,13 +1,23 @@
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Iterator
 
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy import Engine, create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from books_rec_api.config import settings
 from books_rec_api.database import Base
 from books_rec_api.dependencies.auth import get_external_idp_id
+from books_rec_api.dependencies.books import (
+    book_id_filter,
+    books_breaker,
+    catalog_stamp,
+    last_known_good,
+    similar_books_cache,
+)
 from books_rec_api.main import app
 from books_rec_api.repositories.users_repository import UsersRepository
 from books_rec_api.services.user_service import UserService
@@ -20,6 +30,46 @@ def clear_dependency_overrides() -> Iterator[None]:
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(autouse=True)
+def disable_startup_warmup(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Warmup connects to the configured database; tests bind their own SQLite sessions.
+    monkeypatch.setattr(settings, "warmup_enabled", False)
+
+
+@pytest.fixture(autouse=True)
+def clear_similar_books_cache() -> Iterator[None]:
+    if similar_books_cache is not None:
+        similar_books_cache.clear()
+    yield
+    if similar_books_cache is not None:
+        similar_books_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_book_id_filter() -> Iterator[None]:
+    if book_id_filter is not None:
+        book_id_filter.clear()
+    yield
+    if book_id_filter is not None:
+        book_id_filter.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_stamp() -> Iterator[None]:
+    catalog_stamp.clear()
+    yield
+    catalog_stamp.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_books_breaker() -> Iterator[None]:
+    yield
+    if books_breaker is not None:
+        books_breaker.reset()
+    if last_known_good is not None:
+        last_known_good.clear()
+
+
 @pytest.fixture(scope="session")
 def db_engine() -> Engine:
     engine = create_engine(
@@ -45,6 +95,16 @@ def db_session(db_engine: Engine) -> Iterator[Session]:
         connection.close()
 
 
+@pytest_asyncio.fixture
+async def async_db_session() -> AsyncIterator[AsyncSession]:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
 @pytest.fixture
 def test_external_idp_id() -> str:
     return "auth0|test_user_123"
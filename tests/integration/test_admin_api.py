@@ -0,0 +1,106 @@
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from books_rec_api.config import Settings, settings
+from books_rec_api.dependencies.admin import get_single_flight_groups, get_warmup_state
+from books_rec_api.main import app
+from books_rec_api.single_flight import AsyncSingleFlight, SingleFlight
+from books_rec_api.warmup import WarmupState
+
+
+def test_get_db_pool_stats(client: TestClient):
+    response = client.get("/admin/db-pool")
+
+    assert response.status_code == 200
+    pools = {pool["name"]: pool for pool in response.json()["pools"]}
+    assert "primary" in pools
+    assert pools["primary"]["timeouts"] >= 0
+    assert "checkout_p99_ms" in pools["primary"]
+
+
+def test_get_single_flight_stats(client: TestClient):
+    groups = [SingleFlight("books"), AsyncSingleFlight("books_async")]
+    app.dependency_overrides[get_single_flight_groups] = lambda: groups
+    response = client.get("/admin/single-flight")
+
+    assert response.status_code == 200
+    groups = {group["name"]: group for group in response.json()["groups"]}
+    assert set(groups) == {"books", "books_async"}
+    assert groups["books"]["coalesced"] >= 0
+    assert groups["books"]["in_flight"] == 0
+
+
+def test_get_metrics(client_with_overrides: TestClient, sample_books_and_similarities):
+    assert client_with_overrides.get("/books/book-1/similar?limit=4").status_code == 200
+
+    response = client_with_overrides.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert (
+        'books_rec_http_request_duration_seconds_count{method="GET",'
+        'route="/books/{book_id}/similar",status_code="200"}'
+    ) in body
+    assert "books_rec_similar_fallback_requests_total" in body
+    assert "books_rec_similar_neighbors_count_bucket" in body
+    assert 'books_rec_db_pool_checkouts_total{pool="primary"}' in body
+
+
+def test_readiness_waits_for_warmup_while_liveness_does_not(client: TestClient):
+    state = WarmupState()
+    app.dependency_overrides[get_warmup_state] = lambda: state
+
+    assert client.get("/healthz/live").json() == {"status": "ok"}
+    warming = client.get("/healthz/ready")
+    state.mark_ready()
+    ready = client.get("/healthz/ready")
+
+    assert warming.status_code == 503
+    assert warming.json()["status"] == "warming"
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "ready"
+
+
+def test_readiness_is_immediate_when_warmup_is_disabled(client: TestClient):
+    response = client.get("/healthz/ready")
+
+    assert response.status_code == 200
+    assert response.json()["attempts"] == 0
+
+
+def test_debug_profile_is_disabled_by_default(client: TestClient):
+    assert client.post("/debug/profile?seconds=0.1").status_code == 404
+
+
+def test_debug_profile_cannot_be_enabled_without_a_token(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    with pytest.raises(ValidationError, match="DEBUG_PROFILE_TOKEN"):
+        Settings(_env_file=None, debug_profile_enabled=True)
+
+    monkeypatch.setattr(settings, "debug_profile_enabled", True)
+    monkeypatch.setattr(settings, "debug_profile_token", None)
+    assert client.post("/debug/profile?seconds=0.1").status_code == 404
+
+
+def test_debug_profile_requires_token_and_bounds_duration(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "debug_profile_enabled", True)
+    monkeypatch.setattr(settings, "debug_profile_token", "s3cret")
+    monkeypatch.setattr(settings, "debug_profile_max_seconds", 1.0)
+    headers = {"X-Debug-Token": "s3cret"}
+
+    assert client.post("/debug/profile?seconds=0.1").status_code == 403
+    assert client.post("/debug/profile?seconds=5", headers=headers).status_code == 400
+
+    response = client.post("/debug/profile?seconds=0.1&mode=wall", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text.strip()
+
+    response = client.post("/debug/profile?seconds=0.1&mode=alloc&limit=3", headers=headers)
+    assert response.status_code == 200
+    assert response.text.startswith("# top 3 allocation sites")
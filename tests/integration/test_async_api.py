@@ -0,0 +1,110 @@
+from collections.abc import AsyncIterator, Iterator
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from books_rec_api.api.routes.async_books import router as async_books_router
+from books_rec_api.api.routes.async_users import router as async_users_router
+from books_rec_api.dependencies.users import get_async_db_session
+from books_rec_api.models import Book, BookPopularity, BookSimilarity
+
+
+@pytest.fixture
+def async_client(async_db_session: AsyncSession) -> Iterator[TestClient]:
+    app = FastAPI()
+    app.include_router(async_books_router)
+    app.include_router(async_users_router)
+
+    async def override_get_async_db_session() -> AsyncIterator[AsyncSession]:
+        yield async_db_session
+
+    app.dependency_overrides[get_async_db_session] = override_get_async_db_session
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest_asyncio.fixture
+async def seeded(async_db_session: AsyncSession) -> None:
+    async_db_session.add_all(
+        [Book(id=f"book-{i}", title=f"Book {i}") for i in range(1, 7)]
+        + [
+            BookSimilarity(
+                book_id="book-1",
+                neighbor_ids=["book-2", "book-1", "book-3"],
+                algo_id="meta_v0",
+                recs_version="v1",
+            ),
+            BookPopularity(
+                scope="global", book_ids=["book-3", "book-4", "book-5"], recs_version="pop_v1"
+            ),
+        ]
+    )
+    await async_db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_async_similar_books(async_client: TestClient, seeded: None):
+    response = async_client.get("/books/book-1/similar?limit=4")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["similar_book_ids"] == ["book-2", "book-3", "book-4", "book-5"]
+    assert data["algo_id"] == "meta_v0"
+    assert data["recs_version"] == "v1"
+
+    expanded = async_client.get("/books/book-1/similar?limit=2&expand=books").json()
+    assert [card["title"] for card in expanded["books"]] == ["Book 2", "Book 3"]
+
+
+@pytest.mark.asyncio
+async def test_async_similar_books_not_found_and_invalid_limit(
+    async_client: TestClient, seeded: None
+):
+    assert async_client.get("/books/missing/similar").status_code == 404
+    assert async_client.get("/books/book-1/similar?limit=101").status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_async_get_and_list_books(async_client: TestClient, seeded: None):
+    assert async_client.get("/books/book-2").json()["title"] == "Book 2"
+    assert async_client.get("/books/missing").status_code == 404
+
+    data = async_client.get("/books?size=2").json()
+    assert data["total"] == 6
+    assert len(data["items"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_me_creates_shadow_user_and_updates_preferences(async_client: TestClient):
+    headers = {"X-User-Id": "auth0|async"}
+
+    profile = async_client.get("/me", headers=headers)
+    assert profile.status_code == 200
+    assert profile.json()["external_idp_id"] == "auth0|async"
+
+    patched = async_client.patch(
+        "/me/preferences",
+        headers=headers,
+        json={"domain_preferences": {"ui_theme": "light"}},
+    )
+    assert patched.status_code == 200
+    assert patched.json()["id"] == profile.json()["id"]
+    assert patched.json()["domain_preferences"]["ui_theme"] == "light"
+
+
+@pytest.mark.asyncio
+async def test_async_similar_books_batch(async_client: TestClient, seeded: None):
+    response = async_client.post(
+        "/books/similar:batch", json={"book_ids": ["book-1", "missing"], "limit": 4}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["similar_book_ids"] for r in data["results"]] == [
+        ["book-2", "book-3", "book-4", "book-5"]
+    ]
+    assert data["not_found"] == ["missing"]
@@ -1,6 +1,24 @@
+import time
+from collections.abc import Iterator
+from unittest.mock import create_autospec
+
 import pytest
 from fastapi.testclient import TestClient
-
+from sqlalchemy.orm import Session
+
+from books_rec_api.book_id_filter import BookIdFilterStore
+from books_rec_api.catalog_snapshot import CatalogSnapshotStore
+from books_rec_api.circuit_breaker import CLOSED, CircuitBreaker
+from books_rec_api.config import settings
+from books_rec_api.dependencies.books import (
+    get_book_id_filter,
+    get_books_breaker,
+    get_books_repository,
+    get_catalog_snapshot,
+)
+from books_rec_api.dependencies.users import get_db_session
+from books_rec_api.main import app
+from books_rec_api.repositories.books_repository import BooksRepository
 from tests.integration.conftest import DataFactory
 
 
@@ -48,6 +66,123 @@ def test_list_books_with_genre_filter(client_with_overrides: TestClient, sample_
     assert data["items"][0]["title"] == "Foundation"
 
 
+def test_list_books_walks_pages_with_next_cursor(client_with_overrides: TestClient, sample_books):
+    first = client_with_overrides.get("/books?size=1").json()
+    assert [item["id"] for item in first["items"]] == ["book-1"]
+    assert first["total"] == 2
+    assert first["next_cursor"]
+
+    second = client_with_overrides.get(f"/books?size=1&cursor={first['next_cursor']}").json()
+    assert [item["id"] for item in second["items"]] == ["book-2"]
+    assert second["next_cursor"] is None
+
+
+def test_catalog_snapshot_serves_the_same_responses(
+    client_with_overrides: TestClient, sample_books
+):
+    paths = ["/books", "/books?genre=classic&size=1", "/books/book-2", "/books/book-1?fields=title"]
+    from_db = [client_with_overrides.get(path).json() for path in paths]
+
+    catalog = CatalogSnapshotStore(check_seconds=60)
+    app.dependency_overrides[get_catalog_snapshot] = lambda: catalog
+    from_snapshot = [client_with_overrides.get(path).json() for path in paths]
+
+    assert from_snapshot == from_db
+    assert catalog.current is not None and len(catalog.current) == 2
+    assert client_with_overrides.get("/books/nonexistent-book").status_code == 404
+
+
+def test_reads_past_the_request_deadline_return_504(
+    client_with_overrides: TestClient, sample_books, db_session: Session
+):
+    def slow_db_session() -> Iterator[Session]:
+        time.sleep(0.15)
+        yield db_session
+
+    # Timeouts below the configured floor (0.1 s) are raised to it.
+    app.dependency_overrides[get_db_session] = slow_db_session
+    response = client_with_overrides.get("/books/book-1", headers={"X-Request-Timeout": "0.000001"})
+
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Request deadline exceeded"}
+
+
+def test_clients_with_tiny_timeouts_do_not_open_the_breaker_for_others(
+    client_with_overrides: TestClient, sample_books, db_session: Session
+):
+    def slow_db_session() -> Iterator[Session]:
+        time.sleep(0.15)
+        yield db_session
+
+    breaker = CircuitBreaker("books", failure_threshold=settings.circuit_breaker_failure_threshold)
+    app.dependency_overrides[get_books_breaker] = lambda: breaker
+    app.dependency_overrides[get_db_session] = slow_db_session
+    for _ in range(settings.circuit_breaker_failure_threshold + 1):
+        response = client_with_overrides.get("/books/book-1", headers={"X-Request-Timeout": "0.01"})
+        assert response.status_code == 504
+
+    app.dependency_overrides[get_db_session] = lambda: db_session
+    assert breaker.state == CLOSED
+    assert client_with_overrides.get("/books/book-1").status_code == 200
+
+
+def test_list_books_rejects_invalid_cursor(client_with_overrides: TestClient, sample_books):
+    first = client_with_overrides.get("/books?size=1").json()
+
+    assert client_with_overrides.get("/books?cursor=not-a-cursor").status_code == 400
+    response = client_with_overrides.get(f"/books?genre=classic&cursor={first['next_cursor']}")
+    assert response.status_code == 400
+
+
+def test_search_books_ranks_and_pages(client_with_overrides: TestClient, sample_books):
+    first = client_with_overrides.get("/books/search?q=science epics&size=1")
+
+    assert first.status_code == 200
+    assert [item["id"] for item in first.json()["items"]] == ["book-1"]
+    assert first.json()["next_cursor"] is None
+
+    asimov = client_with_overrides.get("/books/search?q=asimov").json()
+    assert [item["title"] for item in asimov["items"]] == ["Foundation"]
+    assert asimov["items"][0]["rank"] > 0
+
+
+def test_search_books_validates_query(client_with_overrides: TestClient, sample_books):
+    assert client_with_overrides.get("/books/search").status_code == 422
+    assert client_with_overrides.get("/books/search?q=dune&cursor=bad").status_code == 400
+
+
+def test_sparse_fieldsets(client_with_overrides: TestClient, sample_books):
+    listed = client_with_overrides.get("/books?fields=title,authors&size=1").json()
+    assert listed["items"] == [{"title": "Dune", "authors": ["Frank Herbert"], "id": "book-1"}]
+    assert listed["total"] == 2
+    assert listed["next_cursor"]
+
+    book = client_with_overrides.get("/books/book-2?fields=publication_year").json()
+    assert book == {"publication_year": 1951, "id": "book-2"}
+
+    response = client_with_overrides.get("/books?fields=title,isbn")
+    assert response.status_code == 400
+    assert "isbn" in response.json()["detail"]
+    assert client_with_overrides.get("/books/book-1?fields=,").status_code == 400
+
+
+def test_openapi_documents_sparse_responses(client_with_overrides: TestClient):
+    paths = client_with_overrides.get("/openapi.json").json()["paths"]
+
+    def schemas(path: str) -> list[str]:
+        schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        return [option["$ref"].rsplit("/", 1)[-1] for option in schema["anyOf"]]
+
+    assert schemas("/books/{book_id}") == ["BookRead", "PartialBookRead"]
+    assert schemas("/books") == ["PaginatedBooks", "PartialPaginatedBooks"]
+    assert schemas("/books/{book_id}/similar") == [
+        "SimilarBooksResponse",
+        "SimilarBooksExpandedResponse",
+    ]
+    search = paths["/books/search"]["get"]["responses"]["200"]["content"]["application/json"]
+    assert search["schema"]["$ref"].endswith("/PaginatedBookSearch")
+
+
 def test_get_book_by_id(client_with_overrides: TestClient, sample_books):
     response = client_with_overrides.get("/books/book-1")
 
@@ -64,3 +199,53 @@ def test_get_book_by_id_not_found(client_with_overrides: TestClient):
 
     assert response.status_code == 404
     assert response.json()["detail"] == "Book with id nonexistent-book not found"
+
+
+def test_unknown_book_ids_are_rejected_by_the_id_filter(
+    client_with_overrides: TestClient, sample_books
+):
+    id_filter = BookIdFilterStore()
+    app.dependency_overrides[get_book_id_filter] = lambda: id_filter
+
+    assert client_with_overrides.get("/books/book-1").status_code == 200
+    assert client_with_overrides.get("/books/nonexistent-book").status_code == 404
+
+    stats = id_filter.stats()
+    assert (stats.rejections, stats.false_positives) == (1, 0)
+
+
+def test_get_book_conditional_get_returns_304(client_with_overrides: TestClient, sample_books):
+    first = client_with_overrides.get("/books/book-1")
+    revalidated = client_with_overrides.get(
+        "/books/book-1", headers={"If-None-Match": first.headers["etag"]}
+    )
+
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "public, max-age=300"
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == first.headers["etag"]
+
+
+@pytest.mark.parametrize("path", ["/books/book-1?fields=title", "/books?size=1&genre=sci-fi"])
+def test_revalidation_does_not_read_the_catalog(
+    client_with_overrides: TestClient, sample_books, path: str
+):
+    first = client_with_overrides.get(path)
+    repo = create_autospec(BooksRepository, instance=True, spec_set=True)
+    app.dependency_overrides[get_books_repository] = lambda: repo
+
+    revalidated = client_with_overrides.get(path, headers={"If-None-Match": first.headers["etag"]})
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == first.headers["etag"]
+    assert repo.mock_calls == []
+
+
+def test_list_books_etag_changes_with_content(client_with_overrides: TestClient, sample_books):
+    all_books = client_with_overrides.get("/books")
+    classics = client_with_overrides.get(
+        "/books?genre=classic", headers={"If-None-Match": all_books.headers["etag"]}
+    )
+
+    assert classics.status_code == 200
+    assert classics.headers["etag"] != all_books.headers["etag"]
@@ -1,5 +1,15 @@
 from fastapi.testclient import TestClient
 
+from books_rec_api.book_id_filter import BookIdFilterStore
+from books_rec_api.cache import LastKnownGood
+from books_rec_api.circuit_breaker import CircuitBreaker
+from books_rec_api.dependencies.books import (
+    get_book_id_filter,
+    get_books_breaker,
+    get_last_known_good,
+)
+from books_rec_api.main import app
+
 
 def test_get_similar_books_success(
     client_with_overrides: TestClient, sample_books_and_similarities
@@ -13,6 +23,25 @@ def test_get_similar_books_success(
     # book-2, book-3 from neighbors + book-4, book-5 from popularity = 4 total
     assert data["similar_book_ids"] == ["book-2", "book-3", "book-4", "book-5"]
     assert data["algo_id"] == "meta_v0"
+    stages = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+    assert stages[0] == "db" and {"fallback", "serialize"} <= set(stages) and stages[-1] == "app"
+
+
+def test_get_similar_books_expand_books(
+    client_with_overrides: TestClient, sample_books_and_similarities
+):
+    response = client_with_overrides.get("/books/book-1/similar?limit=3&expand=books")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["similar_book_ids"] == ["book-2", "book-3", "book-4"]
+    # No shelf was precomputed for book-1, so the cards are read from the catalog.
+    assert data["books"] == [
+        {"id": f"book-{i}", "title": f"Book {i}", "author": None, "small_image_url": None}
+        for i in (2, 3, 4)
+    ]
+    assert "books" not in client_with_overrides.get("/books/book-1/similar?limit=3").json()
+    assert client_with_overrides.get("/books/book-1/similar?expand=authors").status_code == 422
 
 
 def test_get_similar_books_not_found(client_with_overrides: TestClient):
@@ -44,6 +73,35 @@ def test_get_similar_books_only_fallback(
     assert data["recs_version"] == "pop_v1"
 
 
+def test_open_breaker_serves_last_known_good_degraded(
+    client_with_overrides: TestClient, sample_books_and_similarities
+):
+    last_known_good = LastKnownGood(max_entries=10)
+    id_filter = BookIdFilterStore()
+    app.dependency_overrides[get_last_known_good] = lambda: last_known_good
+    app.dependency_overrides[get_book_id_filter] = lambda: id_filter
+    assert client_with_overrides.get("/books/book-1/similar?limit=4").status_code == 200
+    breaker = CircuitBreaker("books", failure_threshold=1, open_seconds=60)
+    breaker.record_failure()
+    app.dependency_overrides[get_books_breaker] = lambda: breaker
+
+    response = client_with_overrides.get("/books/book-1/similar?limit=4")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["similar_book_ids"] == ["book-2", "book-3", "book-4", "book-5"]
+    assert data["algo_id"] == "degraded"
+    assert response.headers["Cache-Control"] == "no-store"
+    assert client_with_overrides.get("/books/book-1").status_code == 503
+
+    expanded = client_with_overrides.get("/books/book-1/similar?limit=4&expand=books")
+    assert expanded.status_code == 200
+    assert "books" not in expanded.json()
+    assert client_with_overrides.get("/books/unknown-book/similar").status_code == 404
+    id_filter.clear()
+    assert client_with_overrides.get("/books/unknown-book/similar").status_code == 503
+
+
 def test_get_similar_books_excludes_anchor_and_deduplicates_api_contract(
     client_with_overrides: TestClient, sample_books_with_anchor_and_duplicates
 ):
@@ -68,3 +126,88 @@ def test_get_similar_books_invalid_limit_above_max(
 ):
     response = client_with_overrides.get("/books/book-1/similar?limit=101")
     assert response.status_code == 400
+
+
+def test_get_similar_books_batch(
+    client_with_overrides: TestClient, sample_books_with_anchor_and_duplicates
+):
+    response = client_with_overrides.post(
+        "/books/similar:batch",
+        json={"book_ids": ["book-1", "book-8", "missing", "book-1"], "limit": 3},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["book_id"] for r in data["results"]] == ["book-1", "book-8"]
+    assert data["not_found"] == ["missing"]
+
+    first, second = data["results"]
+    assert first["similar_book_ids"] == ["book-2", "book-3", "book-4"]
+    assert first["recs_version"] == "v2"
+    assert second["similar_book_ids"] == ["book-3", "book-4", "book-1"]
+    assert second["recs_version"] == "pop_v2"
+    assert first["trace_id"] != second["trace_id"]
+
+
+def test_get_similar_books_batch_matches_single_endpoint(
+    client_with_overrides: TestClient, sample_books_and_similarities
+):
+    batch = client_with_overrides.post(
+        "/books/similar:batch", json={"book_ids": ["book-1", "book-8"], "limit": 4}
+    ).json()
+
+    for result in batch["results"]:
+        single = client_with_overrides.get(f"/books/{result['book_id']}/similar?limit=4").json()
+        assert result["similar_book_ids"] == single["similar_book_ids"]
+        assert result["algo_id"] == single["algo_id"]
+        assert result["recs_version"] == single["recs_version"]
+
+
+def test_get_similar_books_batch_validates_payload(client_with_overrides: TestClient):
+    assert (
+        client_with_overrides.post("/books/similar:batch", json={"book_ids": []}).status_code == 422
+    )
+    assert (
+        client_with_overrides.post(
+            "/books/similar:batch", json={"book_ids": ["book-1"], "limit": 101}
+        ).status_code
+        == 422
+    )
+    too_many = [f"book-{i}" for i in range(201)]
+    assert (
+        client_with_overrides.post("/books/similar:batch", json={"book_ids": too_many}).status_code
+        == 422
+    )
+
+
+def test_get_similar_books_repeat_requests_differ_only_by_trace_id(
+    client_with_overrides: TestClient, sample_books_and_similarities
+):
+    first = client_with_overrides.get("/books/book-1/similar?limit=4")
+    second = client_with_overrides.get("/books/book-1/similar?limit=4")
+
+    assert first.status_code == second.status_code == 200
+    assert second.headers["content-type"] == "application/json"
+    first_data, second_data = first.json(), second.json()
+    assert first_data["trace_id"] != second_data["trace_id"]
+    assert {**first_data, "trace_id": None} == {**second_data, "trace_id": None}
+
+
+def test_get_similar_books_conditional_get_returns_304(
+    client_with_overrides: TestClient, sample_books_and_similarities
+):
+    first = client_with_overrides.get("/books/book-1/similar?limit=4")
+    etag = first.headers["etag"]
+
+    revalidated = client_with_overrides.get(
+        "/books/book-1/similar?limit=4", headers={"If-None-Match": etag}
+    )
+    other_limit = client_with_overrides.get(
+        "/books/book-1/similar?limit=3", headers={"If-None-Match": etag}
+    )
+
+    assert first.headers["cache-control"] == "public, max-age=60"
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+    assert other_limit.status_code == 200
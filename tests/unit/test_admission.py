@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from books_rec_api.admission import (
+    CATALOG,
+    SIMILAR,
+    TELEMETRY,
+    ConcurrencyLimiter,
+    build_limiters,
+    route_class,
+)
+from books_rec_api.config import Settings
+
+
+@pytest.mark.parametrize(
+    ("path", "expected"),
+    [
+        ("/books/42/similar", SIMILAR),
+        ("/books/similar:batch", SIMILAR),
+        ("/books", CATALOG),
+        ("/books/search", CATALOG),
+        ("/books/42", CATALOG),
+        ("/telemetry/events", TELEMETRY),
+        ("/healthz/ready", None),
+        ("/metrics", None),
+        ("/users/me", None),
+    ],
+)
+def test_route_class(path: str, expected: str | None) -> None:
+    assert route_class(path) == expected
+
+
+def test_build_limiters_skips_unlimited_classes() -> None:
+    config = Settings(
+        admission_similar_limit=8,
+        admission_catalog_limit=0,
+        admission_telemetry_limit=2,
+        admission_max_queue=4,
+        admission_queue_timeout_seconds=0.5,
+    )
+
+    limiters = build_limiters(config)
+
+    assert sorted(limiters) == [SIMILAR, TELEMETRY]
+    assert limiters[SIMILAR].limit == 8
+    assert limiters[SIMILAR].max_queue == 4
+    assert limiters[SIMILAR].queue_timeout == 0.5
+
+
+@pytest.mark.asyncio
+async def test_limiter_sheds_at_once_without_a_queue() -> None:
+    limiter = ConcurrencyLimiter(SIMILAR, limit=1)
+
+    assert await limiter.acquire()
+    assert not await limiter.acquire()
+    limiter.release()
+    assert await limiter.acquire()
+
+    stats = limiter.stats()
+    assert (stats.in_flight, stats.admitted, stats.shed_queue_full, stats.waits) == (1, 2, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_limiter_hands_released_slots_to_waiters_in_order() -> None:
+    limiter = ConcurrencyLimiter(CATALOG, limit=1, max_queue=2, queue_timeout=5.0)
+    assert await limiter.acquire()
+    order: list[str] = []
+
+    async def wait(name: str) -> None:
+        assert await limiter.acquire()
+        order.append(name)
+
+    first = asyncio.create_task(wait("first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(wait("second"))
+    await asyncio.sleep(0)
+    assert limiter.stats().queued == 2
+    assert not await limiter.acquire()
+
+    limiter.release()
+    await first
+    limiter.release()
+    await second
+
+    stats = limiter.stats()
+    assert order == ["first", "second"]
+    assert (stats.in_flight, stats.queued, stats.admitted, stats.waits) == (1, 0, 3, 2)
+    assert stats.shed_queue_full == 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_sheds_waiters_after_the_queue_timeout() -> None:
+    limiter = ConcurrencyLimiter(TELEMETRY, limit=1, max_queue=1, queue_timeout=0.01)
+    assert await limiter.acquire()
+
+    assert not await limiter.acquire()
+
+    stats = limiter.stats()
+    assert (stats.in_flight, stats.queued, stats.shed_timeout, stats.waits) == (1, 0, 1, 1)
+    assert stats.wait_seconds_total >= 0.01
+    limiter.release()
+    assert limiter.stats().in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_passes_on_the_slot_of_a_cancelled_waiter() -> None:
+    limiter = ConcurrencyLimiter(SIMILAR, limit=1, max_queue=2, queue_timeout=5.0)
+    assert await limiter.acquire()
+    cancelled = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    limiter.release()
+
+    assert await waiting
+    assert limiter.stats().in_flight == 1
+    assert limiter.stats().queued == 0
@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from books_rec_api.domain import BookId, ExternalIdpId, InternalUserId
+from books_rec_api.models import (
+    NEIGHBORS_RECS_VERSION,
+    Book,
+    BookPopularity,
+    BookSimilarity,
+    PublishedRecsVersion,
+)
+from books_rec_api.repositories.books_repository import AsyncBooksRepository, SimilarBooksLookup
+from books_rec_api.repositories.users_repository import AsyncUsersRepository
+from books_rec_api.schemas.user import DomainPreferences, DomainPreferencesUpdate
+
+
+@pytest.mark.asyncio
+async def test_async_books_repository_reads(async_db_session: AsyncSession):
+    async_db_session.add_all(
+        [
+            Book(id="1", title="Dune", genres=["sci-fi"]),
+            Book(id="2", title="Emma", genres=["classic"]),
+            BookSimilarity(book_id="1", neighbor_ids=["2"], algo_id="meta_v0", recs_version="v1"),
+            BookPopularity(scope="global", book_ids=["2"], recs_version="pop_v1"),
+            PublishedRecsVersion(name=NEIGHBORS_RECS_VERSION, recs_version="v1"),
+        ]
+    )
+    await async_db_session.commit()
+
+    repo = AsyncBooksRepository(async_db_session)
+
+    book = await repo.get_by_id(BookId("1"))
+    assert book is not None and book.title == "Dune"
+
+    items = await repo.list_books(limit=10, offset=0, genre="classic")
+    assert [item.id for item in items] == ["2"]
+    assert await repo.count_books(genre="classic") == 1
+    assert [item.id for item in await repo.list_books(after_id="1")] == ["2"]
+    assert [match.book.id for match in await repo.search_books("emma")] == ["2"]
+
+    assert await repo.get_similar_lookup(BookId("1")) == SimilarBooksLookup(
+        book_id="1",
+        neighbor_ids=["2"],
+        algo_id="meta_v0",
+        recs_version="v1",
+        popularity_ids=["2"],
+        popularity_recs_version="pop_v1",
+    )
+    assert await repo.get_similar_lookup(BookId("missing")) is None
+    assert await repo.get_book_cards(BookId("1"), ["2"]) == {
+        "2": {"id": "2", "title": "Emma", "author": None, "small_image_url": None}
+    }
+    assert await repo.get_recs_version() == "v1|pop_v1"
+    assert (await repo.get_catalog_version()).startswith("||2")
+    assert sorted(await repo.get_book_ids()) == ["1", "2"]
+
+
+@pytest.mark.asyncio
+async def test_async_users_repository_create_and_update(async_db_session: AsyncSession):
+    repo = AsyncUsersRepository(async_db_session)
+
+    created = await repo.create(
+        id=InternalUserId("usr_abc"),
+        external_idp_id=ExternalIdpId("auth0|1"),
+        domain_preferences=DomainPreferences(),
+    )
+    assert created.external_idp_id == "auth0|1"
+
+    found = await repo.get_by_external_id(ExternalIdpId("auth0|1"))
+    assert found is not None and found.id == "usr_abc"
+
+    updated = await repo.update_preferences(
+        InternalUserId("usr_abc"), DomainPreferencesUpdate(ui_theme="light")
+    )
+    assert updated is not None
+    assert updated.domain_preferences["ui_theme"] == "light"
+
+    assert (
+        await repo.update_preferences(InternalUserId("usr_missing"), DomainPreferencesUpdate())
+        is None
+    )
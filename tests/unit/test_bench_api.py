@@ -0,0 +1,38 @@
+import argparse
+
+import pytest
+
+from scripts.bench_api import BenchResult, parse_target, render
+
+
+def test_parse_target() -> None:
+    assert parse_target("async=http://localhost:8001/") == ("async", "http://localhost:8001")
+
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_target("http://localhost:8001")
+
+
+def test_bench_result_percentiles_and_throughput() -> None:
+    result = BenchResult(
+        name="t", duration_s=2.0, latencies_ms=[float(i) for i in range(1, 101)], errors=2
+    )
+
+    assert result.requests == 102
+    assert result.throughput_rps == 51.0
+    assert result.percentile(50) == 50.0
+    assert result.percentile(99) == 99.0
+    assert BenchResult(name="empty", duration_s=1.0).percentile(99) == 0.0
+
+
+def test_render_contains_one_row_per_target() -> None:
+    table = render(
+        [
+            BenchResult(name="threadpool", duration_s=1.0, latencies_ms=[1.0]),
+            BenchResult(name="async", duration_s=1.0, latencies_ms=[2.0]),
+        ]
+    )
+
+    lines = table.splitlines()
+    assert lines[0].startswith("target")
+    assert lines[2].startswith("threadpool")
+    assert lines[3].startswith("async")
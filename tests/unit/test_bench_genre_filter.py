@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from scripts.bench_genre_filter import (
+    GENRES,
+    _indexed_list_books,
+    _legacy_list_books,
+    load_catalog,
+    run_strategy,
+)
+
+
+def test_indexed_filter_matches_legacy_like(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+    load_catalog(engine, books=300, chunk_size=100)
+
+    with Session(engine) as session:
+        for genre in GENRES[:5]:
+            assert _indexed_list_books(session, genre, 5) == _legacy_list_books(session, genre, 5)
+
+    result = run_strategy(engine, "indexed", GENRES[0], limit=5, repeat=3)
+    assert result.name == f"indexed:{GENRES[0]}"
+    assert len(result.latencies_ms) == 3
+    engine.dispose()
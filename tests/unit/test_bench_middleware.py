@@ -0,0 +1,14 @@
+import pytest
+
+from scripts.bench_middleware import VARIANTS, build_app, call, run_variant
+
+
+@pytest.mark.asyncio
+async def test_every_variant_serves_the_benchmark_route() -> None:
+    for variant in VARIANTS:
+        assert await call(build_app(variant)) == 200
+
+    result = await run_variant("pure_asgi", requests=5, warmup=1)
+    assert result.name == "pure_asgi"
+    assert len(result.latencies_ms) == 5
+    assert result.errors == 0
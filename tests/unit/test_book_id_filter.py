@@ -0,0 +1,63 @@
+import pytest
+
+from books_rec_api.book_id_filter import BloomFilter, BookIdFilterStats, BookIdFilterStore
+
+
+def test_bloom_filter_has_no_false_negatives_and_stays_near_target_rate() -> None:
+    known = [str(i) for i in range(1, 10_001)]
+    bloom = BloomFilter.from_ids(known, false_positive_rate=0.01)
+
+    unknown = [f"missing-{i}" for i in range(10_000)]
+    false_positives = sum(book_id in bloom for book_id in unknown)
+
+    assert all(book_id in bloom for book_id in known)
+    assert false_positives / len(unknown) < 0.02
+    assert 0.005 < bloom.false_positive_rate < 0.015
+    # About 9.6 bits per id at 1%, versus tens of bytes per id for a set of str.
+    assert bloom.nbytes < 1.3 * len(known)
+    assert bloom.count == len(known)
+    assert 1 not in bloom
+
+
+def test_bloom_filter_rejects_invalid_rate() -> None:
+    with pytest.raises(ValueError, match="false_positive_rate"):
+        BloomFilter(capacity=10, false_positive_rate=0.0)
+
+
+def test_store_rebuilds_only_when_the_catalog_version_changes() -> None:
+    now = 0.0
+    store = BookIdFilterStore(false_positive_rate=0.01, check_seconds=30, clock=lambda: now)
+
+    assert store.fresh() is None
+    bloom = store.install("3|t1", store.build(["a", "b", "c"]))
+    assert store.fresh() is bloom
+
+    now = 31.0
+    assert store.fresh() is None
+    assert store.record_version("3|t1") is bloom
+    assert store.fresh() is bloom
+
+    now = 62.0
+    assert store.record_version("4|t2") is None
+    rebuilt = store.install("4|t2", store.build(["a", "b", "c", "d"]))
+    assert "d" in rebuilt
+
+
+def test_store_counts_rejections_and_false_positives() -> None:
+    store = BookIdFilterStore()
+    store.record_false_positive()
+    assert store.stats().false_positives == 0
+
+    bloom = store.install("2|t1", store.build(["a", "b"]))
+    store.record_rejection()
+    store.record_false_positive()
+
+    assert store.stats() == BookIdFilterStats(
+        entries=2,
+        nbytes=bloom.nbytes,
+        false_positive_rate=bloom.false_positive_rate,
+        rejections=1,
+        false_positives=1,
+    )
+    store.clear()
+    assert store.stats() == BookIdFilterStats(0, 0, 0.0, 0, 0)
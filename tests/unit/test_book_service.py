@@ -1,19 +1,51 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import cast
-from unittest.mock import MagicMock, create_autospec
+from unittest.mock import MagicMock, call, create_autospec
 
 import pytest
 from pydantic import ValidationError
+from sqlalchemy.orm import Session
 
+from books_rec_api.book_id_filter import BookIdFilterStore
+from books_rec_api.cache import (
+    CachedPopularity,
+    CacheStats,
+    LastKnownGood,
+    SimilarBooksCache,
+    VersionedSnapshot,
+)
+from books_rec_api.catalog_snapshot import CatalogSnapshotStore
+from books_rec_api.circuit_breaker import CircuitOpenError
+from books_rec_api.deadline import DeadlineExceeded, deadline
 from books_rec_api.domain import BookId
-from books_rec_api.models import Book, BookPopularity, BookSimilarity
-from books_rec_api.repositories.books_repository import BooksRepository
-from books_rec_api.services.book_service import BookService
+from books_rec_api.fieldsets import BOOK_FIELDS
+from books_rec_api.models import Book, BookPopularity
+from books_rec_api.neighbors_artifact import NeighborsArtifactStore, write_neighbors_artifact
+from books_rec_api.pagination import InvalidCursorError
+from books_rec_api.repositories.books_repository import (
+    AsyncBooksRepository,
+    BookNeighbors,
+    BookSearchMatch,
+    BooksRepository,
+    SimilarBooksLookup,
+)
+from books_rec_api.schemas.book import BookRead, PaginatedBooks
+from books_rec_api.services.book_service import DEGRADED_ALGO_ID, AsyncBookService, BookService
+from books_rec_api.single_flight import AsyncSingleFlight, SingleFlight
 
 
 def make_repo() -> MagicMock:
     return cast(MagicMock, create_autospec(BooksRepository, instance=True, spec_set=True))
 
 
+def make_async_repo() -> MagicMock:
+    return cast(MagicMock, create_autospec(AsyncBooksRepository, instance=True, spec_set=True))
+
+
 def make_book(book_id: str = "1", title: str = "Dune") -> Book:
     return Book(
         id=book_id,
@@ -25,17 +57,21 @@ def make_book(book_id: str = "1", title: str = "Dune") -> Book:
     )
 
 
-def make_similarity(
+def make_lookup(
     book_id: str = "A",
     neighbor_ids: list[str] | None = None,
     algo_id: str | None = None,
     recs_version: str | None = None,
-) -> BookSimilarity:
-    return BookSimilarity(
+    popularity_ids: list[str] | None = None,
+    popularity_recs_version: str | None = None,
+) -> SimilarBooksLookup:
+    return SimilarBooksLookup(
         book_id=book_id,
         neighbor_ids=neighbor_ids or [],
         algo_id=algo_id,
         recs_version=recs_version,
+        popularity_ids=popularity_ids,
+        popularity_recs_version=popularity_recs_version,
     )
 
 
@@ -58,7 +94,7 @@ def test_get_book_returns_schema():
     assert result.id == "1"
     assert result.title == "Dune"
     assert result.description == "A science fiction epic on Arrakis."
-    repo.get_by_id.assert_called_once_with("1")
+    repo.get_by_id.assert_called_once_with("1", columns=BOOK_FIELDS)
 
 
 def test_get_book_returns_none():
@@ -69,13 +105,122 @@ def test_get_book_returns_none():
     result = svc.get_book(BookId("999"))
 
     assert result is None
-    repo.get_by_id.assert_called_once_with("999")
+    repo.get_by_id.assert_called_once_with("999", columns=BOOK_FIELDS)
+
+
+def test_get_book_rejects_ids_missing_from_the_id_filter_without_a_lookup():
+    repo = make_repo()
+    repo.get_catalog_version.return_value = "2|t1"
+    repo.get_book_ids.return_value = ["1", "2"]
+    repo.get_by_id.return_value = make_book(book_id="1")
+    id_filter = BookIdFilterStore(false_positive_rate=0.01, check_seconds=60)
+
+    svc = BookService(repo, id_filter=id_filter)
+    assert svc.get_book(BookId("1")) is not None
+    assert svc.get_book(BookId("999")) is None
+    assert svc.get_similar_books(BookId("999"), limit=3, trace_id="t1") is None
+
+    repo.get_by_id.assert_called_once_with("1", columns=BOOK_FIELDS)
+    repo.get_similar_lookup.assert_not_called()
+    repo.get_book_ids.assert_called_once_with()
+    assert id_filter.stats().rejections == 2
+
+
+def test_filter_miss_rechecks_the_catalog_version_before_rejecting():
+    repo = make_repo()
+    repo.get_catalog_version.return_value = "1|t1"
+    repo.get_book_ids.return_value = ["1"]
+    now = [0.0]
+    id_filter = BookIdFilterStore(check_seconds=60, miss_recheck_seconds=1, clock=lambda: now[0])
+    svc = BookService(repo, id_filter=id_filter)
+    assert svc.get_book(BookId("2")) is None
+    assert repo.get_catalog_version.call_count == 1
+
+    # Book 2 is imported; the next miss re-checks the version instead of waiting 60 s.
+    repo.get_catalog_version.return_value = "2|t2"
+    repo.get_book_ids.return_value = ["1", "2"]
+    repo.get_by_id.return_value = make_book(book_id="2")
+    now[0] = 1.0
+    assert svc.get_book(BookId("2")) is not None
+    assert svc.get_book(BookId("3")) is None
+
+    assert repo.get_catalog_version.call_count == 2
+    assert id_filter.stats().rejections == 2
+
+
+def test_get_book_counts_a_filter_pass_that_misses_as_false_positive():
+    repo = make_repo()
+    repo.get_catalog_version.return_value = "1|t1"
+    repo.get_book_ids.return_value = ["1"]
+    repo.get_by_id.return_value = None
+    id_filter = BookIdFilterStore(check_seconds=60)
+
+    svc = BookService(repo, id_filter=id_filter)
+    # The id is in the filter (e.g. deleted since the last rebuild) but not in the table.
+    assert svc.get_book(BookId("1")) is None
+
+    assert id_filter.stats().false_positives == 1
+    assert id_filter.stats().rejections == 0
+
+
+def test_get_book_and_get_books_are_served_from_the_catalog_snapshot():
+    repo = make_repo()
+    repo.get_catalog_version.return_value = "2|t1|i1"
+    repo.get_catalog_rows.return_value = [
+        ("1", "Dune", ["Frank Herbert"], ["sci-fi"], 1965, "Arrakis."),
+        ("2", "Emma", ["Jane Austen"], ["classic"], 1815, None),
+    ]
+    catalog = CatalogSnapshotStore(check_seconds=60)
+
+    svc = BookService(repo, catalog=catalog)
+    book = svc.get_book(BookId("1"), fields=frozenset({"id", "title"}))
+    missing = svc.get_book(BookId("999"))
+    page = svc.get_books(size=1, genre="classic")
+
+    assert book is not None and book.model_dump() == {"title": "Dune", "id": "1"}
+    assert missing is None
+    assert isinstance(page, PaginatedBooks)
+    assert [item.id for item in page.items] == ["2"]
+    assert page.total == 1 and page.next_cursor is None
+    repo.get_catalog_rows.assert_called_once_with()
+    repo.get_by_id.assert_not_called()
+    repo.list_books.assert_not_called()
+    repo.count_books.assert_not_called()
+
+
+def test_catalog_snapshot_reloads_when_the_catalog_version_changes():
+    repo = make_repo()
+    repo.get_catalog_version.side_effect = ["1|t1|i1", "2|t2|i2"]
+    repo.get_catalog_rows.side_effect = [
+        [("1", "Dune", [], [], None, None)],
+        [("1", "Dune", [], [], None, None), ("2", "Emma", [], [], None, None)],
+    ]
+    catalog = CatalogSnapshotStore(check_seconds=0)
+
+    svc = BookService(repo, catalog=catalog)
+
+    assert svc.get_book(BookId("2")) is None
+    assert svc.get_book(BookId("2")) is not None
+    assert repo.get_catalog_rows.call_count == 2
+
+
+def test_get_book_with_fields_returns_slim_model():
+    repo = make_repo()
+    repo.get_by_id.return_value = make_book(book_id="1")
+
+    svc = BookService(repo)
+    result = svc.get_book(BookId("1"), fields=frozenset({"id", "title"}))
+
+    assert result is not None
+    assert result.model_dump() == {"title": "Dune", "id": "1"}
+    repo.get_by_id.assert_called_once_with("1", columns=("title", "id"))
 
 
 def test_get_books_paginated():
     repo = make_repo()
     book = make_book(book_id="1")
-    repo.list_books.return_value = ([book], 1)
+    repo.list_books.return_value = [book]
+    repo.count_books.return_value = 1
 
     svc = BookService(repo)
     result = svc.get_books(page=1, size=20)
@@ -85,19 +230,77 @@ def test_get_books_paginated():
     assert result.size == 20
     assert len(result.items) == 1
     assert result.items[0].id == "1"
+    assert result.next_cursor is None
+
+    repo.list_books.assert_called_once_with(
+        limit=21, offset=0, genre=None, after_id=None, columns=BOOK_FIELDS
+    )
+    repo.count_books.assert_called_once_with(genre=None)
+
+
+def test_get_books_follows_next_cursor():
+    repo = make_repo()
+    repo.list_books.return_value = [make_book(book_id="1"), make_book(book_id="2")]
+    repo.count_books.return_value = 3
+
+    svc = BookService(repo)
+    first = svc.get_books(page=2, size=1, genre="sci-fi")
+
+    assert [item.id for item in first.items] == ["1"]
+    assert first.next_cursor is not None
+    repo.list_books.assert_called_once_with(
+        limit=2, offset=1, genre="sci-fi", after_id=None, columns=BOOK_FIELDS
+    )
+
+    repo.list_books.reset_mock()
+    repo.list_books.return_value = [make_book(book_id="2")]
+    second = svc.get_books(size=1, genre="sci-fi", cursor=first.next_cursor)
+
+    assert [item.id for item in second.items] == ["2"]
+    assert second.next_cursor is None
+    repo.list_books.assert_called_once_with(
+        limit=2, offset=0, genre="sci-fi", after_id="1", columns=BOOK_FIELDS
+    )
+
+    with pytest.raises(InvalidCursorError):
+        svc.get_books(size=1, genre="fantasy", cursor=first.next_cursor)
+
 
-    repo.list_books.assert_called_once_with(limit=20, offset=0, genre=None)
+def test_search_books_pages_by_rank_and_id():
+    repo = make_repo()
+    repo.search_books.return_value = [
+        BookSearchMatch(book=make_book(book_id="1"), rank=0.5),
+        BookSearchMatch(book=make_book(book_id="2"), rank=0.25),
+    ]
+
+    svc = BookService(repo)
+    first = svc.search_books(q="dune", size=1)
+
+    assert [(item.id, item.rank) for item in first.items] == [("1", 0.5)]
+    assert first.items[0].title == "Dune"
+    assert first.next_cursor is not None
+    repo.search_books.assert_called_once_with("dune", limit=2, after=None)
+
+    repo.search_books.reset_mock()
+    repo.search_books.return_value = [BookSearchMatch(book=make_book(book_id="2"), rank=0.25)]
+    second = svc.search_books(q="dune", size=1, cursor=first.next_cursor)
+
+    assert [item.id for item in second.items] == ["2"]
+    assert second.next_cursor is None
+    repo.search_books.assert_called_once_with("dune", limit=2, after=(0.5, "1"))
+
+    with pytest.raises(InvalidCursorError):
+        svc.search_books(q="emma", size=1, cursor=first.next_cursor)
 
 
 @pytest.mark.parametrize(
-    ("neighbor_ids", "fallback_ids", "limit", "expected_ids", "expects_fallback_call"),
+    ("neighbor_ids", "fallback_ids", "limit", "expected_ids"),
     [
         pytest.param(
             ["B", "C", "D"],
             ["P1", "P2"],
             2,
             ["B", "C"],
-            False,
             id="ordered-most-similar-first",
         ),
         pytest.param(
@@ -105,7 +308,6 @@ def test_get_books_paginated():
             ["P1", "P2", "P3"],
             3,
             ["B", "P1", "P2"],
-            True,
             id="fills-from-fallback-when-neighbors-short",
         ),
         pytest.param(
@@ -113,7 +315,6 @@ def test_get_books_paginated():
             ["C", "D", "A"],
             10,
             ["B", "C", "D"],
-            True,
             id="deduplicates-and-excludes-anchor",
         ),
         pytest.param(
@@ -121,7 +322,6 @@ def test_get_books_paginated():
             ["C", "B", "A"],
             5,
             ["B", "C"],
-            True,
             id="deduplicates-across-neighbors-and-fallback",
         ),
     ],
@@ -131,19 +331,15 @@ def test_get_similar_books_ordering_and_content_rules(
     fallback_ids: list[str],
     limit: int,
     expected_ids: list[str],
-    expects_fallback_call: bool,
 ):
     repo = make_repo()
-    repo.get_by_id.return_value = make_book(book_id="A")
-    repo.get_similarities.return_value = make_similarity(
+    repo.get_similar_lookup.return_value = make_lookup(
         book_id="A",
         neighbor_ids=neighbor_ids,
         algo_id="meta_v0",
         recs_version="v1",
-    )
-    repo.get_popularity.return_value = make_popularity(
-        book_ids=fallback_ids,
-        recs_version="pop_v1",
+        popularity_ids=fallback_ids,
+        popularity_recs_version="pop_v1",
     )
 
     svc = BookService(repo)
@@ -156,32 +352,27 @@ def test_get_similar_books_ordering_and_content_rules(
     assert result.algo_id == "meta_v0"
     assert result.recs_version == "v1"
 
-    repo.get_by_id.assert_called_once_with(BookId("A"))
-    repo.get_similarities.assert_called_once_with(BookId("A"))
-    if expects_fallback_call:
-        repo.get_popularity.assert_called_once_with(scope="global")
-    else:
-        repo.get_popularity.assert_not_called()
+    repo.get_similar_lookup.assert_called_once_with(BookId("A"))
+    repo.get_by_id.assert_not_called()
+    repo.get_similarities.assert_not_called()
+    repo.get_popularity.assert_not_called()
 
 
 def test_get_similar_books_not_found():
     repo = make_repo()
-    repo.get_by_id.return_value = None
+    repo.get_similar_lookup.return_value = None
 
     svc = BookService(repo)
     result = svc.get_similar_books(book_id=BookId("missing"), limit=10, trace_id="trace-123")
 
     assert result is None
-    repo.get_by_id.assert_called_once_with(BookId("missing"))
-    repo.get_similarities.assert_not_called()
+    repo.get_similar_lookup.assert_called_once_with(BookId("missing"))
     repo.get_popularity.assert_not_called()
 
 
 def test_get_similar_books_no_similarities_no_popularity():
     repo = make_repo()
-    repo.get_by_id.return_value = make_book(book_id="A")
-    repo.get_similarities.return_value = None
-    repo.get_popularity.return_value = None
+    repo.get_similar_lookup.return_value = make_lookup(book_id="A", popularity_ids=None)
 
     svc = BookService(repo)
     result = svc.get_similar_books(book_id=BookId("A"), limit=10, trace_id="trace-123")
@@ -190,23 +381,19 @@ def test_get_similar_books_no_similarities_no_popularity():
     assert result.similar_book_ids == []
     assert result.recs_version == "unknown"
     assert result.algo_id == "unknown"
-    repo.get_by_id.assert_called_once_with(BookId("A"))
-    repo.get_similarities.assert_called_once_with(BookId("A"))
-    repo.get_popularity.assert_called_once_with(scope="global")
+    repo.get_similar_lookup.assert_called_once_with(BookId("A"))
+    repo.get_popularity.assert_not_called()
 
 
 def test_get_similar_books_recs_version_fallback():
     repo = make_repo()
-    repo.get_by_id.return_value = make_book(book_id="A")
-    repo.get_similarities.return_value = make_similarity(
+    repo.get_similar_lookup.return_value = make_lookup(
         book_id="A",
         neighbor_ids=["B"],
         algo_id="meta_v0",
         recs_version=None,
-    )
-    repo.get_popularity.return_value = make_popularity(
-        book_ids=["C", "D"],
-        recs_version="pop_v2",
+        popularity_ids=["C", "D"],
+        popularity_recs_version="pop_v2",
     )
 
     svc = BookService(repo)
@@ -215,41 +402,36 @@ def test_get_similar_books_recs_version_fallback():
     assert result is not None
     assert result.similar_book_ids == ["B", "C", "D"]
     assert result.recs_version == "pop_v2"
-    repo.get_by_id.assert_called_once_with(BookId("A"))
-    repo.get_similarities.assert_called_once_with(BookId("A"))
-    repo.get_popularity.assert_called_once_with(scope="global")
+    repo.get_similar_lookup.assert_called_once_with(BookId("A"))
 
 
 def test_get_similar_books_exact_limit():
     repo = make_repo()
-    repo.get_by_id.return_value = make_book(book_id="A")
-    repo.get_similarities.return_value = make_similarity(book_id="A", neighbor_ids=["B", "C"])
-    repo.get_popularity.return_value = make_popularity(book_ids=["D"])
+    repo.get_similar_lookup.return_value = make_lookup(
+        book_id="A", neighbor_ids=["B", "C"], popularity_ids=["D"]
+    )
 
     svc = BookService(repo)
     result = svc.get_similar_books(book_id=BookId("A"), limit=2, trace_id="trace-123")
 
     assert result is not None
     assert result.similar_book_ids == ["B", "C"]
-    repo.get_by_id.assert_called_once_with(BookId("A"))
-    repo.get_similarities.assert_called_once_with(BookId("A"))
+    repo.get_similar_lookup.assert_called_once_with(BookId("A"))
     repo.get_popularity.assert_not_called()
 
 
 def test_get_similar_books_catalog_exhaustion():
     repo = make_repo()
-    repo.get_by_id.return_value = make_book(book_id="A")
-    repo.get_similarities.return_value = make_similarity(book_id="A", neighbor_ids=["B"])
-    repo.get_popularity.return_value = make_popularity(book_ids=["C", "D"])
+    repo.get_similar_lookup.return_value = make_lookup(
+        book_id="A", neighbor_ids=["B"], popularity_ids=["C", "D"]
+    )
 
     svc = BookService(repo)
     result = svc.get_similar_books(book_id=BookId("A"), limit=100, trace_id="trace-123")
 
     assert result is not None
     assert result.similar_book_ids == ["B", "C", "D"]
-    repo.get_by_id.assert_called_once_with(BookId("A"))
-    repo.get_similarities.assert_called_once_with(BookId("A"))
-    repo.get_popularity.assert_called_once_with(scope="global")
+    repo.get_similar_lookup.assert_called_once_with(BookId("A"))
 
 
 def test_service_validation_rejects_invalid_book_id():
@@ -258,3 +440,604 @@ def test_service_validation_rejects_invalid_book_id():
 
     with pytest.raises(ValidationError):
         svc.get_book(book_id=BookId(""))  # Empty string violates min_length=1
+
+
+def test_get_similar_books_serves_repeat_requests_from_cache():
+    repo = make_repo()
+    repo.get_recs_version.return_value = "v1|pop_v1"
+    repo.get_similar_lookup.return_value = make_lookup(
+        book_id="A",
+        neighbor_ids=["B"],
+        algo_id="meta_v0",
+        recs_version="v1",
+        popularity_ids=["C", "D"],
+        popularity_recs_version="pop_v1",
+    )
+    cache = SimilarBooksCache(max_entries=10, ttl_seconds=60, version_check_seconds=60)
+
+    svc = BookService(repo, cache=cache)
+    first = svc.get_similar_books(book_id=BookId("A"), limit=3, trace_id="trace-1")
+    second = svc.get_similar_books(book_id=BookId("A"), limit=3, trace_id="trace-2")
+
+    assert first is not None and second is not None
+    assert second.similar_book_ids == first.similar_book_ids == ["B", "C", "D"]
+    assert second.trace_id == "trace-2"
+    repo.get_recs_version.assert_called_once_with()
+    repo.get_similar_lookup.assert_called_once_with(BookId("A"))
+    repo.get_popularity.assert_not_called()
+    assert cache.neighbors.stats().hits == 1
+    assert cache.popularity.stats().hits == 1
+
+
+def test_get_similar_books_cache_hit_loads_popularity_only_when_needed():
+    repo = make_repo()
+    repo.get_recs_version.return_value = "v1|pop_v1"
+    repo.get_similar_lookup.return_value = make_lookup(
+        book_id="A", neighbor_ids=["B"], popularity_ids=None
+    )
+    repo.get_popularity.return_value = make_popularity(book_ids=["C"], recs_version="pop_v1")
+    cache = SimilarBooksCache(max_entries=10, ttl_seconds=60, version_check_seconds=60)
+
+    svc = BookService(repo, cache=cache)
+    first = svc.get_similar_books(book_id=BookId("A"), limit=1, trace_id="t1")
+    second = svc.get_similar_books(book_id=BookId("A"), limit=2, trace_id="t2")
+
+    assert first is not None and second is not None
+    assert first.similar_book_ids == ["B"]
+    assert second.similar_book_ids == ["B", "C"]
+    repo.get_similar_lookup.assert_called_once_with(BookId("A"))
+    repo.get_popularity.assert_called_once_with(scope="global")
+
+
+def test_catalog_etag_follows_the_catalog_version_and_the_request():
+    repo = make_repo()
+    repo.get_catalog_version.return_value = "2|t1|t1"
+    now = [0.0]
+    stamp: VersionedSnapshot[str] = VersionedSnapshot(check_seconds=5, clock=lambda: now[0])
+    svc = BookService(repo, catalog_stamp=stamp)
+
+    etag = svc.catalog_etag("book", "1", frozenset({"title", "authors"}))
+    assert etag == svc.catalog_etag("book", "1", frozenset({"authors", "title"}))
+    assert etag != svc.catalog_etag("book", "1", None)
+    repo.get_catalog_version.assert_called_once_with()
+
+    repo.get_catalog_version.return_value = "3|t2|t2"
+    now[0] = 5.0
+    assert svc.catalog_etag("book", "1", frozenset({"title", "authors"})) != etag
+    assert BookService(repo).catalog_etag("book", "1", None) is None
+
+
+def test_get_similar_books_coalesces_concurrent_cold_lookups():
+    repo = make_repo()
+    release = threading.Event()
+
+    def slow_lookup(book_id):
+        release.wait(timeout=5)
+        return make_lookup(book_id="A", neighbor_ids=["B"], recs_version="v1")
+
+    repo.get_similar_lookup.side_effect = slow_lookup
+    flights = SingleFlight("books")
+    svc = BookService(repo, flights=flights)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [
+            pool.submit(svc.get_similar_books, book_id=BookId("A"), limit=1, trace_id=f"t{i}")
+            for i in range(3)
+        ]
+        while flights.stats().coalesced < 2:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert [r.similar_book_ids for r in results] == [["B"]] * 3
+    repo.get_similar_lookup.assert_called_once_with(BookId("A"))
+
+
+def test_follower_stops_waiting_at_its_own_deadline():
+    repo = make_repo()
+    release = threading.Event()
+
+    def slow_lookup(book_id):
+        release.wait(timeout=5)
+        return make_lookup(book_id="A", neighbor_ids=["B"], recs_version="v1")
+
+    repo.get_similar_lookup.side_effect = slow_lookup
+    repo.get_popularity.return_value = None
+    flights = SingleFlight("books")
+    svc = BookService(repo, flights=flights)
+
+    def follow():
+        with deadline(0.05):
+            return svc.get_similar_books(book_id=BookId("A"), limit=1, trace_id="t2")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(svc.get_similar_books, book_id=BookId("A"), limit=1, trace_id="t1")
+        while flights.stats().in_flight < 1:
+            time.sleep(0.001)
+        follower = pool.submit(follow).result(timeout=5)
+        release.set()
+        assert leader.result(timeout=5).similar_book_ids == ["B"]
+
+    assert follower is not None and follower.similar_book_ids == []
+    assert flights.stats().coalesced == 1
+    repo.get_similar_lookup.assert_called_once_with(BookId("A"))
+
+
+def test_follower_reads_alone_when_the_leader_deadline_runs_out():
+    repo = make_repo()
+    release = threading.Event()
+    lookups = iter(
+        [
+            DeadlineExceeded("leader"),
+            make_lookup(book_id="A", neighbor_ids=["B"], recs_version="v1"),
+        ]
+    )
+
+    def lookup(book_id):
+        result = next(lookups)
+        if isinstance(result, Exception):
+            release.wait(timeout=5)
+            raise result
+        return result
+
+    repo.get_similar_lookup.side_effect = lookup
+    repo.get_popularity.return_value = None
+    flights = SingleFlight("books")
+    svc = BookService(repo, flights=flights)
+
+    def lead():
+        with deadline(5.0):
+            return svc.get_similar_books(book_id=BookId("A"), limit=1, trace_id="t1")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(lead)
+        while flights.stats().in_flight < 1:
+            time.sleep(0.001)
+        follower = pool.submit(svc.get_similar_books, book_id=BookId("A"), limit=1, trace_id="t2")
+        while flights.stats().coalesced < 1:
+            time.sleep(0.001)
+        release.set()
+        degraded, result = leader.result(timeout=5), follower.result(timeout=5)
+
+    assert degraded is not None and degraded.similar_book_ids == []
+    assert result is not None and result.similar_book_ids == ["B"]
+    assert repo.get_similar_lookup.call_count == 2
+
+
+def test_shared_book_reads_hand_out_plain_values(db_session: Session):
+    db_session.add(make_book(book_id="1"))
+    db_session.commit()
+    db_session.expunge_all()
+
+    svc = BookService(BooksRepository(db_session), flights=SingleFlight("books"))
+    book = svc.get_book(BookId("1"))
+
+    assert isinstance(book, BookRead) and book.title == "Dune"
+    assert not isinstance(book, Book)
+
+
+@pytest.mark.asyncio
+async def test_async_shared_read_outlives_a_cancelled_leader():
+    leader_repo, follower_repo = make_async_repo(), make_async_repo()
+    release = asyncio.Event()
+
+    async def slow_lookup(book_id):
+        await release.wait()
+        return make_lookup(book_id="A", neighbor_ids=["B"], recs_version="v1")
+
+    leader_repo.get_similar_lookup.side_effect = slow_lookup
+    flights = AsyncSingleFlight("books_async")
+
+    leader = asyncio.create_task(
+        AsyncBookService(leader_repo, flights=flights).get_similar_books(
+            book_id=BookId("A"), limit=1, trace_id="t1"
+        )
+    )
+    follower = asyncio.create_task(
+        AsyncBookService(follower_repo, flights=flights).get_similar_books(
+            book_id=BookId("A"), limit=1, trace_id="t2"
+        )
+    )
+    while flights.stats().coalesced < 1:
+        await asyncio.sleep(0)
+    # The leader's client disconnects; its session stays open until the shared read ends.
+    leader.cancel()
+    await asyncio.sleep(0.01)
+    assert not leader.done()
+    release.set()
+
+    result = await follower
+    assert result is not None and result.similar_book_ids == ["B"]
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    leader_repo.get_similar_lookup.assert_awaited_once_with(BookId("A"))
+    follower_repo.get_similar_lookup.assert_not_called()
+
+
+def test_get_similar_books_does_not_cache_unknown_anchor():
+    repo = make_repo()
+    repo.get_recs_version.return_value = "v1|pop_v1"
+    repo.get_similar_lookup.return_value = None
+    cache = SimilarBooksCache(max_entries=10, ttl_seconds=60, version_check_seconds=60)
+
+    svc = BookService(repo, cache=cache)
+    assert svc.get_similar_books(book_id=BookId("X"), limit=3, trace_id="t1") is None
+    assert svc.get_similar_books(book_id=BookId("X"), limit=3, trace_id="t2") is None
+
+    assert repo.get_similar_lookup.call_count == 2
+    assert cache.neighbors.stats().size == 0
+
+
+def test_get_similar_books_batch_uses_one_neighbors_query_and_one_popularity_lookup():
+    repo = make_repo()
+    repo.get_neighbors_batch.return_value = {
+        "A": BookNeighbors(
+            book_id="A", neighbor_ids=["B", "C"], algo_id="meta_v0", recs_version="v1"
+        ),
+        "B": BookNeighbors(book_id="B", neighbor_ids=[], algo_id=None, recs_version=None),
+    }
+    repo.get_popularity.return_value = make_popularity(
+        book_ids=["C", "D", "A"], recs_version="pop_v1"
+    )
+
+    svc = BookService(repo)
+    result = svc.get_similar_books_batch(
+        book_ids=[BookId("A"), BookId("B"), BookId("X"), BookId("A")], limit=3
+    )
+
+    assert [(r.book_id, r.similar_book_ids) for r in result.results] == [
+        ("A", ["B", "C", "D"]),
+        ("B", ["C", "D", "A"]),
+    ]
+    assert result.results[1].recs_version == "pop_v1"
+    assert result.not_found == ["X"]
+    repo.get_neighbors_batch.assert_called_once_with(["A", "B", "X"])
+    repo.get_popularity.assert_called_once_with(scope="global")
+
+
+def test_get_similar_books_batch_skips_popularity_when_neighbors_fill_limit():
+    repo = make_repo()
+    repo.get_neighbors_batch.return_value = {
+        "A": BookNeighbors(
+            book_id="A", neighbor_ids=["B", "C"], algo_id="meta_v0", recs_version="v1"
+        ),
+    }
+
+    svc = BookService(repo)
+    result = svc.get_similar_books_batch(book_ids=[BookId("A")], limit=2)
+
+    assert result.results[0].similar_book_ids == ["B", "C"]
+    repo.get_popularity.assert_not_called()
+
+
+def test_get_similar_books_batch_reads_only_cache_misses():
+    repo = make_repo()
+    repo.get_recs_version.return_value = "v1|pop_v1"
+    repo.get_similar_lookup.return_value = make_lookup(
+        book_id="A", neighbor_ids=["B"], popularity_ids=["C"], popularity_recs_version="pop_v1"
+    )
+    repo.get_neighbors_batch.return_value = {
+        "B": BookNeighbors(book_id="B", neighbor_ids=["A"], algo_id="meta_v0", recs_version="v1"),
+    }
+    cache = SimilarBooksCache(max_entries=10, ttl_seconds=60, version_check_seconds=60)
+
+    svc = BookService(repo, cache=cache)
+    svc.get_similar_books(book_id=BookId("A"), limit=2, trace_id="t1")
+    result = svc.get_similar_books_batch(book_ids=[BookId("A"), BookId("B")], limit=2)
+
+    assert [r.similar_book_ids for r in result.results] == [["B", "C"], ["A", "C"]]
+    repo.get_neighbors_batch.assert_called_once_with(["B"])
+    repo.get_popularity.assert_not_called()
+
+
+def test_get_similar_books_serves_from_artifact_without_db(tmp_path):
+    path = tmp_path / "neighbors.bin"
+    write_neighbors_artifact(
+        path,
+        recs_version="v1",
+        algo_id="meta_v0",
+        neighbors={"A": ["B"], "B": ["A"], "C": []},
+        popularity_ids=["A", "C", "B"],
+        popularity_recs_version="pop_v1",
+    )
+    repo = make_repo()
+    repo.get_neighbors_batch.return_value = {
+        "N": BookNeighbors(book_id="N", neighbor_ids=["X"], algo_id="meta_v1", recs_version="v2")
+    }
+    cache = SimilarBooksCache(max_entries=10, ttl_seconds=60, version_check_seconds=60)
+    svc = BookService(repo, cache=cache, artifacts=NeighborsArtifactStore(path))
+
+    result = svc.get_similar_books(BookId("A"), limit=3, trace_id="t-1")
+    assert repo.mock_calls == []
+
+    # Anchors missing from the artifact are only looked up to tell whether they exist;
+    # a book imported after the artifact was built gets the popularity list.
+    missing = svc.get_similar_books(BookId("Z"), limit=3, trace_id="t-2")
+    unlisted = svc.get_similar_books(BookId("N"), limit=2, trace_id="t-3")
+    batch = svc.get_similar_books_batch([BookId("N"), BookId("C"), BookId("Z")], limit=1)
+
+    assert result is not None
+    assert result.similar_book_ids == ["B", "C"]
+    assert result.algo_id == "meta_v0"
+    assert result.recs_version == "v1"
+    assert missing is None
+    assert unlisted is not None
+    assert unlisted.similar_book_ids == ["A", "C"]
+    assert unlisted.recs_version == "pop_v1"
+    assert [r.book_id for r in batch.results] == ["N", "C"]
+    assert [r.similar_book_ids for r in batch.results] == [["A"], ["A"]]
+    assert batch.not_found == ["Z"]
+    # Existence is read once per anchor and artifact version, not per request.
+    assert repo.get_neighbors_batch.call_args_list == [call(["Z"]), call(["N"])]
+
+
+def test_artifact_unlisted_anchors_are_re_read_after_the_check_interval(tmp_path):
+    path = tmp_path / "neighbors.bin"
+    write_neighbors_artifact(
+        path, recs_version="v1", algo_id="meta_v0", neighbors={"A": []}, popularity_ids=["A"]
+    )
+    now = [0.0]
+    repo = make_repo()
+    repo.get_neighbors_batch.return_value = {}
+    svc = BookService(
+        repo, artifacts=NeighborsArtifactStore(path, check_seconds=5, clock=lambda: now[0])
+    )
+
+    first = svc.get_similar_books(BookId("N"), limit=1, trace_id="t-1")
+    second = svc.get_similar_books(BookId("N"), limit=1, trace_id="t-2")
+    now[0] = 6.0
+    repo.get_neighbors_batch.return_value = {
+        "N": BookNeighbors(book_id="N", neighbor_ids=[], algo_id=None, recs_version=None)
+    }
+    imported = svc.get_similar_books(BookId("N"), limit=1, trace_id="t-3")
+
+    assert first is None and second is None
+    assert imported is not None
+    assert imported.similar_book_ids == ["A"]
+    assert repo.get_neighbors_batch.call_count == 2
+
+
+def test_get_similar_books_falls_back_to_db_when_artifact_missing(tmp_path):
+    repo = make_repo()
+    repo.get_similar_lookup.return_value = make_lookup(book_id="A", neighbor_ids=["B"])
+    svc = BookService(repo, artifacts=NeighborsArtifactStore(tmp_path / "neighbors.bin"))
+
+    result = svc.get_similar_books(BookId("A"), limit=1, trace_id="t-1")
+
+    assert result is not None
+    assert result.similar_book_ids == ["B"]
+    repo.get_similar_lookup.assert_called_once_with("A")
+
+
+def test_get_similar_books_json_matches_model_serialization():
+    repo = make_repo()
+    repo.get_similar_lookup.return_value = make_lookup(
+        book_id="A",
+        neighbor_ids=["B", "A"],
+        algo_id="meta_v0",
+        recs_version="v1",
+        popularity_ids=["C", "D"],
+        popularity_recs_version="pop_v1",
+    )
+
+    svc = BookService(repo)
+    body = svc.get_similar_books_json(book_id=BookId("A"), limit=3, trace_id="trace-1")
+    model = svc.get_similar_books(book_id=BookId("A"), limit=3, trace_id="trace-1")
+
+    assert model is not None and body is not None
+    expected = json.dumps(model.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":"))
+    assert body.content == expected.encode("utf-8")
+
+
+def test_get_similar_books_json_serves_repeat_requests_from_response_cache():
+    repo = make_repo()
+    repo.get_recs_version.return_value = "v1|pop_v1"
+    repo.get_similar_lookup.return_value = make_lookup(
+        book_id="A", neighbor_ids=["B"], algo_id="meta_v0", recs_version="v1"
+    )
+    cache = SimilarBooksCache(
+        max_entries=10, ttl_seconds=60, version_check_seconds=60, response_max_entries=10
+    )
+
+    svc = BookService(repo, cache=cache)
+    first = svc.get_similar_books_json(book_id=BookId("A"), limit=1, trace_id="trace-1")
+    second = svc.get_similar_books_json(book_id=BookId("A"), limit=1, trace_id="trace-2")
+    other_limit = svc.get_similar_books_json(book_id=BookId("A"), limit=2, trace_id="trace-3")
+
+    assert first is not None and second is not None and other_limit is not None
+    assert first.content is not None and second.content is not None
+    assert json.loads(second.content) == {**json.loads(first.content), "trace_id": "trace-2"}
+    assert second.etag == first.etag
+    repo.get_similar_lookup.assert_called_once_with(BookId("A"))
+    assert cache.responses is not None
+    assert cache.responses.stats() == CacheStats(hits=1, misses=2, size=2)
+
+
+def test_get_similar_books_json_degrades_to_popularity_when_the_lookup_runs_out_of_time():
+    repo = make_repo()
+    repo.get_recs_version.return_value = "v1|pop_v1"
+    repo.get_similar_lookup.side_effect = DeadlineExceeded("Request deadline exceeded")
+    repo.get_popularity.return_value = make_popularity(["P1", "A", "P2"], recs_version="pop_v1")
+    cache = SimilarBooksCache(
+        max_entries=10, ttl_seconds=60, version_check_seconds=60, response_max_entries=10
+    )
+
+    svc = BookService(repo, cache=cache, lookup_budget=0.5)
+    body = svc.get_similar_books_json(book_id=BookId("A"), limit=2, trace_id="trace-1")
+
+    assert body is not None and body.content is not None
+    assert body.degraded
+    assert json.loads(body.content)["similar_book_ids"] == ["P1", "P2"]
+    assert cache.responses is not None and cache.responses.stats().size == 0
+    assert cache.neighbors.stats().size == 0
+
+
+def test_similar_books_are_served_from_last_known_good_while_the_database_is_down():
+    repo = make_repo()
+    repo.get_recs_version.return_value = "v1|pop_v1"
+    repo.get_similar_lookup.return_value = make_lookup(
+        book_id="A",
+        neighbor_ids=["B"],
+        algo_id="meta_v0",
+        recs_version="v1",
+        popularity_ids=["P1", "B", "P2"],
+        popularity_recs_version="pop_v1",
+    )
+    lkg = LastKnownGood(max_entries=10)
+    svc = BookService(repo, last_known_good=lkg)
+    svc.get_similar_books(book_id=BookId("A"), limit=3, trace_id="trace-1")
+
+    repo.get_similar_lookup.side_effect = CircuitOpenError("Circuit breaker 'books' is open")
+    body = svc.get_similar_books_json(book_id=BookId("A"), limit=3, trace_id="trace-2")
+    expanded = svc.get_similar_books_json(
+        book_id=BookId("A"), limit=3, trace_id="trace-3", expand_books=True
+    )
+
+    assert body is not None and body.content is not None and body.degraded
+    data = json.loads(body.content)
+    assert data["similar_book_ids"] == ["B", "P1", "P2"]
+    assert data["algo_id"] == DEGRADED_ALGO_ID
+    assert expanded is not None and expanded.content is not None
+    assert "books" not in json.loads(expanded.content)
+    # Without an id filter, an anchor with no kept neighbors may not exist at all.
+    with pytest.raises(CircuitOpenError):
+        svc.get_similar_books(book_id=BookId("Z"), limit=2, trace_id="trace-4")
+
+
+def test_last_known_good_serving_honours_the_id_filter_and_needs_a_prior_load():
+    repo = make_repo()
+    repo.get_recs_version.side_effect = CircuitOpenError("Circuit breaker 'books' is open")
+    lkg = LastKnownGood(max_entries=10)
+    id_filter = BookIdFilterStore()
+    id_filter.install("v1", id_filter.build(["A"]))
+    cache = SimilarBooksCache(max_entries=10, ttl_seconds=60, version_check_seconds=60)
+    svc = BookService(repo, cache=cache, id_filter=id_filter, last_known_good=lkg)
+
+    with pytest.raises(CircuitOpenError):
+        svc.get_similar_books(book_id=BookId("A"), limit=2, trace_id="trace-1")
+
+    lkg.put_popularity(CachedPopularity(book_ids=("P1",), recs_version="pop_v1"))
+    assert svc.get_similar_books(book_id=BookId("missing"), limit=2, trace_id="t") is None
+    served = svc.get_similar_books(book_id=BookId("A"), limit=2, trace_id="trace-2")
+    assert served is not None and served.similar_book_ids == ["P1"]
+
+
+def test_get_similar_books_json_expands_cards_in_result_order_and_caches_separately():
+    repo = make_repo()
+    repo.get_recs_version.return_value = "v1|pop_v1"
+    repo.get_similar_lookup.return_value = make_lookup(
+        book_id="A", neighbor_ids=["C", "B", "D"], algo_id="meta_v0", recs_version="v1"
+    )
+    repo.get_book_cards.return_value = {
+        "B": {"id": "B", "title": "Book B", "author": "Author B", "small_image_url": None},
+        "C": {"id": "C", "title": "Book C", "author": None, "small_image_url": "c.jpg"},
+    }
+    cache = SimilarBooksCache(
+        max_entries=10, ttl_seconds=60, version_check_seconds=60, response_max_entries=10
+    )
+
+    svc = BookService(repo, cache=cache)
+    plain = svc.get_similar_books_json(book_id=BookId("A"), limit=3, trace_id="t1")
+    expanded = svc.get_similar_books_json(
+        book_id=BookId("A"), limit=3, trace_id="t2", expand_books=True
+    )
+    again = svc.get_similar_books_json(
+        book_id=BookId("A"), limit=3, trace_id="t3", expand_books=True
+    )
+
+    assert plain is not None and plain.content is not None
+    assert expanded is not None and expanded.content is not None
+    assert "books" not in json.loads(plain.content)
+    payload = json.loads(expanded.content)
+    assert payload["similar_book_ids"] == ["C", "B", "D"]
+    # D has no card (e.g. removed from the catalog) and is left out of `books`.
+    assert payload["books"] == [
+        {"id": "C", "title": "Book C", "author": None, "small_image_url": "c.jpg"},
+        {"id": "B", "title": "Book B", "author": "Author B", "small_image_url": None},
+    ]
+    assert expanded.etag != plain.etag
+    assert again is not None and again.etag == expanded.etag
+    repo.get_book_cards.assert_called_once_with(BookId("A"), ["C", "B", "D"])
+
+
+def test_get_similar_books_json_returns_none_for_unknown_anchor():
+    repo = make_repo()
+    repo.get_similar_lookup.return_value = None
+
+    svc = BookService(repo)
+
+    assert svc.get_similar_books_json(book_id=BookId("X"), limit=3, trace_id="t1") is None
+
+
+def test_get_similar_books_json_returns_no_content_when_etag_matches():
+    repo = make_repo()
+    repo.get_similar_lookup.return_value = make_lookup(book_id="A", neighbor_ids=["B"])
+
+    svc = BookService(repo)
+    first = svc.get_similar_books_json(book_id=BookId("A"), limit=1, trace_id="t1")
+    assert first is not None
+    revalidated = svc.get_similar_books_json(
+        book_id=BookId("A"), limit=1, trace_id="t2", if_none_match=first.etag
+    )
+
+    assert revalidated is not None
+    assert revalidated.content is None
+    assert revalidated.etag == first.etag
+
+
+def test_warm_primes_popularity_and_hot_anchor_responses():
+    repo = make_repo()
+    repo.get_recs_version.return_value = "v1|pop_v1"
+    repo.get_popularity.return_value = BookPopularity(
+        scope="global", book_ids=["A", "B", "C"], recs_version="pop_v1"
+    )
+    repo.get_similar_lookup.side_effect = lambda book_id: make_lookup(
+        book_id=book_id, neighbor_ids=["C"], recs_version="v1"
+    )
+    cache = SimilarBooksCache(
+        max_entries=10, ttl_seconds=60, version_check_seconds=60, response_max_entries=10
+    )
+
+    svc = BookService(repo, cache=cache)
+    primed = svc.warm(hot_anchors=2, limit=1)
+    body = svc.get_similar_books_json(book_id=BookId("B"), limit=1, trace_id="t1")
+
+    assert primed == 2
+    assert body is not None and body.content is not None
+    assert json.loads(body.content)["similar_book_ids"] == ["C"]
+    repo.get_popularity.assert_called_once_with(scope="global")
+    assert [c.args for c in repo.get_similar_lookup.call_args_list] == [("A",), ("B",)]
+    assert cache.responses is not None
+    assert cache.responses.stats().size == 2
+
+
+@pytest.mark.asyncio
+async def test_async_service_runs_the_same_reads_and_returns_the_same_bodies():
+    lookup = make_lookup(
+        book_id="A",
+        neighbor_ids=["B", "A"],
+        algo_id="meta_v0",
+        recs_version="v1",
+        popularity_ids=["P1", "B", "P2"],
+        popularity_recs_version="pop_v1",
+    )
+    sync_repo, async_repo = make_repo(), make_async_repo()
+    for repo in (sync_repo, async_repo):
+        repo.get_recs_version.return_value = "v1|pop_v1"
+        repo.get_similar_lookup.return_value = lookup
+        repo.get_by_id.return_value = make_book(book_id="B")
+
+    def make_cache() -> SimilarBooksCache:
+        return SimilarBooksCache(max_entries=10, ttl_seconds=60, version_check_seconds=60)
+
+    sync_svc = BookService(sync_repo, cache=make_cache())
+    async_svc = AsyncBookService(async_repo, cache=make_cache())
+    sync_body = sync_svc.get_similar_books_json(book_id=BookId("A"), limit=3, trace_id="t1")
+    async_body = await async_svc.get_similar_books_json(book_id=BookId("A"), limit=3, trace_id="t1")
+    sync_book = sync_svc.get_book(BookId("B"), fields=frozenset({"title"}))
+    async_book = await async_svc.get_book(BookId("B"), fields=frozenset({"title"}))
+
+    assert async_body == sync_body
+    assert async_book is not None and sync_book is not None
+    assert async_book.model_dump() == sync_book.model_dump()
+    assert async_repo.mock_calls == sync_repo.mock_calls
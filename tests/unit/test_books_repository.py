@@ -1,10 +1,28 @@
 from unittest.mock import create_autospec
 
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.exc import InvalidRequestError, OperationalError
 from sqlalchemy.orm import Session
 
+from books_rec_api.circuit_breaker import CircuitBreaker, CircuitOpenError
+from books_rec_api.deadline import DeadlineExceeded, deadline, narrowed
 from books_rec_api.domain import BookId
-from books_rec_api.models import Book
-from books_rec_api.repositories.books_repository import BooksRepository
+from books_rec_api.models import (
+    NEIGHBORS_RECS_VERSION,
+    Book,
+    BookCount,
+    BookPopularity,
+    BookSimilarCards,
+    BookSimilarity,
+    PublishedRecsVersion,
+)
+from books_rec_api.packed_ids import PackedBookIds
+from books_rec_api.repositories.books_repository import (
+    BookNeighbors,
+    BooksRepository,
+    SimilarBooksLookup,
+)
 
 
 def test_get_by_id_returns_book():
@@ -18,7 +36,7 @@ def test_get_by_id_returns_book():
     result = repo.get_by_id(BookId("1"))
 
     assert result == book
-    session.get.assert_called_once_with(Book, "1")
+    session.get.assert_called_once_with(Book, "1", options=[])
 
 
 def test_get_by_id_returns_none():
@@ -29,4 +47,411 @@ def test_get_by_id_returns_none():
     result = repo.get_by_id(BookId("999"))
 
     assert result is None
-    session.get.assert_called_once_with(Book, "999")
+    session.get.assert_called_once_with(Book, "999", options=[])
+
+
+def test_columns_restrict_the_loaded_attributes(db_session: Session):
+    db_session.add(Book(id="1", title="Dune", description="Arrakis", image_url="dune.jpg"))
+    db_session.flush()
+    db_session.expunge_all()
+
+    repo = BooksRepository(db_session)
+    book = repo.get_by_id(BookId("1"), columns=("id", "title"))
+
+    assert book is not None
+    assert inspect(book).unloaded >= {"description", "image_url", "authors"}
+    assert book.title == "Dune"
+    with pytest.raises(InvalidRequestError):
+        _ = book.image_url
+
+    db_session.expunge_all()
+    listed = repo.list_books(columns=("id", "description"))
+    assert [item.description for item in listed] == ["Arrakis"]
+    assert "title" in inspect(listed[0]).unloaded
+
+
+def test_get_recs_version_combines_published_and_popularity_versions(db_session: Session):
+    db_session.add_all(
+        [
+            PublishedRecsVersion(name=NEIGHBORS_RECS_VERSION, recs_version="v2"),
+            BookPopularity(scope="global", book_ids=["1"], recs_version="pop_v1"),
+        ]
+    )
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+
+    assert repo.get_recs_version() == "v2|pop_v1"
+
+
+def test_get_recs_version_without_artifacts(db_session: Session):
+    repo = BooksRepository(db_session)
+
+    assert repo.get_recs_version() == "|"
+
+
+def test_catalog_version_changes_with_imports_and_edits(db_session: Session):
+    repo = BooksRepository(db_session)
+    empty = repo.get_catalog_version()
+
+    db_session.add_all([Book(id="1", title="Dune"), Book(id="2", title="Foundation")])
+    db_session.add(BookCount(scope="all", count=2))
+    db_session.flush()
+    loaded = repo.get_catalog_version()
+
+    db_session.get_one(Book, "1").title = "Dune Messiah"
+    db_session.flush()
+    edited = repo.get_catalog_version()
+
+    assert empty == "||"
+    assert loaded.startswith("2|") and loaded != empty
+    assert edited.startswith("2|") and edited != loaded
+    assert sorted(repo.get_book_ids()) == ["1", "2"]
+
+
+def test_get_similar_lookup_joins_anchor_neighbors_and_popularity(db_session: Session):
+    db_session.add_all(
+        [
+            Book(id="1", title="Dune"),
+            Book(id="2", title="Foundation"),
+            BookSimilarity(book_id="1", neighbor_ids=["2"], algo_id="meta_v0", recs_version="v1"),
+            BookPopularity(scope="global", book_ids=["2", "1"], recs_version="pop_v1"),
+        ]
+    )
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+
+    assert repo.get_similar_lookup(BookId("1")) == SimilarBooksLookup(
+        book_id="1",
+        neighbor_ids=["2"],
+        algo_id="meta_v0",
+        recs_version="v1",
+        popularity_ids=["2", "1"],
+        popularity_recs_version="pop_v1",
+    )
+    assert repo.get_similar_lookup(BookId("2")) == SimilarBooksLookup(
+        book_id="2",
+        neighbor_ids=[],
+        algo_id=None,
+        recs_version=None,
+        popularity_ids=["2", "1"],
+        popularity_recs_version="pop_v1",
+    )
+
+
+def test_get_similar_lookup_without_popularity(db_session: Session):
+    db_session.add(Book(id="1", title="Dune"))
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+    lookup = repo.get_similar_lookup(BookId("1"))
+
+    assert lookup is not None
+    assert lookup.popularity_ids is None
+    assert repo.get_similar_lookup(BookId("missing")) is None
+
+
+def test_get_neighbors_batch_returns_only_catalog_anchors(db_session: Session):
+    db_session.add_all(
+        [
+            Book(id="1", title="Dune"),
+            Book(id="2", title="Foundation"),
+            BookSimilarity(book_id="1", neighbor_ids=["2"], algo_id="meta_v0", recs_version="v1"),
+        ]
+    )
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+    result = repo.get_neighbors_batch([BookId("1"), BookId("2"), BookId("missing")])
+
+    assert result == {
+        "1": BookNeighbors(book_id="1", neighbor_ids=["2"], algo_id="meta_v0", recs_version="v1"),
+        "2": BookNeighbors(book_id="2", neighbor_ids=[], algo_id=None, recs_version=None),
+    }
+    assert repo.get_neighbors_batch([]) == {}
+
+
+def test_get_book_cards_reads_shelf_and_falls_back_to_catalog(db_session: Session):
+    db_session.add_all(
+        [
+            Book(id="1", title="Dune", authors=["Frank Herbert"]),
+            Book(id="2", title="Foundation", authors=["Isaac Asimov"], small_image_url="f.jpg"),
+            Book(id="3", title="Emma", authors=[]),
+        ]
+    )
+    db_session.flush()
+    db_session.add(
+        BookSimilarCards(
+            book_id="1",
+            cards=[{"id": "2", "title": "Stale", "author": None, "small_image_url": None}],
+            recs_version="v1",
+        )
+    )
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+    cards = repo.get_book_cards(BookId("1"), ["2", "3", "missing"])
+
+    # "2" comes from the precomputed shelf; "3" is not on it and is read from books.
+    assert cards == {
+        "2": {"id": "2", "title": "Stale", "author": None, "small_image_url": None},
+        "3": {"id": "3", "title": "Emma", "author": None, "small_image_url": None},
+    }
+    assert repo.get_book_cards(BookId("2"), ["2"]) == {
+        "2": {
+            "id": "2",
+            "title": "Foundation",
+            "author": "Isaac Asimov",
+            "small_image_url": "f.jpg",
+        }
+    }
+    assert repo.get_book_cards(BookId("1"), []) == {}
+
+
+def test_get_similar_lookup_decodes_numeric_ids_into_packed_arrays(db_session: Session):
+    db_session.add_all(
+        [
+            Book(id="1", title="Dune"),
+            Book(id="book-2", title="Foundation"),
+            BookSimilarity(book_id="1", neighbor_ids=["20", "3"]),
+            BookSimilarity(book_id="book-2", neighbor_ids=["book-1"]),
+            BookPopularity(scope="global", book_ids=["7"]),
+        ]
+    )
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+    packed = repo.get_similar_lookup(BookId("1"))
+    fallback = repo.get_similar_lookup(BookId("book-2"))
+
+    assert packed is not None
+    assert isinstance(packed.neighbor_ids, PackedBookIds)
+    assert packed.neighbor_ids.ints.tolist() == [20, 3]
+    assert isinstance(packed.popularity_ids, PackedBookIds)
+    assert fallback is not None
+    assert fallback.neighbor_ids == ["book-1"]
+
+
+def test_read_fails_over_to_fallback_session(db_session: Session, tmp_path):
+    db_session.add(Book(id="1", title="Dune"))
+    db_session.flush()
+    unreachable = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    replica = Session(unreachable)
+
+    repo = BooksRepository(replica, fallback_session=db_session)
+    result = repo.get_by_id(BookId("1"))
+
+    assert result is not None
+    assert result.title == "Dune"
+    assert repo.session is db_session
+    assert repo.fallback_session is None
+    replica.close()
+    unreachable.dispose()
+
+
+def test_read_without_fallback_raises(tmp_path):
+    unreachable = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    replica = Session(unreachable)
+
+    repo = BooksRepository(replica)
+
+    with pytest.raises(OperationalError):
+        repo.get_by_id(BookId("1"))
+    replica.close()
+    unreachable.dispose()
+
+
+def test_read_past_the_deadline_raises_without_querying(db_session: Session):
+    repo = BooksRepository(db_session)
+
+    with deadline(0.0), pytest.raises(DeadlineExceeded):
+        repo.get_by_id(BookId("1"))
+
+
+def test_open_breaker_fails_reads_fast_and_failures_trip_it(tmp_path):
+    unreachable = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    session = Session(unreachable)
+    breaker = CircuitBreaker("books", failure_threshold=1)
+    repo = BooksRepository(session, breaker=breaker)
+
+    with pytest.raises(OperationalError):
+        repo.get_by_id(BookId("1"))
+    with pytest.raises(CircuitOpenError):
+        repo.get_by_id(BookId("1"))
+
+    assert breaker.stats().failures == 1
+    assert breaker.stats().rejected == 1
+    session.close()
+    unreachable.dispose()
+
+
+class _QueryCanceled(Exception):
+    sqlstate = "57014"
+
+
+def test_cancelled_statement_raises_deadline_exceeded_without_failover(db_session: Session):
+    replica = create_autospec(Session, instance=True, spec_set=True)
+    replica.get.side_effect = OperationalError("SELECT", {}, _QueryCanceled())
+    repo = BooksRepository(replica, fallback_session=db_session)
+
+    with pytest.raises(DeadlineExceeded):
+        repo.get_by_id(BookId("1"))
+
+    replica.rollback.assert_called_once_with()
+    assert repo.session is replica
+    assert repo.fallback_session is db_session
+
+
+def test_reads_cancelled_at_the_deadline_do_not_trip_the_breaker():
+    clock_now = [0.0]
+    breaker = CircuitBreaker(
+        "books", failure_threshold=1, open_seconds=10, clock=lambda: clock_now[0]
+    )
+    session = create_autospec(Session, instance=True, spec_set=True)
+    session.get.side_effect = OperationalError("SELECT", {}, _QueryCanceled())
+    repo = BooksRepository(session, breaker=breaker)
+
+    for _ in range(3):
+        with pytest.raises(DeadlineExceeded):
+            repo.get_by_id(BookId("1"))
+    with deadline(0.0), pytest.raises(DeadlineExceeded):
+        repo.get_by_id(BookId("1"))
+    assert breaker.stats().state == "closed"
+    assert breaker.stats().failures == 0
+
+    # A half-open probe cut short by its deadline frees the probe for the next read.
+    breaker.record_failure()
+    clock_now[0] = 10.0
+    with pytest.raises(DeadlineExceeded):
+        repo.get_by_id(BookId("1"))
+    assert breaker.allow()
+
+
+def test_slow_scans_do_not_trip_the_breaker(db_session: Session):
+    breaker = CircuitBreaker("books", failure_threshold=1, slow_call_seconds=0.0)
+    repo = BooksRepository(db_session, breaker=breaker)
+
+    repo.list_books()
+    repo.count_books()
+    repo.get_catalog_rows()
+    assert breaker.state == "closed"
+
+    repo.get_by_id(BookId("1"))
+    assert breaker.state == "open"
+
+
+def _postgres_session() -> Session:
+    session = create_autospec(Session, instance=True, spec_set=True)
+    session.get_bind.return_value.dialect.name = "postgresql"
+    session.info = {}
+    session.get.return_value = None
+    return session
+
+
+def test_statement_timeout_is_set_once_per_transaction_and_deadline():
+    session = _postgres_session()
+    repo = BooksRepository(session)
+
+    repo.get_by_id(BookId("1"))
+    session.execute.assert_not_called()
+
+    with deadline(5.0):
+        repo.get_by_id(BookId("1"))
+        repo.get_by_id(BookId("2"))
+        assert session.execute.call_count == 1
+        assert str(session.execute.call_args.args[0]).startswith("SET LOCAL statement_timeout")
+
+        with narrowed(0.5):
+            repo.get_by_id(BookId("3"))
+        assert session.execute.call_count == 2
+
+        session.get_transaction.return_value = object()
+        repo.get_by_id(BookId("4"))
+        assert session.execute.call_count == 3
+
+
+def test_list_books_filters_through_genre_index(db_session: Session):
+    dune = Book(id="1", title="Dune", genres=["sci-fi", "classic"])
+    db_session.add_all([dune, Book(id="2", title="Emma", genres=["classic"])])
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+    assert [book.id for book in repo.list_books(genre="classic")] == ["1", "2"]
+    assert repo.count_books(genre="classic") == 2
+
+    dune.genres = ["sci-fi"]
+    db_session.flush()
+
+    assert [book.id for book in repo.list_books(genre="classic")] == ["2"]
+    assert repo.count_books(genre="classic") == 1
+    assert repo.count_books(genre="sci-fi") == 1
+
+
+def test_list_books_continues_after_keyset(db_session: Session):
+    db_session.add_all(
+        [Book(id=book_id, title=book_id, genres=["g"]) for book_id in ("3", "1", "4", "2")]
+    )
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+
+    assert [book.id for book in repo.list_books(limit=2)] == ["1", "2"]
+    assert [book.id for book in repo.list_books(limit=2, after_id="2")] == ["3", "4"]
+    assert [book.id for book in repo.list_books(limit=2, genre="g", after_id="3")] == ["4"]
+
+
+def test_count_books_prefers_stored_counts(db_session: Session):
+    db_session.add_all(
+        [
+            Book(id="1", title="Dune", genres=["sci-fi"]),
+            BookCount(scope="all", count=10_000),
+            BookCount(scope="genre:sci-fi", count=4_200),
+        ]
+    )
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+
+    assert repo.count_books() == 10_000
+    assert repo.count_books(genre="sci-fi") == 4_200
+    assert repo.count_books(genre="fantasy") == 0
+
+
+def test_search_books_ranks_title_matches_first(db_session: Session):
+    db_session.add_all(
+        [
+            Book(id="1", title="Emma", description="A novel about a desert planet."),
+            Book(id="2", title="Dune", authors=["Frank Herbert"], description="Desert planet."),
+            Book(id="3", title="Foundation", authors=["Isaac Asimov"]),
+        ]
+    )
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+    matches = repo.search_books("desert planets")
+
+    assert [match.book.id for match in matches] == ["2", "1"]
+    assert matches[0].rank > matches[1].rank
+    assert [match.book.id for match in repo.search_books("herbert")] == ["2"]
+    assert repo.search_books("?!") == []
+
+    rest = repo.search_books("desert planets", after=(matches[0].rank, "2"))
+    assert [match.book.id for match in rest] == ["1"]
+
+
+def test_search_books_follows_catalog_updates(db_session: Session):
+    book = Book(id="1", title="Dune")
+    db_session.add(book)
+    db_session.flush()
+
+    book.title = "Children of Dune"
+    book.original_title = "Children of Dune"
+    db_session.flush()
+
+    repo = BooksRepository(db_session)
+    assert [match.book.id for match in repo.search_books("children")] == ["1"]
+
+    db_session.delete(book)
+    db_session.flush()
+    assert repo.search_books("dune") == []
@@ -0,0 +1,141 @@
+from books_rec_api.cache import (
+    CachedNeighbors,
+    CachedPopularity,
+    CachedSimilarResponse,
+    CacheStats,
+    LastKnownGood,
+    SimilarBooksCache,
+    VersionedLRUCache,
+    VersionedSnapshot,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_versioned_cache_hit_and_miss() -> None:
+    cache: VersionedLRUCache[str, int] = VersionedLRUCache(max_entries=2, ttl_seconds=60)
+
+    assert cache.get("v1", "a") is None
+    cache.put("v1", "a", 1)
+
+    assert cache.get("v1", "a") == 1
+    assert cache.stats() == CacheStats(hits=1, misses=1, size=1)
+
+
+def test_versioned_cache_evicts_least_recently_used() -> None:
+    cache: VersionedLRUCache[str, int] = VersionedLRUCache(max_entries=2, ttl_seconds=60)
+    cache.put("v1", "a", 1)
+    cache.put("v1", "b", 2)
+    assert cache.get("v1", "a") == 1
+
+    cache.put("v1", "c", 3)
+
+    assert cache.get("v1", "b") is None
+    assert cache.get("v1", "a") == 1
+    assert cache.get("v1", "c") == 3
+    assert cache.stats().evictions == 1
+
+
+def test_versioned_cache_expires_entries_after_ttl() -> None:
+    clock = FakeClock()
+    cache: VersionedLRUCache[str, int] = VersionedLRUCache(
+        max_entries=2, ttl_seconds=10, clock=clock
+    )
+    cache.put("v1", "a", 1)
+
+    clock.now = 10.0
+
+    assert cache.get("v1", "a") is None
+    stats = cache.stats()
+    assert stats.expirations == 1
+    assert stats.size == 0
+
+
+def test_versioned_cache_new_version_invalidates_all_entries() -> None:
+    cache: VersionedLRUCache[str, int] = VersionedLRUCache(max_entries=10, ttl_seconds=60)
+    cache.put("v1", "a", 1)
+    cache.put("v1", "b", 2)
+
+    assert cache.get("v2", "a") is None
+
+    cache.put("v2", "c", 3)
+
+    assert cache.version == "v2"
+    assert cache.get("v2", "a") is None
+    assert cache.get("v1", "b") is None
+    assert cache.get("v2", "c") == 3
+    assert cache.stats().invalidations == 1
+
+
+def test_similar_books_cache_throttles_version_checks() -> None:
+    clock = FakeClock()
+    cache = SimilarBooksCache(max_entries=10, ttl_seconds=60, version_check_seconds=5, clock=clock)
+
+    assert cache.fresh_version() is None
+    cache.record_version("v1")
+    clock.now = 4.0
+    assert cache.fresh_version() == "v1"
+    clock.now = 5.0
+    assert cache.fresh_version() is None
+
+
+def test_cached_similar_response_splices_trace_id() -> None:
+    cached = CachedSimilarResponse(prefix=b'{"trace_id":', suffix=b"}", etag='"e"', log_fields={})
+
+    assert cached.render("t-1") == b'{"trace_id":"t-1"}'
+    assert cached.render('a"b') == b'{"trace_id":"a\\"b"}'
+
+
+def test_similar_books_cache_response_cache_is_optional() -> None:
+    disabled = SimilarBooksCache(max_entries=10, ttl_seconds=60, version_check_seconds=5)
+    enabled = SimilarBooksCache(
+        max_entries=10, ttl_seconds=60, version_check_seconds=5, response_max_entries=2
+    )
+
+    assert disabled.responses is None
+    assert enabled.responses is not None
+
+
+def test_versioned_snapshot_rechecks_version_and_replaces_value() -> None:
+    clock = FakeClock()
+    holder: VersionedSnapshot[str] = VersionedSnapshot(check_seconds=10, clock=clock)
+
+    assert holder.fresh() is None
+    holder.install("v1", "catalog-v1")
+    assert holder.fresh() == "catalog-v1"
+
+    clock.now = 10
+    assert holder.fresh() is None
+    assert holder.record_version("v1") == "catalog-v1"
+    assert holder.fresh() == "catalog-v1"
+
+    clock.now = 20
+    assert holder.record_version("v2") is None
+    # The stale value stays readable until the new one is installed.
+    assert holder.current == "catalog-v1"
+    holder.install("v2", "catalog-v2")
+    assert holder.fresh() == "catalog-v2"
+
+    holder.clear()
+    assert holder.current is None and holder.fresh() is None
+
+
+def test_last_known_good_keeps_recent_anchors_across_versions() -> None:
+    lkg = LastKnownGood(max_entries=2)
+    for book_id, version in (("a", "v1"), ("b", "v1"), ("c", "v2")):
+        lkg.put_neighbors(book_id, CachedNeighbors((book_id,), "meta_v0", version))
+    lkg.put_popularity(CachedPopularity(book_ids=("p",), recs_version="pop_v1"))
+
+    assert lkg.neighbors("a") is None
+    assert lkg.neighbors("b") == CachedNeighbors(("b",), "meta_v0", "v1")
+    assert len(lkg) == 2
+    assert lkg.popularity is not None and lkg.popularity.book_ids == ("p",)
+
+    lkg.clear()
+    assert len(lkg) == 0 and lkg.popularity is None
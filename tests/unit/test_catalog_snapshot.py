@@ -0,0 +1,69 @@
+from sqlalchemy.orm import Session
+
+from books_rec_api.catalog_snapshot import CATALOG_COLUMNS, CatalogSnapshot
+from books_rec_api.fieldsets import BOOK_FIELDS
+from books_rec_api.models import Book
+from books_rec_api.repositories.books_repository import BooksRepository
+from books_rec_api.schemas.book import BookRead
+
+
+def make_snapshot() -> CatalogSnapshot:
+    return CatalogSnapshot(
+        [
+            ("3", "Emma", ["Jane Austen"], ["classic", "romance"], 1815, None),
+            ("1", "Dune", ["Frank Herbert"], ["sci-fi"], 1965, "Arrakis."),
+            ("2", "Foundation", ["Isaac Asimov"], ["sci-fi", "classic", "classic", ""], 1951, None),
+        ]
+    )
+
+
+def test_snapshot_covers_every_book_read_field() -> None:
+    assert set(CATALOG_COLUMNS) == set(BOOK_FIELDS)
+
+    book = make_snapshot().get("1")
+
+    assert book is not None
+    assert BookRead.model_validate(book).model_dump() == {
+        "id": "1",
+        "title": "Dune",
+        "authors": ["Frank Herbert"],
+        "genres": ["sci-fi"],
+        "publication_year": 1965,
+        "description": "Arrakis.",
+    }
+
+
+def test_snapshot_lookup_counts_and_pages_in_id_order() -> None:
+    snapshot = make_snapshot()
+
+    assert snapshot.get("missing") is None
+    assert len(snapshot) == snapshot.count() == 3
+    assert snapshot.count("classic") == 2
+    assert snapshot.count("") == 3
+    assert snapshot.count("unknown") == 0
+    assert [b.id for b in snapshot.list_books(limit=2)] == ["1", "2"]
+    assert [b.id for b in snapshot.list_books(limit=2, offset=2)] == ["3"]
+    assert [b.id for b in snapshot.list_books(limit=5, genre="classic")] == ["2", "3"]
+    assert [b.id for b in snapshot.list_books(limit=5, genre="classic", after_id="2")] == ["3"]
+    assert [b.id for b in snapshot.list_books(limit=5, after_id="0")] == ["1", "2", "3"]
+    assert snapshot.list_books(limit=5, genre="unknown") == []
+
+
+def test_snapshot_pages_match_the_repository(db_session: Session) -> None:
+    db_session.add_all(
+        [
+            Book(id=str(i), title=f"Book {i}", genres=["odd" if i % 2 else "even", "all"])
+            for i in range(1, 13)
+        ]
+    )
+    db_session.flush()
+    repo = BooksRepository(db_session)
+    snapshot = CatalogSnapshot(repo.get_catalog_rows())
+
+    for genre in (None, "odd", "all"):
+        for after_id in (None, "1", "10", "5"):
+            for offset in (0, 3):
+                expected = repo.list_books(limit=4, offset=offset, genre=genre, after_id=after_id)
+                page = snapshot.list_books(limit=4, offset=offset, genre=genre, after_id=after_id)
+                assert [b.id for b in page] == [b.id for b in expected]
+        assert snapshot.count(genre) == repo.count_books(genre=genre)
@@ -0,0 +1,126 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from books_rec_api.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakerStats,
+    CircuitOpenError,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def fail(breaker: CircuitBreaker) -> None:
+    with pytest.raises(OperationalError), breaker.guard():
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+
+def test_breaker_opens_after_consecutive_failures_and_fails_fast() -> None:
+    breaker = CircuitBreaker("books", failure_threshold=2, open_seconds=10, clock=FakeClock())
+
+    fail(breaker)
+    with breaker.guard():
+        pass
+    fail(breaker)
+    assert breaker.state == CLOSED
+    fail(breaker)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError), breaker.guard():
+        pytest.fail("the read must not run while the breaker is open")
+    assert breaker.stats() == CircuitBreakerStats(
+        name="books",
+        state=OPEN,
+        consecutive_failures=2,
+        failures=3,
+        slow_calls=0,
+        rejected=1,
+        opened=1,
+    )
+
+
+def test_slow_calls_count_as_failures() -> None:
+    breaker = CircuitBreaker("books", failure_threshold=2, slow_call_seconds=0.5)
+
+    breaker.record_success(0.6)
+    breaker.record_success(0.7)
+
+    assert breaker.state == OPEN
+    assert breaker.stats().slow_calls == 2
+    assert breaker.stats().failures == 0
+
+
+def test_untimed_calls_only_fail_by_raising() -> None:
+    breaker = CircuitBreaker("books", failure_threshold=1, slow_call_seconds=0.0)
+
+    with breaker.guard(timed=False):
+        pass
+    assert breaker.state == CLOSED
+
+    with breaker.guard():
+        pass
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker("books", failure_threshold=1, open_seconds=10, clock=clock)
+    fail(breaker)
+
+    clock.now = 10.0
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success(0.01)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_for_another_period() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker("books", failure_threshold=3, open_seconds=10, clock=clock)
+    for _ in range(3):
+        fail(breaker)
+
+    clock.now = 10.0
+    fail(breaker)
+
+    assert breaker.state == OPEN
+    clock.now = 19.0
+    assert not breaker.allow()
+    clock.now = 20.0
+    assert breaker.allow()
+    assert breaker.stats().opened == 2
+
+
+def test_unrelated_errors_free_the_probe_without_changing_state() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker("books", failure_threshold=1, open_seconds=10, clock=clock)
+    fail(breaker)
+    clock.now = 10.0
+
+    with pytest.raises(ValueError), breaker.guard():
+        raise ValueError("not a database error")
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_read_started_before_opening_does_not_close_the_breaker() -> None:
+    breaker = CircuitBreaker("books", failure_threshold=1)
+    assert breaker.allow()
+    fail(breaker)
+
+    breaker.record_success(0.01)
+
+    assert breaker.state == OPEN
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from books_rec_api.deadline import (
+    MIN_STATEMENT_TIMEOUT_MS,
+    DeadlineExceeded,
+    deadline,
+    narrowed,
+    parse_timeout,
+    remaining,
+    request_timeout,
+    statement_timeout_ms,
+)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("1.5", 1.5), ("2", 2.0), (None, None), ("", None), ("0", None), ("-1", None), ("x", None)],
+)
+def test_parse_timeout(value: str | None, expected: float | None) -> None:
+    assert parse_timeout(value) == expected
+
+
+def test_request_timeout_prefers_the_header_and_caps_it() -> None:
+    assert request_timeout("0.5", default=2.0, maximum=30.0) == 0.5
+    assert request_timeout("nan", default=2.0, maximum=30.0) == 2.0
+    assert request_timeout("60", default=0.0, maximum=30.0) == 30.0
+    assert request_timeout(None, default=0.0, maximum=30.0) is None
+    assert request_timeout("60", default=0.0, maximum=0.0) == 60.0
+    assert request_timeout("0.001", default=2.0, maximum=30.0, minimum=0.1) == 0.1
+    assert request_timeout(None, default=0.05, maximum=30.0, minimum=0.1) == 0.1
+
+
+def test_statement_timeout_follows_the_remaining_budget() -> None:
+    assert statement_timeout_ms() is None
+
+    with deadline(2.0):
+        timeout_ms = statement_timeout_ms()
+        assert timeout_ms is not None and 1900 < timeout_ms <= 2000
+
+    with deadline(0.002):
+        assert statement_timeout_ms() == MIN_STATEMENT_TIMEOUT_MS
+        time.sleep(0.003)
+        with pytest.raises(DeadlineExceeded):
+            statement_timeout_ms()
+
+    assert remaining() is None
+
+
+def test_narrowed_gives_a_share_of_the_remaining_budget() -> None:
+    with narrowed(0.5):
+        assert remaining() is None
+
+    with deadline(2.0), narrowed(0.25):
+        left = remaining()
+        assert left is not None and 0.4 < left <= 0.5
@@ -0,0 +1,35 @@
+import pytest
+
+from books_rec_api.fieldsets import (
+    BOOK_FIELDS,
+    InvalidFieldsError,
+    book_columns,
+    parse_book_fields,
+    sparse_book_model,
+    sparse_page_model,
+)
+
+
+def test_parse_book_fields_always_includes_id() -> None:
+    assert parse_book_fields(None) is None
+    assert parse_book_fields(" title, authors ,") == frozenset({"id", "title", "authors"})
+
+
+@pytest.mark.parametrize("raw", ["", " , ", "title,isbn"])
+def test_parse_book_fields_rejects_empty_and_unknown(raw: str) -> None:
+    with pytest.raises(InvalidFieldsError):
+        parse_book_fields(raw)
+
+
+def test_book_columns_follow_book_read_order() -> None:
+    assert book_columns(None) == BOOK_FIELDS
+    assert book_columns(frozenset({"id", "description", "title"})) == ("title", "description", "id")
+
+
+def test_sparse_models_are_cached_per_fieldset() -> None:
+    fields = frozenset({"id", "title"})
+
+    assert sparse_book_model(fields) is sparse_book_model(frozenset({"title", "id"}))
+    assert set(sparse_book_model(fields).model_fields) == {"id", "title"}
+    page = sparse_page_model(fields)(items=[{"id": "1", "title": "Dune"}], total=1, page=1, size=20)
+    assert page.model_dump()["items"] == [{"title": "Dune", "id": "1"}]
@@ -1,12 +1,17 @@
 from decimal import Decimal
 
 import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
+from books_rec_api.models import Book, BookCount, BookGenre
 from scripts.goodbooks_books_importer import (
     map_book_row,
     parse_listish,
     parse_optional_decimal,
     parse_optional_int,
+    refresh_book_counts,
+    sync_book_genres,
 )
 
 
@@ -69,3 +74,32 @@ def test_map_book_row_enriched_shape() -> None:
 def test_map_book_row_requires_title() -> None:
     with pytest.raises(ValueError, match="title is required"):
         map_book_row({"book_id": "10", "title": ""})
+
+
+def test_sync_book_genres_rewrites_index_rows(db_session: Session) -> None:
+    db_session.add_all([Book(id="1", title="Dune", genres=["sci-fi"]), Book(id="2", title="Emma")])
+    db_session.flush()
+
+    sync_book_genres(
+        db_session,
+        [{"id": "1", "genres": ["classic", "classic", ""]}, {"id": "2", "genres": ["romance"]}],
+    )
+
+    rows = db_session.execute(select(BookGenre.book_id, BookGenre.genre)).all()
+    assert sorted(rows) == [("1", "classic"), ("2", "romance")]
+
+
+def test_refresh_book_counts_replaces_stored_counts(db_session: Session) -> None:
+    db_session.add_all(
+        [
+            Book(id="1", title="Dune", genres=["sci-fi", "classic"]),
+            Book(id="2", title="Emma", genres=["classic"]),
+            BookCount(scope="genre:stale", count=99),
+        ]
+    )
+    db_session.flush()
+
+    refresh_book_counts(db_session)
+
+    rows = db_session.execute(select(BookCount.scope, BookCount.count)).all()
+    assert sorted(rows) == [("all", 2), ("genre:classic", 2), ("genre:sci-fi", 1)]
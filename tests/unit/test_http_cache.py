@@ -0,0 +1,39 @@
+import pytest
+
+from books_rec_api.http_cache import content_etag, etag_matches, json_response
+
+
+def test_content_etag_is_stable_and_quoted() -> None:
+    etag = content_etag(b"ab", b"c")
+
+    assert etag == content_etag(b"abc")
+    assert etag != content_etag(b"abd")
+    assert etag.startswith('"') and etag.endswith('"')
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (None, False),
+        ("", False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"x", "abc"', True),
+        ('"x"', False),
+        ("*", True),
+    ],
+)
+def test_etag_matches(header: str | None, expected: bool) -> None:
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_json_response_returns_304_for_matching_etag() -> None:
+    fresh = json_response(b"{}", None, "public, max-age=60")
+    revalidated = json_response(b"{}", fresh.headers["etag"], "public, max-age=60")
+
+    assert fresh.status_code == 200
+    assert fresh.body == b"{}"
+    assert fresh.headers["cache-control"] == "public, max-age=60"
+    assert revalidated.status_code == 304
+    assert revalidated.body == b""
+    assert revalidated.headers["etag"] == fresh.headers["etag"]
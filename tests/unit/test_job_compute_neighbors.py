@@ -1,14 +1,24 @@
 import contextlib
 from collections.abc import Iterator
+from pathlib import Path
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from books_rec_api.models import Book, BookSimilarity
+from books_rec_api.models import (
+    NEIGHBORS_RECS_VERSION,
+    Book,
+    BookPopularity,
+    BookSimilarCards,
+    BookSimilarity,
+    PublishedRecsVersion,
+)
+from books_rec_api.neighbors_artifact import CURRENT_ARTIFACT_NAME, NeighborsArtifact
 from scripts.job_compute_neighbors import (
     compute_jaccard,
     compute_neighbors,
     normalize_metadata,
+    shelf_ids,
 )
 
 
@@ -77,3 +87,71 @@ def test_compute_neighbors(db_session: Session) -> None:
     assert "b1" not in s1.neighbor_ids
 
     assert len(s1.neighbor_ids) <= 2
+
+
+def test_shelf_ids_appends_popularity_without_anchor_or_duplicates() -> None:
+    assert shelf_ids("b1", ["b2"], ["b1", "b2", "b3", "b4"], k=3) == ["b2", "b3", "b4"]
+    assert shelf_ids("b1", ["b2", "b3"], ["b4"], k=1) == ["b2"]
+
+
+def test_compute_neighbors_stores_card_shelves(db_session: Session) -> None:
+    db_session.add_all(
+        [
+            Book(id="b1", title="Book 1", authors=["A1", "A2"], genres=["G1"], source="goodbooks"),
+            Book(
+                id="b2",
+                title="Book 2",
+                authors=["A1"],
+                genres=["G1"],
+                small_image_url="b2.jpg",
+                source="goodbooks",
+            ),
+            Book(id="b3", title="Book 3", authors=[], genres=["G9"], source="goodbooks"),
+            BookPopularity(scope="global", book_ids=["b3", "missing"], recs_version="pop_v1"),
+        ]
+    )
+    db_session.commit()
+
+    @contextlib.contextmanager
+    def test_session_factory() -> Iterator[Session]:
+        yield db_session
+
+    compute_neighbors(k=3, session_factory=test_session_factory)
+
+    shelf = db_session.get(BookSimilarCards, "b1")
+    assert shelf is not None
+    assert shelf.cards == [
+        {"id": "b2", "title": "Book 2", "author": "A1", "small_image_url": "b2.jpg"},
+        {"id": "b3", "title": "Book 3", "author": None, "small_image_url": None},
+    ]
+    similarity = db_session.get(BookSimilarity, "b1")
+    assert similarity is not None and shelf.recs_version == similarity.recs_version
+    published = db_session.get(PublishedRecsVersion, NEIGHBORS_RECS_VERSION)
+    assert published is not None and published.recs_version == similarity.recs_version
+
+
+def test_compute_neighbors_publishes_artifact(db_session: Session, tmp_path: Path) -> None:
+    db_session.add_all(
+        [
+            Book(id="b1", title="Book 1", authors=["A1"], genres=["G1"], source="goodbooks"),
+            Book(id="b2", title="Book 2", authors=["A1"], genres=["G1"], source="goodbooks"),
+            BookPopularity(scope="global", book_ids=["b2", "b1"], recs_version="pop_v1"),
+        ]
+    )
+    db_session.commit()
+
+    @contextlib.contextmanager
+    def test_session_factory() -> Iterator[Session]:
+        yield db_session
+
+    compute_neighbors(k=2, session_factory=test_session_factory, artifact_dir=tmp_path)
+
+    artifact = NeighborsArtifact(tmp_path / CURRENT_ARTIFACT_NAME)
+    try:
+        neighbors = artifact.get_neighbors("b1")
+        assert neighbors is not None
+        assert neighbors.neighbor_ids == ("b2",)
+        assert neighbors.algo_id == "meta_v0"
+        assert artifact.popularity.book_ids == ("b2", "b1")
+    finally:
+        artifact.close()
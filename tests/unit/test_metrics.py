@@ -0,0 +1,151 @@
+import asyncio
+
+from books_rec_api.admission import ConcurrencyLimiter
+from books_rec_api.book_id_filter import BookIdFilterStore
+from books_rec_api.cache import LastKnownGood, SimilarBooksCache
+from books_rec_api.catalog_snapshot import CatalogSnapshot, CatalogSnapshotStore
+from books_rec_api.circuit_breaker import CircuitBreaker
+from books_rec_api.metrics import (
+    MetricFamily,
+    MetricsRegistry,
+    admission_families,
+    book_id_filter_families,
+    catalog_snapshot_families,
+    circuit_breaker_families,
+    pool_families,
+    similar_cache_families,
+    single_flight_families,
+)
+from books_rec_api.pool_metrics import PoolMetrics
+from books_rec_api.single_flight import SingleFlight
+
+
+def test_counter_and_histogram_render_prometheus_text() -> None:
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests_total", "Requests.", labelnames=("route",))
+    latency = registry.histogram("app_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    requests.inc(route='/books/{book_id}"')
+    requests.inc(2, route='/books/{book_id}"')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(3.0)
+
+    lines = registry.render().splitlines()
+
+    assert lines[:3] == [
+        "# HELP app_requests_total Requests.",
+        "# TYPE app_requests_total counter",
+        'app_requests_total{route="/books/{book_id}\\""} 3',
+    ]
+    assert lines[5:] == [
+        'app_latency_seconds_bucket{le="0.1"} 1',
+        'app_latency_seconds_bucket{le="1"} 2',
+        'app_latency_seconds_bucket{le="+Inf"} 3',
+        "app_latency_seconds_sum 3.55",
+        "app_latency_seconds_count 3",
+    ]
+
+
+def test_unlabelled_counter_renders_zero_before_first_increment() -> None:
+    registry = MetricsRegistry()
+    registry.counter("app_errors_total", "Errors.")
+
+    assert "app_errors_total 0" in registry.render().splitlines()
+
+
+def test_collectors_are_read_at_render_time() -> None:
+    registry = MetricsRegistry()
+    values = [1]
+    registry.register_collector(
+        lambda: [MetricFamily("app_items", "gauge", "Items.", [({"kind": "a"}, values[-1])])]
+    )
+
+    values.append(7)
+
+    assert 'app_items{kind="a"} 7' in registry.render().splitlines()
+
+
+def test_source_families_export_pool_cache_and_single_flight_stats() -> None:
+    cache = SimilarBooksCache(max_entries=2, ttl_seconds=60, version_check_seconds=5)
+    cache.neighbors.get("v1", "missing")
+    flights = SingleFlight("books")
+    flights.do("key", lambda: None)
+
+    families = {
+        family.name: family
+        for family in (
+            *pool_families([PoolMetrics("primary")]),
+            *similar_cache_families(cache),
+            *single_flight_families([flights]),
+        )
+    }
+
+    assert families["books_rec_db_pool_checkouts_total"].samples == [({"pool": "primary"}, 0)]
+    # An unbound pool has no size to report.
+    assert families["books_rec_db_pool_size"].samples == []
+    assert ({"cache": "neighbors"}, 1) in families["books_rec_similar_cache_misses_total"].samples
+    assert families["books_rec_single_flight_leaders_total"].samples == [({"group": "books"}, 1)]
+    assert similar_cache_families(None) == []
+
+
+def test_book_id_filter_families_export_size_rate_and_outcomes() -> None:
+    id_filter = BookIdFilterStore(false_positive_rate=0.01)
+    bloom = id_filter.install("3|t1", id_filter.build(["a", "b", "c"]))
+    id_filter.record_rejection()
+
+    families = {family.name: family for family in book_id_filter_families(id_filter)}
+
+    assert families["books_rec_book_id_filter_entries"].samples == [({}, 3)]
+    assert families["books_rec_book_id_filter_bytes"].samples == [({}, bloom.nbytes)]
+    assert families["books_rec_book_id_filter_rejections_total"].samples == [({}, 1)]
+    assert families["books_rec_book_id_filter_false_positives_total"].samples == [({}, 0)]
+    assert book_id_filter_families(None) == []
+
+
+def test_catalog_snapshot_families_export_book_count() -> None:
+    catalog = CatalogSnapshotStore()
+    assert catalog_snapshot_families(catalog)[0].samples == [({}, 0)]
+
+    catalog.install("1|t1|i1", CatalogSnapshot([("1", "Dune", [], [], None, None)]))
+
+    assert catalog_snapshot_families(catalog)[0].samples == [({}, 1)]
+    assert catalog_snapshot_families(None) == []
+
+
+def test_admission_families_export_gauges_and_shed_reasons() -> None:
+    limiter = ConcurrencyLimiter("similar", limit=1)
+    assert asyncio.run(limiter.acquire())
+    assert not asyncio.run(limiter.acquire())
+
+    families = {family.name: family for family in admission_families([limiter])}
+
+    labels = {"route_class": "similar"}
+    assert families["books_rec_admission_limit"].samples == [(labels, 1)]
+    assert families["books_rec_admission_in_flight"].samples == [(labels, 1)]
+    assert families["books_rec_admission_queue_depth"].samples == [(labels, 0)]
+    assert families["books_rec_admission_admitted_total"].samples == [(labels, 1)]
+    assert families["books_rec_admission_shed_total"].samples == [
+        ({**labels, "reason": "queue_full"}, 1),
+        ({**labels, "reason": "timeout"}, 0),
+    ]
+
+
+def test_circuit_breaker_families_export_one_hot_state_and_counters() -> None:
+    breaker = CircuitBreaker("books", failure_threshold=1)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    families = {f.name: f for f in circuit_breaker_families(breaker, LastKnownGood(10))}
+
+    assert families["books_rec_circuit_breaker_state"].samples == [
+        ({"breaker": "books", "state": "closed"}, 0),
+        ({"breaker": "books", "state": "half_open"}, 0),
+        ({"breaker": "books", "state": "open"}, 1),
+    ]
+    assert families["books_rec_circuit_breaker_opened_total"].samples == [({"breaker": "books"}, 1)]
+    assert families["books_rec_circuit_breaker_rejected_total"].samples == [
+        ({"breaker": "books"}, 1)
+    ]
+    assert families["books_rec_last_known_good_anchors"].samples == [({}, 0)]
+    assert circuit_breaker_families(None, None) == []
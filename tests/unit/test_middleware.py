@@ -1,8 +1,14 @@
+import asyncio
+import logging
+
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
+from books_rec_api.admission import SIMILAR, ConcurrencyLimiter
 from books_rec_api.context import eval_request_id_var, eval_run_id_var
-from books_rec_api.middleware import EvalContextMiddleware
+from books_rec_api.deadline import remaining
+from books_rec_api.middleware import AdmissionControlMiddleware, EvalContextMiddleware
+from books_rec_api.server_timing import ServerTiming, timed
 
 
 def test_eval_context_middleware() -> None:
@@ -30,3 +36,96 @@ def test_eval_context_middleware() -> None:
         "eval_run_id": "run-123",
         "eval_request_id": "req-456",
     }
+
+
+def test_eval_context_middleware_reports_server_timing_and_logs(caplog) -> None:
+    app = FastAPI()
+    app.add_middleware(EvalContextMiddleware)
+
+    @app.get("/similar")
+    def read_similar() -> dict:
+        with timed("db"):
+            pass
+        with timed("serialize"):
+            pass
+        return {}
+
+    client = TestClient(app)
+    with caplog.at_level(logging.INFO, logger="books_rec_api.request"):
+        response = client.get("/similar", headers={"X-Request-Id": "req-1"})
+
+    assert response.status_code == 200
+    stages = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+    assert stages == ["db", "serialize", "app"]
+    (record,) = [r for r in caplog.records if r.getMessage() == "http_request_complete"]
+    assert record.request_id == "req-1"
+    assert record.path == "/similar"
+    assert record.status_code == 200
+
+
+def test_server_timing_header_value_accumulates_stages() -> None:
+    timing = ServerTiming()
+    timing.add("db", 0.001)
+    timing.add("db", 0.002)
+
+    assert timing.header_value(0.005) == "db;dur=3.000, app;dur=5.000"
+
+
+def test_eval_context_middleware_starts_the_request_deadline() -> None:
+    app = FastAPI()
+    app.add_middleware(
+        EvalContextMiddleware, default_timeouts={SIMILAR: 2.0}, max_timeout=5.0, min_timeout=0.1
+    )
+
+    @app.get("/books/{book_id}/similar")
+    def read_similar(book_id: str) -> dict:
+        return {"remaining": remaining()}
+
+    @app.get("/books/{book_id}")
+    def read_book(book_id: str) -> dict:
+        return {"remaining": remaining()}
+
+    client = TestClient(app)
+
+    default = client.get("/books/1/similar").json()["remaining"]
+    header = client.get("/books/1/similar", headers={"X-Request-Timeout": "0.5"}).json()
+    capped = client.get("/books/1", headers={"X-Request-Timeout": "60"}).json()
+    floored = client.get("/books/1", headers={"X-Request-Timeout": "0.000001"}).json()
+    assert 1.5 < default <= 2.0
+    assert 0 < header["remaining"] <= 0.5
+    assert 4.5 < capped["remaining"] <= 5.0
+    assert 0.05 < floored["remaining"] <= 0.1
+    assert client.get("/books/1").json() == {"remaining": None}
+
+
+def test_admission_control_middleware_sheds_with_retry_after() -> None:
+    limiter = ConcurrencyLimiter(SIMILAR, limit=1)
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionControlMiddleware, limiters={SIMILAR: limiter}, retry_after_seconds=3
+    )
+    seen: list[int] = []
+
+    @app.get("/books/{book_id}/similar")
+    async def read_similar(book_id: str) -> dict:
+        seen.append(limiter.stats().in_flight)
+        return {"book_id": book_id}
+
+    @app.get("/books/{book_id}")
+    async def read_book(book_id: str) -> dict:
+        return {"book_id": book_id}
+
+    client = TestClient(app)
+    assert client.get("/books/1/similar").status_code == 200
+    assert seen == [1]
+    assert limiter.stats().in_flight == 0
+
+    assert asyncio.run(limiter.acquire())
+    shed = client.get("/books/1/similar")
+    unlimited = client.get("/books/1")
+    limiter.release()
+
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "3"
+    assert unlimited.status_code == 200
+    assert limiter.stats().shed_queue_full == 1
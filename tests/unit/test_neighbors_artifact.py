@@ -0,0 +1,118 @@
+from pathlib import Path
+
+import pytest
+
+from books_rec_api.cache import CachedNeighbors, CachedPopularity
+from books_rec_api.neighbors_artifact import (
+    CURRENT_ARTIFACT_NAME,
+    ArtifactFormatError,
+    NeighborsArtifact,
+    NeighborsArtifactStore,
+    publish_neighbors_artifact,
+    write_neighbors_artifact,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def write_sample(path: Path, recs_version: str = "v1") -> None:
+    write_neighbors_artifact(
+        path,
+        recs_version=recs_version,
+        algo_id="meta_v0",
+        neighbors={"10": ["2", "missing", "1"], "2": ["10"], "1": [], "é": ["1"]},
+        popularity_ids=["1", "missing", "2"],
+        popularity_recs_version="pop_v1",
+    )
+
+
+def test_artifact_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "neighbors.bin"
+    write_sample(path)
+
+    artifact = NeighborsArtifact(path)
+    try:
+        assert len(artifact) == 4
+        assert artifact.recs_version == "v1"
+        assert artifact.algo_id == "meta_v0"
+        assert artifact.get_neighbors("10") == CachedNeighbors(
+            neighbor_ids=("2", "1"), algo_id="meta_v0", recs_version="v1"
+        )
+        assert artifact.get_neighbors("1") == CachedNeighbors(
+            neighbor_ids=(), algo_id="meta_v0", recs_version="v1"
+        )
+        assert artifact.get_neighbors("é") is not None
+        assert artifact.get_neighbors("3") is None
+        assert "2" in artifact
+        assert "missing" not in artifact
+        assert artifact.popularity == CachedPopularity(book_ids=("1", "2"), recs_version="pop_v1")
+    finally:
+        artifact.close()
+
+
+def test_artifact_rejects_foreign_file(tmp_path: Path) -> None:
+    path = tmp_path / "neighbors.bin"
+    path.write_bytes(b"NOPE" + b"\0" * 64)
+
+    with pytest.raises(ArtifactFormatError):
+        NeighborsArtifact(path)
+
+
+def test_publish_repoints_current_artifact(tmp_path: Path) -> None:
+    first = publish_neighbors_artifact(
+        tmp_path, recs_version="2026-01-01T00:00:00Z", algo_id="a", neighbors={"1": []}
+    )
+    second = publish_neighbors_artifact(
+        tmp_path, recs_version="2026-01-02T00:00:00Z", algo_id="a", neighbors={"1": []}
+    )
+
+    current = tmp_path / CURRENT_ARTIFACT_NAME
+    assert first.name == "neighbors-2026-01-01T00-00-00Z.bin"
+    assert first.exists()
+    assert current.resolve() == second.resolve()
+
+    third = publish_neighbors_artifact(
+        tmp_path, recs_version="2026-01-03T00:00:00Z", algo_id="a", neighbors={"1": []}
+    )
+    # The version just replaced stays for workers mid-reload; older ones are removed.
+    assert sorted(path.name for path in tmp_path.glob("neighbors-*.bin")) == [
+        second.name,
+        third.name,
+    ]
+
+
+def test_store_reloads_when_artifact_changes(tmp_path: Path) -> None:
+    clock = FakeClock()
+    store = NeighborsArtifactStore(tmp_path / CURRENT_ARTIFACT_NAME, check_seconds=5, clock=clock)
+
+    assert store.current() is None
+
+    publish_neighbors_artifact(tmp_path, recs_version="v1", algo_id="a", neighbors={"1": []})
+    clock.now = 5.0
+    first = store.current()
+    assert first is not None
+    assert first.recs_version == "v1"
+
+    publish_neighbors_artifact(tmp_path, recs_version="v2", algo_id="a", neighbors={"1": []})
+    clock.now = 6.0
+    assert store.current() is first
+
+    clock.now = 10.0
+    second = store.current()
+    assert second is not None
+    assert second.recs_version == "v2"
+
+
+def test_artifact_rejects_truncated_file(tmp_path: Path) -> None:
+    path = tmp_path / "neighbors.bin"
+    write_sample(path)
+    path.write_bytes(path.read_bytes()[:60])
+
+    with pytest.raises(ArtifactFormatError):
+        NeighborsArtifact(path)
@@ -0,0 +1,58 @@
+import pytest
+
+from books_rec_api.packed_ids import (
+    PackedBookIds,
+    decode_book_ids,
+    encode_book_ids,
+    freeze_book_ids,
+)
+
+
+def test_numeric_ids_round_trip_as_int32() -> None:
+    encoded = encode_book_ids(["10", "2", "0"])
+    decoded = decode_book_ids(encoded)
+
+    assert len(encoded) == 1 + 3 * 4
+    assert isinstance(decoded, PackedBookIds)
+    assert decoded.ints.tolist() == [10, 2, 0]
+    assert list(decoded) == ["10", "2", "0"]
+    assert decoded == ["10", "2", "0"]
+    assert decoded == ("10", "2", "0")
+
+
+@pytest.mark.parametrize("book_ids", [["book-1", "2"], ["007"], ["2147483648"], ["-1"]])
+def test_non_canonical_ids_fall_back_to_json(book_ids: list[str]) -> None:
+    decoded = decode_book_ids(encode_book_ids(book_ids))
+
+    assert not isinstance(decoded, PackedBookIds)
+    assert decoded == book_ids
+
+
+def test_empty_list_round_trips() -> None:
+    assert decode_book_ids(encode_book_ids([])) == []
+    assert decode_book_ids(b"") == []
+
+
+def test_packed_ids_sequence_protocol() -> None:
+    ids = decode_book_ids(encode_book_ids(["5", "6", "7"]))
+
+    assert ids[0] == "5"
+    assert ids[-1] == "7"
+    assert ids[1:] == ["6", "7"]
+    assert "6" in ids
+    assert "06" not in ids
+    assert "book-6" not in ids
+    assert hash(ids) == hash(decode_book_ids(encode_book_ids(["5", "6", "7"])))
+    assert encode_book_ids(ids) == encode_book_ids(["5", "6", "7"])
+
+
+def test_freeze_book_ids_keeps_packed_arrays() -> None:
+    packed = decode_book_ids(encode_book_ids(["1"]))
+
+    assert freeze_book_ids(packed) is packed
+    assert freeze_book_ids(["a", "b"]) == ("a", "b")
+
+
+def test_decode_rejects_unknown_tag() -> None:
+    with pytest.raises(ValueError):
+        decode_book_ids(b"\x07abc")
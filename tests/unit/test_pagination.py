@@ -0,0 +1,22 @@
+import pytest
+
+from books_rec_api.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip() -> None:
+    cursor = encode_cursor("1042", "sci-fi")
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "sci-fi") == "1042"
+    assert decode_cursor(encode_cursor("7", None), None) == "7"
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor!", "bnVsbA", encode_cursor("7", None) + "x"])
+def test_decode_cursor_rejects_malformed(cursor: str) -> None:
+    with pytest.raises(InvalidCursorError, match="Malformed"):
+        decode_cursor(cursor, None)
+
+
+def test_decode_cursor_rejects_other_genre() -> None:
+    with pytest.raises(InvalidCursorError, match="different genre"):
+        decode_cursor(encode_cursor("7", "sci-fi"), "fantasy")
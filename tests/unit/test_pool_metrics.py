@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from books_rec_api.database import engine_options, engine_pool_metrics
+from books_rec_api.pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    PoolMetrics,
+    instrument_engine,
+)
+
+
+def test_engine_options_apply_pool_settings_outside_sqlite() -> None:
+    options = engine_options("postgresql+psycopg://u:p@localhost/db", InstrumentedQueuePool)
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping"} <= set(
+        options
+    )
+    assert engine_options("sqlite:///:memory:", InstrumentedQueuePool) == {}
+    assert engine_pool_metrics("primary", options).max_overflow == options["max_overflow"]
+    assert engine_pool_metrics("primary", {}).max_overflow is None
+
+
+def test_pool_metrics_track_checkouts_waits_and_timeouts(tmp_path: Path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    metrics = PoolMetrics("primary", max_overflow=0)
+    instrument_engine(engine, metrics)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        busy = metrics.snapshot()
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    idle = metrics.snapshot()
+    assert busy.checked_out == 1
+    assert busy.size == 1
+    assert busy.max_overflow == 0
+    assert idle.checked_out == 0
+    assert idle.connects == 1
+    assert idle.checkouts == idle.checkins == 1
+    assert idle.timeouts == idle.waits == 1
+    assert idle.wait_seconds_total >= 0.05
+    assert idle.checkout_max_ms >= idle.checkout_p50_ms >= 0.0
+
+
+def test_pool_metrics_follow_pool_recreated_by_dispose(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool)
+    metrics = PoolMetrics("primary")
+    instrument_engine(engine, metrics)
+
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert metrics.snapshot().checkouts == 1
+    assert len(metrics._latencies) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_pool_metrics(tmp_path: Path) -> None:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedAsyncQueuePool
+    )
+    metrics = PoolMetrics("async")
+    instrument_engine(engine.sync_engine, metrics)
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await engine.dispose()
+
+    snapshot = metrics.snapshot()
+    assert snapshot.pool_class == "InstrumentedAsyncQueuePool"
+    assert snapshot.checkouts == 1
@@ -0,0 +1,81 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from books_rec_api.profiling import ProfileBusyError, profile_allocations, profile_stacks
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def _park(stop: threading.Event) -> None:
+    stop.wait()
+
+
+@pytest.mark.asyncio
+async def test_cpu_profile_keeps_busy_threads_and_wall_keeps_parked_ones() -> None:
+    stop = threading.Event()
+    threads = [threading.Thread(target=target, args=(stop,)) for target in (_spin, _park)]
+    for thread in threads:
+        thread.start()
+    try:
+        cpu = await profile_stacks(0.2, interval=0.005, include_idle=False)
+        wall = await profile_stacks(0.2, interval=0.005, include_idle=True)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert "test_profiling:_spin" in cpu
+    assert "test_profiling:_park" not in cpu
+    assert "test_profiling:_park;threading:wait" in wall
+    stack, count = cpu.splitlines()[0].rsplit(" ", 1)
+    assert stack.startswith("threading:_bootstrap") and int(count) > 0
+
+
+def _read(sock: socket.socket) -> None:
+    sock.recv(1)
+
+
+@pytest.mark.asyncio
+async def test_cpu_profile_leaves_out_threads_blocked_in_socket_reads() -> None:
+    reader, writer = socket.socketpair()
+    thread = threading.Thread(target=_read, args=(reader,))
+    thread.start()
+    try:
+        cpu = await profile_stacks(0.1, interval=0.005, include_idle=False)
+    finally:
+        writer.send(b"x")
+        thread.join()
+        reader.close()
+        writer.close()
+
+    assert "test_profiling:_read" not in cpu
+
+
+@pytest.mark.asyncio
+async def test_alloc_profile_reports_allocation_sites() -> None:
+    retained: list[list[bytearray]] = []
+
+    async def allocate() -> None:
+        await asyncio.sleep(0.05)
+        retained.append([bytearray(1024) for _ in range(500)])
+
+    report, _ = await asyncio.gather(profile_allocations(0.2, limit=5), allocate())
+
+    assert report.startswith("# top 5 allocation sites")
+    assert "test_profiling.py" in report
+
+
+@pytest.mark.asyncio
+async def test_only_one_session_runs_at_a_time() -> None:
+    first = asyncio.create_task(profile_stacks(0.1, interval=0.01, include_idle=True))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ProfileBusyError):
+        await profile_allocations(0.1, limit=1)
+    await first
@@ -0,0 +1,10 @@
+from books_rec_api.search_index import fts5_match_expression
+
+
+def test_fts5_match_expression_quotes_every_word() -> None:
+    assert fts5_match_expression('Dune "NEAR" title:herbert*') == '"Dune" "NEAR" "title" "herbert"'
+    assert fts5_match_expression("Grandpré") == '"Grandpré"'
+
+
+def test_fts5_match_expression_without_words() -> None:
+    assert fts5_match_expression("  -*?! ") is None
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from books_rec_api.deadline import DeadlineExceeded
+from books_rec_api.single_flight import AsyncSingleFlight, SingleFlight, SingleFlightStats
+
+
+def test_single_flight_shares_one_fetch_between_concurrent_callers() -> None:
+    flights = SingleFlight("books")
+    release = threading.Event()
+    calls: list[str] = []
+
+    def fetch() -> str:
+        calls.append("fetch")
+        release.wait(timeout=5)
+        return "row"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flights.do, ("similar", "1", "v1"), fetch) for _ in range(4)]
+        while flights.stats().leaders + flights.stats().coalesced < 4:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert results == ["row"] * 4
+    assert calls == ["fetch"]
+    assert flights.stats() == SingleFlightStats(name="books", leaders=1, coalesced=3, in_flight=0)
+
+
+def test_single_flight_propagates_errors_and_does_not_retain_results() -> None:
+    flights = SingleFlight("books")
+
+    def fail() -> str:
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError, match="db down"):
+        flights.do("key", fail)
+
+    # Completed fetches are forgotten, so the next call runs again.
+    assert flights.do("key", lambda: "row") == "row"
+    assert flights.stats().leaders == 2
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight_shares_one_fetch() -> None:
+    flights = AsyncSingleFlight("books_async")
+    calls = 0
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "row"
+
+    results = await asyncio.gather(*(flights.do(("book", "1"), fetch) for _ in range(5)))
+
+    assert results == ["row"] * 5
+    assert calls == 1
+    assert flights.stats() == SingleFlightStats(
+        name="books_async", leaders=1, coalesced=4, in_flight=0
+    )
+
+
+def test_single_flight_follower_waits_no_longer_than_its_timeout() -> None:
+    flights = SingleFlight("books")
+    release = threading.Event()
+
+    def fetch() -> str:
+        release.wait(timeout=5)
+        return "row"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(flights.do, "key", fetch)
+        while flights.stats().in_flight < 1:
+            time.sleep(0.001)
+        with pytest.raises(DeadlineExceeded):
+            flights.do("key", fetch, timeout=0.01)
+        release.set()
+        assert leader.result(timeout=5) == "row"
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight_follower_waits_no_longer_than_its_timeout() -> None:
+    flights = AsyncSingleFlight("books_async")
+    release = asyncio.Event()
+
+    async def fetch() -> str:
+        await release.wait()
+        return "row"
+
+    leader = asyncio.create_task(flights.do("key", fetch))
+    await asyncio.sleep(0)
+    with pytest.raises(DeadlineExceeded):
+        await flights.do("key", fetch, timeout=0.01)
+    release.set()
+    assert await leader == "row"
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight_survives_cancelled_leader() -> None:
+    flights = AsyncSingleFlight("books_async")
+    started = asyncio.Event()
+
+    async def fetch() -> str:
+        started.set()
+        await asyncio.sleep(0.01)
+        return "row"
+
+    leader = asyncio.create_task(flights.do("key", fetch))
+    await started.wait()
+    follower = asyncio.create_task(flights.do("key", fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "row"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
@@ -4,6 +4,7 @@ from unittest.mock import MagicMock
 import pytest
 from pydantic import ValidationError
 
+from books_rec_api.metrics import telemetry_events_duplicate, telemetry_events_inserted
 from books_rec_api.repositories.telemetry_repository import TelemetryInsertResult
 from books_rec_api.schemas.telemetry import (
     EventBatchRequest,
@@ -178,6 +179,8 @@ def test_telemetry_service_process_events(caplog):
         inserted_count=1, duplicate_count=0
     )
     service = TelemetryService(repo=repo)
+    inserted_before = telemetry_events_inserted.value()
+    duplicate_before = telemetry_events_duplicate.value()
     event = SimilarClickEvent(
         event_name="similar_click",
         ts=datetime(2026, 2, 25, 19, 0, 0, tzinfo=UTC),
@@ -198,6 +201,8 @@ def test_telemetry_service_process_events(caplog):
     assert result.inserted_count == 1
     assert result.duplicate_count == 0
     repo.bulk_insert_events.assert_called_once_with([event])
+    assert telemetry_events_inserted.value() == inserted_before + 1
+    assert telemetry_events_duplicate.value() == duplicate_before
 
     assert "TELEMETRY: {" in caplog.text
     assert '"event_name": "similar_click"' in caplog.text
@@ -0,0 +1,80 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from books_rec_api.warmup import WarmupState, run_warmup, warm_async_pool, warm_pool
+
+
+@pytest.mark.asyncio
+async def test_run_warmup_retries_until_every_step_succeeds() -> None:
+    state = WarmupState()
+    calls: list[str] = []
+
+    async def flaky() -> None:
+        calls.append("flaky")
+        if len(calls) == 1:
+            raise ConnectionError("database unavailable")
+
+    async def prime() -> None:
+        calls.append("prime")
+
+    await run_warmup(state, [("pool", flaky), ("similar", prime)], retry_seconds=0.0)
+
+    assert calls == ["flaky", "flaky", "prime"]
+    snapshot = state.snapshot()
+    assert state.ready
+    assert snapshot["status"] == "ready"
+    assert snapshot["attempts"] == 2
+    assert snapshot["last_error"] is None
+    assert set(snapshot["steps_ms"]) == {"pool", "similar"}  # type: ignore[arg-type]
+
+
+@pytest.mark.asyncio
+async def test_run_warmup_reports_the_last_error_while_warming() -> None:
+    state = WarmupState()
+
+    async def failing() -> None:
+        raise ConnectionError("database unavailable")
+
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.05):
+            await run_warmup(state, [("pool", failing)], retry_seconds=0.01)
+
+    assert not state.ready
+    assert state.snapshot()["status"] == "warming"
+    assert state.last_error == "ConnectionError: database unavailable"
+    assert state.attempts >= 1
+
+
+def test_warm_pool_leaves_connections_idle_in_the_pool(tmp_path: Path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'warm.db'}", poolclass=QueuePool, pool_size=3, max_overflow=0
+    )
+
+    warm_pool(engine, 3)
+
+    pool = engine.pool
+    assert isinstance(pool, QueuePool)
+    assert pool.checkedin() == 3
+    assert pool.checkedout() == 0
+
+
+@pytest.mark.asyncio
+async def test_warm_async_pool_leaves_connections_idle_in_the_pool(tmp_path: Path) -> None:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'warm.db'}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=2,
+        max_overflow=0,
+    )
+
+    await warm_async_pool(engine, 2)
+
+    pool = engine.sync_engine.pool
+    assert isinstance(pool, AsyncAdaptedQueuePool)
+    assert pool.checkedin() == 2
+    await engine.dispose()